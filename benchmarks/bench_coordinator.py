@@ -0,0 +1,363 @@
+"""Load benchmark of the fund coordinators against the offline fake upstream.
+
+Sets up 10, 100 and 500 coordinators on a bare Home Assistant core with
+the real quote engine, HTTP client, snapshot store and ledger, pointed at
+``fake_upstream.py``. For each size it runs one cold refresh round (NAV
+and estimates) and several steady rounds (estimates only, NAVs cached
+until the next publish window) and reports refresh throughput, p50/p99
+refresh latency, event loop blocking and memory per fund.
+
+Requires Home Assistant (and numpy) to be importable, e.g. from a Home
+Assistant development environment.
+
+Usage: python benchmarks/bench_coordinator.py [--funds 10 100 500] [--rounds 5]
+           [--latency 0.05] [--no-batch] [--error-rate 0.02] [--max-rps 200]
+           [--save baseline.json] [--compare baseline.json]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from custom_components.daily_fund import engine as engine_module  # noqa: E402
+from custom_components.daily_fund.client import FundHttpClient  # noqa: E402
+from custom_components.daily_fund.const import (  # noqa: E402
+    CONF_FUND_CODE,
+    CONF_FUND_NAME,
+    CONF_HOLD_SHARES,
+    CONF_INITIAL_COST,
+    ENGINE_BATCH_WINDOW,
+    HTTP_TIMEOUT,
+)
+from custom_components.daily_fund.alerts import FundAlerts  # noqa: E402
+from custom_components.daily_fund.coordinator import DailyFundCoordinator  # noqa: E402
+from custom_components.daily_fund.engine import FundQuoteEngine  # noqa: E402
+from custom_components.daily_fund.history import FundHistoryManager  # noqa: E402
+from custom_components.daily_fund.ledger import FundLedger  # noqa: E402
+from custom_components.daily_fund.rate_limiter import TokenBucket  # noqa: E402
+from custom_components.daily_fund.store import async_get_snapshot_store  # noqa: E402
+from custom_components.daily_fund.trading_calendar import (  # noqa: E402
+    async_get_trading_calendar,
+)
+from fake_upstream import (  # noqa: E402
+    FakeUpstream,
+    add_profile_arguments,
+    profile_from_args,
+    serve_in_thread,
+)
+
+# 两轮之间的间隔需超过引擎结果的复用时长，否则后一轮直接命中上一轮的结果
+RESULT_MAX_AGE = 0.2
+ROUND_PAUSE = RESULT_MAX_AGE * 1.5
+LOOP_SAMPLE_INTERVAL = 0.005
+LOOP_BLOCK_THRESHOLD = 0.002
+
+# 与基线比较的指标：(越大越好, 忽略的绝对差值)
+REGRESSION_METRICS = {
+    "throughput": (True, 0),
+    "cold_p99_ms": (False, 50),
+    "steady_p99_ms": (False, 50),
+    "loop_blocked_ms": (False, 100),
+    "memory_per_fund_kib": (False, 1),
+}
+
+
+class BenchHttpClient(FundHttpClient):
+    """Send the integration's requests to the fake upstream instead."""
+
+    def __init__(self, hass: HomeAssistant, upstream: FakeUpstream, rate: float) -> None:
+        """Initialize."""
+        super().__init__(hass)
+        self.upstream = upstream
+        if rate:
+            self.limiter = TokenBucket(rate, max(int(rate), 1))
+        else:
+            self.limiter = TokenBucket(1e9, 10**9)
+
+    async def async_get_text(
+        self, url, params=None, timeout=HTTP_TIMEOUT, validator=None, background=False
+    ):
+        """GET from the fake upstream."""
+        return await super().async_get_text(
+            self.upstream.url(url), params, timeout, validator, background
+        )
+
+    async def async_stream_text(
+        self, url, feed, params=None, timeout=HTTP_TIMEOUT, validator=None
+    ):
+        """Stream from the fake upstream."""
+        return await super().async_stream_text(
+            self.upstream.url(url), feed, params, timeout, validator
+        )
+
+
+class BenchEntry:
+    """The parts of a config entry the coordinator uses."""
+
+    def __init__(self, code: str) -> None:
+        """Initialize."""
+        self.entry_id = code
+        self.title = f"基金{code}"
+        self.data = {
+            CONF_FUND_CODE: code,
+            CONF_FUND_NAME: self.title,
+            CONF_HOLD_SHARES: 1000,
+            CONF_INITIAL_COST: 1000,
+        }
+
+    def async_create_background_task(self, hass, target, name, *args, **kwargs):
+        """Run a task owned by the entry."""
+        return hass.async_create_background_task(target, name)
+
+
+class LoopMonitor:
+    """Measure how long the event loop was unable to run a short timer."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.blocked = 0.0
+        self.worst = 0.0
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Start sampling."""
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop sampling."""
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self) -> None:
+        """Sleep briefly in a loop and record how late each wake-up is."""
+        loop = asyncio.get_running_loop()
+        while True:
+            before = loop.time()
+            await asyncio.sleep(LOOP_SAMPLE_INTERVAL)
+            lag = loop.time() - before - LOOP_SAMPLE_INTERVAL
+            if lag > LOOP_BLOCK_THRESHOLD:
+                self.blocked += lag
+                self.worst = max(self.worst, lag)
+
+
+async def async_build_coordinators(
+    hass: HomeAssistant, client: FundHttpClient, codes: list[str]
+) -> list[DailyFundCoordinator]:
+    """Create the shared objects and one coordinator per fund code."""
+    calendar = await async_get_trading_calendar(hass)
+    engine = FundQuoteEngine(hass, client, calendar)
+    history = FundHistoryManager(hass, client, engine.health)
+    snapshots = await async_get_snapshot_store(hass)
+    ledger = FundLedger(hass)
+    alerts = FundAlerts(hass)
+    coordinators = []
+    for code in codes:
+        coordinator = DailyFundCoordinator(
+            hass, BenchEntry(code), engine, snapshots, history, ledger, alerts
+        )
+        engine.async_register(coordinator)
+        coordinators.append(coordinator)
+    return coordinators
+
+
+async def async_build(hass: HomeAssistant, upstream: FakeUpstream, funds: int, args):
+    """Create a client on the fake upstream and coordinators for funds codes."""
+    client = BenchHttpClient(hass, upstream, args.rate)
+    codes = [f"{index + 1:06d}" for index in range(funds)]
+    return client, await async_build_coordinators(hass, client, codes)
+
+
+async def async_round(coordinators: list[DailyFundCoordinator]) -> list[float]:
+    """Refresh every fund at once; return each refresh's latency."""
+
+    async def _refresh(coordinator: DailyFundCoordinator) -> float:
+        started = time.perf_counter()
+        await coordinator.async_refresh()
+        if not coordinator.last_update_success:
+            raise RuntimeError(f"基金 {coordinator.fund_code} 刷新失败")
+        return time.perf_counter() - started
+
+    results = await asyncio.gather(
+        *(_refresh(coordinator) for coordinator in coordinators), return_exceptions=True
+    )
+    await asyncio.sleep(ROUND_PAUSE)
+    return [result for result in results if isinstance(result, float)]
+
+
+async def async_teardown(hass: HomeAssistant, client, coordinators) -> None:
+    """Cancel the coordinators' timers and stop the core."""
+    for coordinator in coordinators:
+        await coordinator.async_shutdown()
+    await client.async_close()
+    await hass.async_stop(force=True)
+
+
+async def async_measure_speed(upstream: FakeUpstream, funds: int, args) -> dict:
+    """Time the cold and steady refresh rounds of one portfolio size."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        client, coordinators = await async_build(hass, upstream, funds, args)
+        upstream.reset_stats()
+        monitor = LoopMonitor()
+        monitor.start()
+
+        started = time.perf_counter()
+        cold = await async_round(coordinators)
+        steady: list[float] = []
+        for _ in range(args.rounds):
+            steady.extend(await async_round(coordinators))
+        # 扣除两轮之间的等待时间
+        elapsed = time.perf_counter() - started - (args.rounds + 1) * ROUND_PAUSE
+
+        await monitor.stop()
+        await async_teardown(hass, client, coordinators)
+
+    refreshed = len(cold) + len(steady)
+    return {
+        "funds": funds,
+        "failed": (args.rounds + 1) * funds - refreshed,
+        "throughput": refreshed / elapsed,
+        "cold_p50_ms": _percentile(cold, 50) * 1000,
+        "cold_p99_ms": _percentile(cold, 99) * 1000,
+        "steady_p50_ms": _percentile(steady, 50) * 1000,
+        "steady_p99_ms": _percentile(steady, 99) * 1000,
+        "loop_blocked_ms": monitor.blocked * 1000,
+        "loop_worst_ms": monitor.worst * 1000,
+        "requests": sum(upstream.requests.values()),
+        "kib_received": upstream.bytes_sent / 1024,
+        "throttled": upstream.throttled,
+        "not_modified": upstream.not_modified,
+        "errors": upstream.errors,
+    }
+
+
+async def async_measure_memory(upstream: FakeUpstream, funds: int, args) -> float:
+    """Return the memory retained per fund after a cold and a steady round."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        client, coordinators = await async_build(hass, upstream, funds, args)
+        await async_round(coordinators)
+        await async_round(coordinators)
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        await async_teardown(hass, client, coordinators)
+    return retained / funds
+
+
+def _percentile(values: list[float], percent: int) -> float:
+    """Return a percentile, or 0 without samples."""
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[percent - 1]
+
+
+def compare(results: list[dict], baseline_path: str, tolerance: float) -> list[str]:
+    """Return the metrics that regressed against a saved run."""
+    baseline = {row["funds"]: row for row in json.loads(Path(baseline_path).read_text())}
+    regressions = []
+    for row in results:
+        if (base := baseline.get(row["funds"])) is None:
+            continue
+        for metric, (higher_is_better, noise) in REGRESSION_METRICS.items():
+            old, new = base.get(metric), row.get(metric)
+            if not old or new is None or abs(new - old) <= noise:
+                continue
+            change = (new - old) / old
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append(
+                    f"{row['funds']} funds: {metric} {old:.1f} -> {new:.1f} ({change:+.0%})"
+                )
+    return regressions
+
+
+async def async_main(args) -> list[dict]:
+    """Serve the fake upstream and measure every portfolio size."""
+    engine_module.ENGINE_BATCH_WINDOW = args.batch_window
+    engine_module.ENGINE_RESULT_MAX_AGE = RESULT_MAX_AGE
+    upstream, stop = serve_in_thread(profile_from_args(args))
+    results = []
+    try:
+        print(
+            f"{'funds':>6} {'fund/s':>8} {'cold p50':>9} {'cold p99':>9} "
+            f"{'p50':>8} {'p99':>8} {'blocked':>9} {'worst':>8} "
+            f"{'req':>7} {'KiB':>8} {'KiB/fund':>9} {'failed':>6}"
+        )
+        for funds in args.funds:
+            row = await async_measure_speed(upstream, funds, args)
+            row["memory_per_fund_kib"] = (
+                await async_measure_memory(upstream, funds, args) / 1024
+            )
+            results.append(row)
+            print(
+                f"{funds:>6} {row['throughput']:>8.1f} {row['cold_p50_ms']:>7.0f}ms "
+                f"{row['cold_p99_ms']:>7.0f}ms {row['steady_p50_ms']:>6.0f}ms "
+                f"{row['steady_p99_ms']:>6.0f}ms {row['loop_blocked_ms']:>7.1f}ms "
+                f"{row['loop_worst_ms']:>6.1f}ms {row['requests']:>7} "
+                f"{row['kib_received']:>8.0f} {row['memory_per_fund_kib']:>9.1f} "
+                f"{row['failed']:>6}"
+            )
+    finally:
+        stop()
+    return results
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--funds", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--rounds", type=int, default=5, help="steady rounds per size")
+    parser.add_argument(
+        "--batch-window", type=float, default=ENGINE_BATCH_WINDOW,
+        help="engine batching window (s)",
+    )
+    parser.add_argument(
+        "--rate", type=float, default=0,
+        help="client rate limit in requests/s (0: unlimited)",
+    )
+    parser.add_argument("--save", help="write the results to a JSON file")
+    parser.add_argument("--compare", help="fail if worse than a saved JSON run")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed regression")
+    parser.add_argument("--verbose", action="store_true", help="show integration warnings")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    # 注入的错误与限流会产生大量预期内的警告
+    logging.basicConfig(level=logging.WARNING if args.verbose else logging.CRITICAL)
+
+    results = asyncio.run(async_main(args))
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(results, indent=2))
+    if args.compare:
+        if regressions := compare(results, args.compare, args.tolerance):
+            print("regressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("no regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Micro-benchmark for the pingzhongdata.js extractor.
+
+Compares the old per-key regex scanning (three patterns built on the fly
+for each of six keys, each run over the whole body) with the precompiled
+single-pass extractor, both on a complete body and when streaming the
+body in chunks and stopping once the NAV trend array has arrived.
+
+Usage: python benchmarks/bench_pingzhong.py [--points 3000] [--repeat 50]
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import re
+import timeit
+from pathlib import Path
+
+# 直接按路径加载，避免导入依赖 Home Assistant 的集成包
+_MODULE_PATH = (
+    Path(__file__).resolve().parent.parent
+    / "custom_components" / "daily_fund" / "pingzhong.py"
+)
+_spec = importlib.util.spec_from_file_location("pingzhong", _MODULE_PATH)
+pingzhong = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(pingzhong)
+
+CHUNK_SIZE = 65536
+OLD_KEYS = ("fS_name", "fS_dwjz", "fS_gsz", "fS_gszzl", "fS_jzrq", "fS_gztime")
+
+
+def build_payload(points: int) -> str:
+    """Build a synthetic pingzhongdata.js body shaped like the real one."""
+    day_ms = 86400000
+    start = 1104508800000
+
+    def trend(offset: float) -> str:
+        return ",".join(
+            '{"x":%d,"y":%.4f,"equityReturn":%.2f,"unitMoney":""}'
+            % (start + i * day_ms, 1 + offset + i / 10000, (i % 7) - 3)
+            for i in range(points)
+        )
+
+    ac_worth = ",".join(
+        "[%d,%.4f]" % (start + i * day_ms, 2 + i / 10000) for i in range(points)
+    )
+    grand_total = ",".join(
+        "[%d,%.2f]" % (start + i * day_ms, i / 100) for i in range(points)
+    )
+    return (
+        '/*基金或股票信息*/var ishb=false;/*基金名称*/var fS_name = "示例成长混合";'
+        'var fS_code = "000001";/*原费率*/var fund_sourceRate="1.50";'
+        'var fund_Rate="0.15";var fund_minsg="10";'
+        'var stockCodes=["6000001","0000021"];var syl_1n="12.34";var syl_6y="5.67";'
+        f"var Data_netWorthTrend = [{trend(0)}];"
+        f"var Data_ACWorthTrend = [{ac_worth}];"
+        f'var Data_grandTotal = [{{"name":"示例成长混合","data":[{grand_total}]}}];'
+        'var Data_currentFundManager =[{"id":"1","name":"某某"}];'
+    )
+
+
+def old_extract(text: str) -> dict[str, str]:
+    """Replicate the previous _extract_js_value loop."""
+    values = {}
+    for key in OLD_KEYS:
+        patterns = [
+            rf'{key}\s*=\s*"([^"]*)"',
+            rf"{key}\s*=\s*'([^']*)'",
+            rf"{key}\s*=\s*([^;]*);",
+        ]
+        for pattern in patterns:
+            match = re.search(pattern, text)
+            if match and (value := match.group(1).strip()):
+                values[key] = value
+                break
+    return values
+
+
+def stream_extract(text: str) -> dict[str, str]:
+    """Feed the body in chunks and stop as soon as possible."""
+    extractor = pingzhong.PingzhongExtractor()
+    for offset in range(0, len(text), CHUNK_SIZE):
+        if extractor.feed(text[offset:offset + CHUNK_SIZE]):
+            break
+    return extractor.result()
+
+
+def bytes_read(text: str) -> int:
+    """Return how many characters the streaming extractor consumes."""
+    extractor = pingzhong.PingzhongExtractor()
+    for offset in range(0, len(text), CHUNK_SIZE):
+        if extractor.feed(text[offset:offset + CHUNK_SIZE]):
+            break
+    return extractor.size
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=3000, help="NAV points per array")
+    parser.add_argument("--repeat", type=int, default=50, help="iterations per case")
+    args = parser.parse_args()
+
+    text = build_payload(args.points)
+    print(f"payload: {len(text.encode()) / 1024:.0f} KiB, {args.points} NAV points")
+    print(f"streaming reads {bytes_read(text) / len(text):.0%} of the body")
+
+    cases = {
+        "old per-key regex": lambda: old_extract(text),
+        "single pass (full body)": lambda: pingzhong.extract_pingzhong(text),
+        "single pass (streamed)": lambda: stream_extract(text),
+    }
+    baseline = None
+    for name, func in cases.items():
+        best = min(timeit.repeat(func, number=args.repeat, repeat=3)) / args.repeat
+        baseline = baseline or best
+        print(f"{name:<26} {best * 1000:8.3f} ms  x{baseline / best:6.1f}")
+
+    print("extracted:", stream_extract(text))
+
+
+if __name__ == "__main__":
+    main()
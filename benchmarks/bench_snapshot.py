@@ -0,0 +1,333 @@
+"""Allocation and time benchmark for the per-fund snapshot model.
+
+Compares the previous per-tick result dicts (a 28-key dict built by
+``_process_fund_data`` with every figure rounded eagerly, plus a second
+dict mapping each key to its Chinese attribute label on every state
+write) with the slotted ``FundSnapshot`` and its cached attribute view.
+Each tick reads what the entities read: the main sensor's state key and
+attributes, the ten value sensors and the portfolio contribution.
+
+Three kinds of tick are measured for N funds: a changed tick, where
+every fund gets new upstream values; an unchanged tick, where the
+entities only check their state keys and values; and a re-render, where
+the values are unchanged but the main sensor writes its state again (for
+example after the history statistics or the intraday range moved). For
+each, the time per fund and the bytes held by everything the tick
+creates are reported, along with what stays alive between ticks.
+
+Usage: python benchmarks/bench_snapshot.py [--funds 100 500] [--repeat 20]
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import importlib.util
+import itertools
+import timeit
+import tracemalloc
+from pathlib import Path
+
+# 直接按路径加载，避免导入依赖 Home Assistant 的集成包
+_MODULE_PATH = (
+    Path(__file__).resolve().parent.parent
+    / "custom_components" / "daily_fund" / "snapshot.py"
+)
+_spec = importlib.util.spec_from_file_location("snapshot", _MODULE_PATH)
+snapshot = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(snapshot)
+
+VALUE_KEYS = (
+    "estimated_net_value",
+    "estimated_growth_rate",
+    "estimated_value",
+    "estimated_profit",
+    "estimated_profit_rate",
+    "actual_net_value",
+    "actual_value",
+    "actual_profit",
+    "actual_profit_rate",
+    "realized_profit",
+)
+CONTRIBUTION_KEYS = ("estimated_value", "actual_value", "initial_cost")
+HOLDING = {"hold_shares": 1234.56, "initial_cost": 1500.0, "avg_net_value": 1.215}
+
+
+def build_raw(funds: int, tick: int) -> list[dict[str, str]]:
+    """Build the raw string fields the fetchers return for every fund."""
+    return [
+        {
+            "name": f"示例混合{index:06d}",
+            "dwjz": f"{1 + index / 1000:.4f}",
+            "jzrq": "2024-01-04",
+            "gsz": f"{1 + index / 1000 + tick / 10000:.4f}",
+            "gszzl": f"{tick / 100:.2f}",
+            "gztime": f"2024-01-05 {9 + tick // 60:02d}:{tick % 60:02d}",
+            "prev_dwjz": f"{1 + index / 1000 - 0.01:.4f}",
+            "prev_jzrq": "2024-01-03",
+        }
+        for index in range(funds)
+    ]
+
+
+def _parse_number(value):
+    """Copy of the coordinator's number parser."""
+    if value is None:
+        return 0
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        pass
+    try:
+        return float(str(value).replace('%', '').replace(',', ''))
+    except (ValueError, TypeError):
+        return 0
+
+
+def _old_parse_number(value):
+    """Copy of the previous coordinator number parser."""
+    if value is None:
+        return 0
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(str(value).replace('%', '').replace(',', ''))
+    except (ValueError, TypeError):
+        return 0
+
+
+def _format_number(value, decimals=2):
+    """Copy of the previous coordinator rounding helper."""
+    try:
+        factor = 10 ** decimals
+        return round(value * factor) / factor
+    except (TypeError, ValueError):
+        return 0
+
+
+def old_process(code: str, raw: dict[str, str]) -> dict:
+    """Replicate the previous _process_fund_data."""
+    shares = HOLDING["hold_shares"]
+    cost = HOLDING["initial_cost"]
+    gsz = _old_parse_number(raw.get('gsz', 0))
+    gszzl = _old_parse_number(raw.get('gszzl', 0))
+    dwjz = _old_parse_number(raw.get('dwjz', 0))
+    prev_dwjz = _old_parse_number(raw.get('prev_dwjz', 0))
+    if gsz == 0 and dwjz > 0:
+        gsz = dwjz
+    if prev_dwjz <= 0:
+        prev_net_value = prev_value = prev_profit = 0
+        prev_profit_rate = prev_growth_rate = rise_fall_net_value = 0
+    else:
+        prev_net_value = _format_number(prev_dwjz, 4)
+        prev_value = _format_number(shares * prev_dwjz, 2)
+        prev_profit = _format_number(prev_value - cost, 2)
+        prev_profit_rate = _format_number((prev_profit / cost * 100) if cost else 0, 2)
+        prev_growth_rate = _format_number((dwjz - prev_dwjz) / prev_dwjz * 100, 4)
+        rise_fall_net_value = _format_number(dwjz - prev_dwjz, 4)
+    estimated_value = _format_number(shares * gsz, 2)
+    estimated_profit = _format_number(estimated_value - cost, 2)
+    actual_value = _format_number(shares * dwjz, 2)
+    actual_profit = _format_number(actual_value - cost, 2)
+    return {
+        "fund_code": code,
+        "fund_name": code,
+        "fund_full_name": raw.get('name', code),
+        "rise_fall_net_value": rise_fall_net_value,
+        "rise_fall_icon": "📈" if estimated_profit >= actual_profit else "📉",
+        "avg_net_value": _format_number(HOLDING["avg_net_value"], 4),
+        "hold_shares": _format_number(shares, 2),
+        "initial_cost": _format_number(cost, 2),
+        "net_value_date": raw.get('jzrq', ''),
+        "actual_net_value": _format_number(dwjz, 4),
+        "actual_value": actual_value,
+        "actual_profit": actual_profit,
+        "actual_profit_rate": _format_number((actual_profit / cost * 100) if cost else 0, 2),
+        "update_time": raw.get('gztime', ''),
+        "estimated_net_value": _format_number(gsz, 4),
+        "estimated_growth_rate": _format_number(gszzl, 4),
+        "estimated_value": estimated_value,
+        "estimated_profit": estimated_profit,
+        "estimated_profit_rate": _format_number(
+            (estimated_profit / cost * 100) if cost else 0, 2
+        ),
+        "prev_net_value": prev_net_value,
+        "prev_net_value_date": raw.get('prev_jzrq', ''),
+        "prev_value": prev_value,
+        "prev_profit": prev_profit,
+        "prev_profit_rate": prev_profit_rate,
+        "prev_growth_rate": prev_growth_rate,
+        "cost_method": None,
+        "realized_profit": _format_number(0, 2),
+        "dividends": _format_number(0, 2),
+    }
+
+
+def old_attributes(data: dict) -> dict:
+    """Replicate the previous labelled attributes of the main sensor."""
+    return {
+        "基金代码": data.get("fund_code"),
+        "基金名称": data.get("fund_name"),
+        "基金全称": data.get("fund_full_name"),
+        "涨跌净值": data.get("rise_fall_net_value"),
+        "涨跌图标": data.get("rise_fall_icon"),
+        "平均净值": data.get("avg_net_value"),
+        "持仓份额": data.get("hold_shares"),
+        "初始成本": data.get("initial_cost"),
+        "成本计算方法": data.get("cost_method"),
+        "已实现收益": data.get("realized_profit"),
+        "累计分红": data.get("dividends"),
+        "净值日期": data.get("net_value_date"),
+        "单位净值": data.get("actual_net_value"),
+        "前天日期": data.get("prev_net_value_date"),
+        "前天净值": data.get("prev_net_value"),
+        "前天市值": data.get("prev_value"),
+        "前天收益": data.get("prev_profit"),
+        "前天收益率": data.get("prev_profit_rate"),
+        "前天增长率": data.get("prev_growth_rate"),
+        "持仓市值": data.get("actual_value"),
+        "持仓收益": data.get("actual_profit"),
+        "持仓收益率": data.get("actual_profit_rate"),
+        "估算时间": data.get("update_time"),
+        "估算净值": data.get("estimated_net_value"),
+        "估算增长率": data.get("estimated_growth_rate"),
+        "估算市值": data.get("estimated_value"),
+        "估算收益": data.get("estimated_profit"),
+        "估算收益率": data.get("estimated_profit_rate"),
+        "缓存数据": False,
+    }
+
+
+def old_read(data: dict) -> tuple:
+    """Read the state key, value sensors and contribution of a result dict."""
+    key = tuple(data.values())
+    for name in VALUE_KEYS:
+        data.get(name)
+    tuple(float(data.get(name) or 0) for name in CONTRIBUTION_KEYS)
+    return key
+
+
+def new_process(code: str, raw: dict[str, str]) -> snapshot.FundSnapshot:
+    """Build a snapshot the way the coordinator does."""
+    return snapshot.FundSnapshot(
+        fund_code=code,
+        fund_name=code,
+        fund_full_name=raw.get('name', code),
+        net_value_date=raw.get('jzrq', ''),
+        update_time=raw.get('gztime', ''),
+        prev_net_value_date=raw.get('prev_jzrq', ''),
+        dwjz=_parse_number(raw.get('dwjz', 0)),
+        gsz=_parse_number(raw.get('gsz', 0)),
+        gszzl=_parse_number(raw.get('gszzl', 0)),
+        prev_dwjz=_parse_number(raw.get('prev_dwjz', 0)),
+        hold_shares=HOLDING["hold_shares"],
+        initial_cost=HOLDING["initial_cost"],
+        avg_net_value=HOLDING["avg_net_value"],
+    )
+
+
+def new_attributes(data: snapshot.FundSnapshot) -> dict:
+    """Merge the cached view the way the main sensor does."""
+    return {**data.attributes, "缓存数据": False}
+
+
+def new_read(data: snapshot.FundSnapshot) -> tuple:
+    """Read the state key, value sensors and contribution of a snapshot."""
+    for name in VALUE_KEYS:
+        getattr(data, name)
+    tuple(float(getattr(data, name)) for name in CONTRIBUTION_KEYS)
+    # 快照本身即状态键
+    return data
+
+
+MODELS = {
+    "dicts": (old_process, old_read, old_attributes),
+    "snapshot": (new_process, new_read, new_attributes),
+}
+
+
+def measure(funds: int, repeat: int) -> dict[str, dict[str, float]]:
+    """Measure both models for a number of funds.
+
+    Home Assistant copies the attributes it is given into the state, so
+    the dict returned by the sensor is counted as transient; what a tick
+    keeps is the fund data held by the coordinator and the state key held
+    by the entity.
+    """
+    codes = [f"{index:06d}" for index in range(funds)]
+    raws = [build_raw(funds, tick) for tick in range(repeat + 1)]
+    results: dict[str, dict[str, float]] = {}
+    for name, (process, read, attributes) in MODELS.items():
+        ticks = itertools.cycle(raws[1:])
+        current = [process(code, raw) for code, raw in zip(codes, raws[0])]
+
+        def changed():
+            return [
+                (data, read(data), attributes(data))
+                for data in map(process, codes, next(ticks))
+            ]
+
+        def unchanged():
+            return [read(data) for data in current]
+
+        def rerender():
+            return [attributes(data) for data in current]
+
+        for data in current:
+            attributes(data)
+        result = {}
+        for case, func in (
+            ("changed", changed), ("unchanged", unchanged), ("rerender", rerender)
+        ):
+            best = min(timeit.repeat(func, number=repeat, repeat=5)) / repeat
+            gc.collect()
+            tracemalloc.start()
+            before, _ = tracemalloc.get_traced_memory()
+            kept = func()
+            allocated, _ = tracemalloc.get_traced_memory()
+            if case == "changed":
+                # 属性交给 Home Assistant 复制后即释放
+                for item in kept:
+                    item[2].clear()
+                gc.collect()
+                retained, _ = tracemalloc.get_traced_memory()
+                result["retained_b"] = (retained - before) / funds
+            tracemalloc.stop()
+            del kept
+            result[f"{case}_us"] = best / funds * 1e6
+            result[f"{case}_b"] = (allocated - before) / funds
+        results[name] = result
+    return results
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--funds", type=int, nargs="+", default=[100, 500], help="fund counts")
+    parser.add_argument("--repeat", type=int, default=20, help="ticks per measurement")
+    args = parser.parse_args()
+
+    # 两种模型的数值必须一致
+    raw = build_raw(1, 7)[0]
+    data = new_process("000000", raw)
+    assert data.as_dict() == old_process("000000", raw)
+    assert new_attributes(data) == old_attributes(old_process("000000", raw))
+
+    print("per fund and tick: time / bytes allocated")
+    print(
+        f"{'funds':>5} {'model':<9} {'changed':>18} {'unchanged':>18} "
+        f"{'re-render':>18} {'retained':>9}"
+    )
+    for funds in args.funds:
+        results = measure(funds, args.repeat)
+        for name, result in results.items():
+            cases = " ".join(
+                f"{result[f'{case}_us']:>7.2f}us {result[f'{case}_b']:>6.0f} B"
+                for case in ("changed", "unchanged", "rerender")
+            )
+            print(f"{funds:>5} {name:<9} {cases} {result['retained_b']:>7.0f} B")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,397 @@
+"""Offline stand-in for the eastmoney endpoints used by the integration.
+
+Serves ``f10/lsjz`` (history NAV), the fundgz JSONP estimate,
+``pingzhongdata.js`` and the multi-code ``FundMNFInfo`` endpoint from a
+deterministic random walk per fund code, with configurable latency,
+error rate, server-side throttling, ETag revalidation and payload size.
+Upstream URLs are mapped onto the server by prefixing the host to the
+path, see ``FakeUpstream.url``.
+
+Only aiohttp is required. Run standalone to poke at it by hand:
+
+    python benchmarks/fake_upstream.py --port 8765 --latency 0.2
+    curl http://127.0.0.1:8765/fundgz.1234567.com.cn/js/000001.js
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+import zlib
+from array import array
+from bisect import bisect_left
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import date, timedelta
+from urllib.parse import urlsplit
+
+from aiohttp import web
+
+DAY_MS = 86400000
+# 以北京时间零点为净值走势的时间戳
+CHINA_OFFSET_MS = 8 * 3600 * 1000
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+CHUNK_SIZE = 65536
+
+
+@dataclass
+class UpstreamProfile:
+    """How the fake upstream behaves."""
+
+    latency: float = 0.05  # 基础响应延迟(秒)
+    jitter: float = 0.05  # 额外的随机延迟上限(秒)
+    error_rate: float = 0.0  # 返回 HTTP 500 的概率
+    max_rps: float = 0.0  # 服务端限流阈值(每秒请求数)，0为不限流
+    history_days: int = 1500  # 每只基金的历史净值天数，决定平中数据与历史接口的大小
+    batch: bool = True  # 是否提供多代码批量接口
+    etag: bool = True  # 是否返回 ETag 并对条件请求返回 304
+    seed: int = 0
+
+
+class FundSeries:
+    """Deterministic NAV history of one fake fund, oldest first."""
+
+    def __init__(self, code: str, days: int, seed: int) -> None:
+        """Build a weekday random walk ending on the last weekday."""
+        rng = random.Random(zlib.crc32(code.encode()) ^ seed)
+        self.code = code
+        self.name = f"模拟基金{code}"
+        last = date.today()
+        while last.weekday() >= 5:
+            last -= timedelta(days=1)
+
+        ordinals = []
+        day = last
+        while len(ordinals) < days:
+            if day.weekday() < 5:
+                ordinals.append(day.toordinal())
+            day -= timedelta(days=1)
+        ordinals.reverse()
+
+        self.days = array("l", ordinals)
+        self.nav = array("d")
+        value = 1.0
+        for _ in ordinals:
+            value = max(0.1, value * (1 + rng.gauss(0.0003, 0.012)))
+            self.nav.append(round(value, 4))
+        self.dividend = round(rng.uniform(0, 1), 4)
+        self.growth = round(rng.gauss(0, 1.2), 2)
+
+    @property
+    def estimate(self) -> float:
+        """Return today's estimated NAV."""
+        return round(self.nav[-1] * (1 + self.growth / 100), 4)
+
+    def date(self, index: int) -> str:
+        """Return the ISO date of a row."""
+        return date.fromordinal(self.days[index]).isoformat()
+
+
+class FakeUpstream:
+    """aiohttp application serving the fake endpoints."""
+
+    def __init__(self, profile: UpstreamProfile) -> None:
+        """Initialize."""
+        self.profile = profile
+        self.base_url = ""
+        self._rng = random.Random(profile.seed)
+        self._series: dict[str, FundSeries] = {}
+        self._window_start = 0.0
+        self._window_count = 0
+        self.requests: dict[str, int] = {}
+        self.bytes_sent = 0
+        self.errors = 0
+        self.throttled = 0
+        self.not_modified = 0
+
+        self.app = web.Application()
+        self.app.router.add_get("/api.fund.eastmoney.com/f10/lsjz", self._lsjz)
+        self.app.router.add_get("/fundgz.1234567.com.cn/js/{code}.js", self._fundgz)
+        self.app.router.add_get(
+            "/fund.eastmoney.com/pingzhongdata/{code}.js", self._pingzhong
+        )
+        self.app.router.add_get(
+            "/fundmobapi.eastmoney.com/FundMNewApi/FundMNFInfo", self._batch
+        )
+
+    def url(self, upstream_url: str) -> str:
+        """Map an upstream URL onto this server."""
+        parts = urlsplit(upstream_url)
+        return f"{self.base_url}/{parts.netloc}{parts.path}"
+
+    def series(self, code: str) -> FundSeries:
+        """Return the fake history of a fund, generating it on first use."""
+        if (series := self._series.get(code)) is None:
+            series = self._series[code] = FundSeries(
+                code, self.profile.history_days, self.profile.seed
+            )
+        return series
+
+    def reset_stats(self) -> None:
+        """Clear the request counters."""
+        self.requests = {}
+        self.bytes_sent = self.errors = self.throttled = self.not_modified = 0
+
+    async def _admit(self, endpoint: str) -> web.Response | None:
+        """Count, delay and possibly fail a request; return a response to fail with."""
+        self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+        profile = self.profile
+        await asyncio.sleep(profile.latency + self._rng.uniform(0, profile.jitter))
+
+        if profile.max_rps:
+            now = time.monotonic()
+            if now - self._window_start >= 1:
+                self._window_start, self._window_count = now, 0
+            self._window_count += 1
+            if self._window_count > profile.max_rps:
+                self.throttled += 1
+                if endpoint == "fundgz":
+                    # 真实的 fundgz 限流时返回空白内容
+                    return web.Response(text="")
+                return web.Response(status=429)
+
+        if self._rng.random() < profile.error_rate:
+            self.errors += 1
+            return web.Response(status=500)
+        return None
+
+    def _not_modified(self, request: web.Request, body: bytes) -> tuple[web.Response | None, dict]:
+        """Return a 304 if the client holds this body, and the ETag headers."""
+        if not self.profile.etag:
+            return None, {}
+        etag = f'"{zlib.crc32(body):08x}"'
+        if request.headers.get("If-None-Match") == etag:
+            self.not_modified += 1
+            return web.Response(status=304, headers={"ETag": etag}), {}
+        return None, {"ETag": etag}
+
+    def _respond(self, request: web.Request, text: str, content_type: str) -> web.Response:
+        """Return a body and count its size."""
+        body = text.encode()
+        not_modified, headers = self._not_modified(request, body)
+        if not_modified is not None:
+            return not_modified
+        self.bytes_sent += len(body)
+        return web.Response(
+            body=body, content_type=content_type, charset="utf-8", headers=headers
+        )
+
+    async def _lsjz(self, request: web.Request) -> web.Response:
+        """Serve one page of history NAVs."""
+        if (failed := await self._admit("lsjz")) is not None:
+            return failed
+        query = request.query
+        series = self.series(query.get("fundCode", "000000"))
+        page_index = int(query.get("pageIndex", 1))
+        page_size = int(query.get("pageSize", 20))
+        start = query.get("startDate") or ""
+
+        # 新的在前，可按起始日期过滤
+        first = bisect_left(series.days, date.fromisoformat(start).toordinal()) if start else 0
+        newest = len(series.days) - 1 - (page_index - 1) * page_size
+        rows = [
+            {
+                "FSRQ": series.date(index),
+                "DWJZ": f"{series.nav[index]:.4f}",
+                "LJJZ": f"{series.nav[index] + series.dividend:.4f}",
+                "JZZZL": "",
+            }
+            for index in range(newest, max(newest - page_size, first - 1), -1)
+        ]
+        total = len(series.days) - first
+        return self._respond(
+            request,
+            json.dumps({
+                "Data": {"LSJZList": rows, "FundName": series.name},
+                "ErrCode": 0,
+                "TotalCount": total,
+            }, ensure_ascii=False),
+            "application/json",
+        )
+
+    async def _fundgz(self, request: web.Request) -> web.Response:
+        """Serve the JSONP estimate."""
+        if (failed := await self._admit("fundgz")) is not None:
+            return failed
+        series = self.series(request.match_info["code"])
+        payload = {
+            "fundcode": series.code,
+            "name": series.name,
+            "jzrq": series.date(-1),
+            "dwjz": f"{series.nav[-1]:.4f}",
+            "gsz": f"{series.estimate:.4f}",
+            "gszzl": f"{series.growth:.2f}",
+            "gztime": f"{date.today().isoformat()} 14:30",
+        }
+        return self._respond(
+            request,
+            f"jsonpgz({json.dumps(payload, ensure_ascii=False)});",
+            "application/javascript",
+        )
+
+    async def _pingzhong(self, request: web.Request) -> web.StreamResponse:
+        """Stream the pingzhongdata.js body."""
+        if (failed := await self._admit("pingzhong")) is not None:
+            return failed
+        series = self.series(request.match_info["code"])
+        trend = ",".join(
+            '{"x":%d,"y":%.4f,"equityReturn":0,"unitMoney":""}'
+            % ((series.days[i] - EPOCH_ORDINAL) * DAY_MS - CHINA_OFFSET_MS, series.nav[i])
+            for i in range(len(series.days))
+        )
+        ac_worth = ",".join(
+            "[%d,%.4f]"
+            % ((series.days[i] - EPOCH_ORDINAL) * DAY_MS - CHINA_OFFSET_MS, series.nav[i] + series.dividend)
+            for i in range(len(series.days))
+        )
+        body = (
+            f'var ishb=false;var fS_name = "{series.name}";var fS_code = "{series.code}";'
+            'var fund_sourceRate="1.50";var fund_Rate="0.15";'
+            f"var Data_netWorthTrend = [{trend}];"
+            f"var Data_ACWorthTrend = [{ac_worth}];"
+            'var Data_currentFundManager =[];'
+        ).encode()
+
+        not_modified, headers = self._not_modified(request, body)
+        if not_modified is not None:
+            return not_modified
+
+        # 分块写出，客户端取到走势数组后提前断开时不必发送全部内容
+        response = web.StreamResponse(headers=headers)
+        response.content_type = "application/javascript"
+        response.charset = "utf-8"
+        await response.prepare(request)
+        try:
+            for offset in range(0, len(body), CHUNK_SIZE):
+                chunk = body[offset:offset + CHUNK_SIZE]
+                await response.write(chunk)
+                self.bytes_sent += len(chunk)
+            await response.write_eof()
+        except (ConnectionResetError, asyncio.CancelledError):
+            pass
+        return response
+
+    async def _batch(self, request: web.Request) -> web.Response:
+        """Serve the multi-code estimates."""
+        if not self.profile.batch:
+            raise web.HTTPNotFound()
+        if (failed := await self._admit("batch")) is not None:
+            return failed
+        datas = []
+        for code in request.query.get("Fcodes", "").split(","):
+            if not code:
+                continue
+            series = self.series(code)
+            datas.append({
+                "FCODE": code,
+                "SHORTNAME": series.name,
+                "NAV": f"{series.nav[-1]:.4f}",
+                "PDATE": series.date(-1),
+                "GSZ": f"{series.estimate:.4f}",
+                "GSZZL": f"{series.growth:.2f}",
+                "GZTIME": f"{date.today().isoformat()} 14:30",
+            })
+        return self._respond(
+            request,
+            json.dumps({"Datas": datas, "ErrCode": 0}, ensure_ascii=False),
+            "application/json",
+        )
+
+    async def async_start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving in the running loop; return the base URL."""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    async def async_stop(self) -> None:
+        """Stop serving."""
+        await self._runner.cleanup()
+
+
+def serve_in_thread(profile: UpstreamProfile) -> tuple[FakeUpstream, Callable[[], None]]:
+    """Run a fake upstream on its own loop and thread; return it and a stop function.
+
+    Keeping the server off the measured event loop means its own work
+    does not show up as loop blocking of the code under test.
+    """
+    upstream = FakeUpstream(profile)
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    def _run() -> None:
+        """Serve until stopped."""
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(upstream.async_start())
+        started.set()
+        loop.run_forever()
+        loop.run_until_complete(upstream.async_stop())
+        loop.close()
+
+    thread = threading.Thread(target=_run, name="fake-upstream", daemon=True)
+    thread.start()
+    started.wait()
+
+    def _stop() -> None:
+        """Stop serving and wait for the thread."""
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+
+    return upstream, _stop
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the profile options to a command line parser."""
+    defaults = UpstreamProfile()
+    parser.add_argument("--latency", type=float, default=defaults.latency, help="base latency (s)")
+    parser.add_argument("--jitter", type=float, default=defaults.jitter, help="extra random latency (s)")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="share of HTTP 500 responses")
+    parser.add_argument("--max-rps", type=float, default=defaults.max_rps, help="throttle above this many requests/s (0: off)")
+    parser.add_argument("--history-days", type=int, default=defaults.history_days, help="NAV rows per fund")
+    parser.add_argument("--no-batch", action="store_true", help="disable the multi-code endpoint")
+    parser.add_argument("--no-etag", action="store_true", help="ignore conditional requests")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def profile_from_args(args: argparse.Namespace) -> UpstreamProfile:
+    """Build a profile from parsed command line options."""
+    return UpstreamProfile(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        max_rps=args.max_rps,
+        history_days=args.history_days,
+        batch=not args.no_batch,
+        etag=not args.no_etag,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    """Serve until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    async def _serve() -> None:
+        """Serve forever."""
+        upstream = FakeUpstream(profile_from_args(args))
+        print("serving on", await upstream.async_start(args.host, args.port))
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(_serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
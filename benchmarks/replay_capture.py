@@ -0,0 +1,174 @@
+"""Replay a recorded upstream capture through the fund coordinators.
+
+Loads an archive written by the ``daily_fund.start_capture`` service,
+creates one coordinator per recorded fund on a bare Home Assistant core
+with the real quote engine, and replays the recorded refresh rounds in
+order. Every request is answered with the response recorded at that
+moment, including recorded errors and throttling, and the trading
+calendar and engine clocks follow the recorded time, so a whole trading
+day replays deterministically in seconds. Use it to reproduce a bad day
+or to profile the parsing and processing path without the network.
+
+Requires Home Assistant (and numpy) to be importable, e.g. from a Home
+Assistant development environment.
+
+Usage: python benchmarks/replay_capture.py CAPTURE.jsonl.gz [--speed 0]
+           [--gap 5] [--profile] [--top 25]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import cProfile
+import logging
+import pstats
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from custom_components.daily_fund import engine as engine_module  # noqa: E402
+from custom_components.daily_fund import health as health_module  # noqa: E402
+from custom_components.daily_fund.capture import (  # noqa: E402
+    CaptureArchive,
+    ReplayHttpClient,
+)
+from custom_components.daily_fund.trading_calendar import (  # noqa: E402
+    async_get_trading_calendar,
+)
+from bench_coordinator import (  # noqa: E402
+    LoopMonitor,
+    _percentile,
+    async_build_coordinators,
+    async_teardown,
+)
+
+
+class ReplayClock:
+    """Recorded time, advancing in real time within a round."""
+
+    def __init__(self, moment: float) -> None:
+        """Initialize."""
+        self.set(moment)
+
+    def set(self, moment: float) -> None:
+        """Jump to a recorded moment."""
+        self.moment = moment
+        self._set_at = time.perf_counter()
+
+    def __call__(self) -> float:
+        """Return the current replayed time."""
+        return self.moment + time.perf_counter() - self._set_at
+
+
+async def async_replay(archive: CaptureArchive, args) -> dict:
+    """Replay every recorded round and return the measurements."""
+    clock = ReplayClock(archive.start)
+    # 引擎结果复用与熔断计时按录制时间推进
+    engine_module.monotonic = clock
+    health_module.monotonic = clock
+    engine_module.ENGINE_BATCH_WINDOW = 0
+
+    rounds = archive.rounds(args.gap)
+    durations: list[float] = []
+    refreshed = failed = 0
+    profiler = cProfile.Profile() if args.profile else None
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        client = ReplayHttpClient(hass, archive)
+        calendar = await async_get_trading_calendar(hass)
+        calendar.now = lambda: datetime.fromtimestamp(clock(), calendar.tz)
+        coordinators = await async_build_coordinators(hass, client, archive.fund_codes())
+
+        monitor = LoopMonitor()
+        monitor.start()
+        started = time.perf_counter()
+        previous = rounds[0][0] if rounds else 0.0
+        for start, end in rounds:
+            if args.speed > 0:
+                await asyncio.sleep((start - previous) / args.speed)
+            previous = start
+            # 一轮内的请求都按该轮最后一次录制的响应作答
+            client.clock = end
+            clock.set(end)
+            round_started = time.perf_counter()
+            if profiler is not None:
+                profiler.enable()
+            await asyncio.gather(
+                *(coordinator.async_refresh() for coordinator in coordinators)
+            )
+            if profiler is not None:
+                profiler.disable()
+            durations.append(time.perf_counter() - round_started)
+            for coordinator in coordinators:
+                if coordinator.last_update_success:
+                    refreshed += 1
+                else:
+                    failed += 1
+        elapsed = time.perf_counter() - started
+
+        await monitor.stop()
+        await async_teardown(hass, client, coordinators)
+
+    if profiler is not None:
+        pstats.Stats(profiler).sort_stats(args.sort).print_stats(args.top)
+    return {
+        "funds": len(coordinators),
+        "rounds": len(rounds),
+        "recorded_hours": (archive.end - archive.start) / 3600,
+        "refreshed": refreshed,
+        "failed": failed,
+        "missing": client.missing,
+        "wall_s": elapsed,
+        "round_p50_ms": _percentile(durations, 50) * 1000,
+        "round_p99_ms": _percentile(durations, 99) * 1000,
+        "loop_blocked_ms": monitor.blocked * 1000,
+        "loop_worst_ms": monitor.worst * 1000,
+    }
+
+
+def main() -> None:
+    """Replay a capture."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("capture", help="archive from the daily_fund.start_capture service")
+    parser.add_argument(
+        "--speed", type=float, default=0,
+        help="replay speed relative to the recording (0: as fast as possible)",
+    )
+    parser.add_argument(
+        "--gap", type=float, default=5,
+        help="seconds without responses that separate two refresh rounds",
+    )
+    parser.add_argument("--profile", action="store_true", help="profile the refreshes")
+    parser.add_argument("--sort", default="tottime", help="profile sort key")
+    parser.add_argument("--top", type=int, default=25, help="profile rows to print")
+    parser.add_argument("--verbose", action="store_true", help="show integration warnings")
+    args = parser.parse_args()
+
+    # 录制中的上游错误会在回放时产生同样的警告
+    logging.basicConfig(level=logging.WARNING if args.verbose else logging.CRITICAL)
+
+    archive = CaptureArchive.load(args.capture)
+    if not archive.records:
+        sys.exit(f"{args.capture} 中没有录制内容")
+    result = asyncio.run(async_replay(archive, args))
+    print(
+        f"{result['funds']} funds, {result['rounds']} rounds over "
+        f"{result['recorded_hours']:.1f}h replayed in {result['wall_s']:.2f}s\n"
+        f"refreshed {result['refreshed']}, failed {result['failed']}, "
+        f"missing responses {result['missing']}\n"
+        f"round p50 {result['round_p50_ms']:.0f}ms, p99 {result['round_p99_ms']:.0f}ms, "
+        f"loop blocked {result['loop_blocked_ms']:.1f}ms "
+        f"(worst {result['loop_worst_ms']:.1f}ms)"
+    )
+
+
+if __name__ == "__main__":
+    main()
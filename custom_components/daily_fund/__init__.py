@@ -4,28 +4,107 @@ from __future__ import annotations
 import logging
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE, Platform
+from homeassistant.core import CoreState, Event, HomeAssistant
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.typing import ConfigType
 
-from .const import DOMAIN
+from .const import (
+    DOMAIN,
+    DATA_ENGINE,
+    DATA_CLIENT,
+    DATA_CLOSE_UNSUB,
+    DATA_CALENDAR,
+    DATA_HISTORY,
+    DATA_IMPORTING,
+    CONF_FUND_CODE,
+    CONF_ENTRY_TYPE,
+    ENTRY_TYPE_PORTFOLIO,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS: list[Platform] = [Platform.SENSOR]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the Daily Fund component."""
+    from .services import async_register_services
+    from .websocket_api import async_register_websocket_commands
+    async_register_services(hass)
+    async_register_websocket_commands(hass)
+    return True
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Daily Fund from a config entry."""
     
     hass.data.setdefault(DOMAIN, {})
     
+    from .portfolio import async_get_portfolio
+    if entry.data.get(CONF_ENTRY_TYPE) == ENTRY_TYPE_PORTFOLIO:
+        # 投资组合汇总条目只提供汇总传感器，不请求网络
+        hass.data[DOMAIN][entry.entry_id] = async_get_portfolio(hass)
+        await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+        return True
+    
+    from .trading_calendar import async_get_trading_calendar
+    calendar = await async_get_trading_calendar(hass)
+    
+    # 所有基金共享一个HTTP连接池和批量行情引擎
+    from .client import FundHttpClient
+    from .engine import FundQuoteEngine
+    from .history import FundHistoryManager
+    if DATA_ENGINE not in hass.data[DOMAIN]:
+        client = FundHttpClient(hass)
+        engine = FundQuoteEngine(hass, client, calendar)
+        hass.data[DOMAIN][DATA_CLIENT] = client
+        hass.data[DOMAIN][DATA_ENGINE] = engine
+        hass.data[DOMAIN][DATA_HISTORY] = FundHistoryManager(hass, client, engine.health)
+
+        async def _async_close_client(event: Event) -> None:
+            await client.async_close()
+
+        # 最后一个基金卸载时连接池已关闭，需同时取消该监听
+        hass.data[DOMAIN][DATA_CLOSE_UNSUB] = hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_CLOSE, _async_close_client
+        )
+    engine = hass.data[DOMAIN][DATA_ENGINE]
+    history = hass.data[DOMAIN][DATA_HISTORY]
+    
+    from .store import async_get_snapshot_store
+    snapshots = await async_get_snapshot_store(hass)
+    
+    from .ledger import async_get_ledger
+    ledger = await async_get_ledger(hass)
+    
+    from .alerts import async_get_alerts
+    alerts = await async_get_alerts(hass)
+    
     # 导入并创建coordinator
     from .coordinator import DailyFundCoordinator
-    coordinator = DailyFundCoordinator(hass, entry)
+    coordinator = DailyFundCoordinator(
+        hass, entry, engine, snapshots, history, ledger, alerts
+    )
     
-    # 执行初始数据更新
-    await coordinator.async_config_entry_first_refresh()
+    # 先用本地快照展示，设置过程中不请求网络
+    coordinator.async_restore_snapshot()
+    if (
+        hass.state is CoreState.running
+        and coordinator.fund_code in hass.data[DOMAIN].get(DATA_IMPORTING, ())
+    ):
+        # 批量导入时由导入流程统一发起首次刷新，合并为一轮批量请求
+        engine.async_register(coordinator)
+        # 本地历史净值：首次完整回填，之后只增量同步
+        coordinator.async_schedule_history_sync()
+    else:
+        # 启动期间（含启动期间的批量导入）推迟到启动完成后按优先级分波刷新，
+        # 之后添加的基金直接在后台刷新
+        from .startup import async_get_startup
+        async_get_startup(hass).async_add(coordinator)
     
     hass.data[DOMAIN][entry.entry_id] = coordinator
+    async_get_portfolio(hass).async_add_fund(coordinator)
     
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     
@@ -34,5 +113,38 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
-    return unload_ok
\ No newline at end of file
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        if entry.data.get(CONF_ENTRY_TYPE) == ENTRY_TYPE_PORTFOLIO:
+            return unload_ok
+        from .portfolio import async_get_portfolio
+        async_get_portfolio(hass).async_remove_fund(coordinator)
+        from .startup import async_get_startup
+        async_get_startup(hass).async_remove(coordinator)
+        engine = hass.data[DOMAIN][DATA_ENGINE]
+        engine.async_unregister(coordinator)
+        hass.data[DOMAIN][DATA_HISTORY].async_unload(coordinator.fund_code)
+        if engine.is_empty:
+            # 最后一个基金卸载时关闭连接池
+            hass.data[DOMAIN].pop(DATA_ENGINE)
+            hass.data[DOMAIN].pop(DATA_CALENDAR, None)
+            hass.data[DOMAIN].pop(DATA_HISTORY, None)
+            if (unsub := hass.data[DOMAIN].pop(DATA_CLOSE_UNSUB, None)) is not None:
+                unsub()
+            await hass.data[DOMAIN].pop(DATA_CLIENT).async_close()
+    return unload_ok
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the snapshot, NAV history, ledger and alerts of a deleted fund."""
+    if entry.data.get(CONF_ENTRY_TYPE) == ENTRY_TYPE_PORTFOLIO:
+        return
+    from .store import async_get_snapshot_store
+    from .history import async_remove_history
+    from .ledger import async_get_ledger
+    from .alerts import async_get_alerts
+    snapshots = await async_get_snapshot_store(hass)
+    snapshots.async_remove(entry.data[CONF_FUND_CODE])
+    await async_remove_history(hass, entry.data[CONF_FUND_CODE])
+    ledger = await async_get_ledger(hass)
+    await ledger.async_remove_fund(entry.data[CONF_FUND_CODE])
+    alerts = await async_get_alerts(hass)
+    await alerts.async_remove_fund(entry.data[CONF_FUND_CODE])
\ No newline at end of file
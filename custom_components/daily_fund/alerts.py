@@ -0,0 +1,319 @@
+"""Threshold alerts for Daily Fund integration."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DOMAIN,
+    DATA_ALERTS,
+    ALERTS_STORAGE_KEY,
+    ALERTS_STORAGE_VERSION,
+    ALERT_METRIC_GROWTH,
+    ALERT_METRIC_PROFIT_RATE,
+    ALERT_METRIC_NAV_VS_AVG,
+    ALERT_FUND_METRICS,
+    ALERT_GROUP_METRICS,
+    ALERT_DEFAULT_HYSTERESIS,
+    ALERT_DEFAULT_DEBOUNCE,
+    EVENT_THRESHOLD_CROSSED,
+    EVENT_THRESHOLD_CLEARED,
+)
+
+if TYPE_CHECKING:
+    from .snapshot import FundSnapshot
+
+_LOGGER = logging.getLogger(__name__)
+
+KIND_FUND = "funds"
+KIND_GROUP = "groups"
+
+DIRECTION_ABOVE = "above"
+DIRECTION_BELOW = "below"
+
+
+def fund_metrics(data: FundSnapshot) -> dict[str, float | None]:
+    """Return the alert metrics of one fund."""
+    avg = data.avg_net_value
+    return {
+        ALERT_METRIC_GROWTH: data.estimated_growth_rate,
+        ALERT_METRIC_PROFIT_RATE: data.estimated_profit_rate,
+        ALERT_METRIC_NAV_VS_AVG: (
+            round((data.estimated_net_value / avg - 1) * 100, 2) if avg > 0 else None
+        ),
+    }
+
+
+def group_metrics(totals: dict[str, Any]) -> dict[str, float | None]:
+    """Return the alert metrics of the whole portfolio or a group."""
+    return {
+        ALERT_METRIC_GROWTH: totals["daily_return"],
+        ALERT_METRIC_PROFIT_RATE: totals["estimated_profit_rate"],
+    }
+
+
+class AlertState:
+    """Crossing state of one threshold.
+
+    A crossing fires once the value has stayed beyond the threshold for
+    ``debounce`` consecutive updates and clears only when it is back by
+    more than the hysteresis. A threshold already crossed at startup or
+    when the rule is set counts from the first value, so it fires as soon
+    as the debounce is satisfied.
+    """
+
+    __slots__ = ("active", "streak", "value")
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.active = False
+        self.streak = 0
+        self.value: float | None = None
+
+    def update(
+        self,
+        direction: str,
+        threshold: float,
+        value: float,
+        hysteresis: float,
+        debounce: int,
+    ) -> bool | None:
+        """Take a new value; return True when crossed, False when cleared."""
+        self.value = value
+        if direction == DIRECTION_ABOVE:
+            beyond = value >= threshold
+            back = value < threshold - hysteresis
+        else:
+            beyond = value <= threshold
+            back = value > threshold + hysteresis
+
+        if not self.active:
+            if not beyond:
+                self.streak = 0
+                return None
+            self.streak += 1
+            if self.streak < debounce:
+                return None
+            self.active = True
+            self.streak = 0
+            return True
+        if back:
+            self.active = False
+            return False
+        return None
+
+
+class FundAlerts:
+    """Persist threshold rules and turn crossings into bus events.
+
+    Rules of every fund and group share one file under ``.storage``;
+    their crossing state is kept in memory and starts over after a
+    restart. Funds and groups without rules cost one dict lookup.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize."""
+        self.hass = hass
+        self._store: Store[dict[str, Any]] = Store(
+            hass, ALERTS_STORAGE_VERSION, ALERTS_STORAGE_KEY
+        )
+        self._rules: dict[str, dict[str, dict[str, dict[str, Any]]]] = {
+            KIND_FUND: {},
+            KIND_GROUP: {},
+        }
+        self._states: dict[tuple[str, str, str, str], AlertState] = {}
+
+    async def async_load(self) -> None:
+        """Load the stored rules."""
+        if (data := await self._store.async_load()) is not None:
+            for kind in (KIND_FUND, KIND_GROUP):
+                self._rules[kind] = data.get(kind, {})
+        _LOGGER.debug(
+            "已加载 %s 只基金、%s 个分组的阈值提醒",
+            len(self._rules[KIND_FUND]),
+            len(self._rules[KIND_GROUP]),
+        )
+
+    @callback
+    def async_has_rules(self, fund_code: str, groups: Iterable[str] = ()) -> bool:
+        """Return True if a fund, or any of its groups, has a threshold."""
+        return fund_code in self._rules[KIND_FUND] or any(
+            group in self._rules[KIND_GROUP] for group in groups
+        )
+
+    @callback
+    def async_get_rules(self) -> dict[str, Any]:
+        """Return every rule with the current state of its thresholds."""
+        result: dict[str, Any] = {}
+        for kind, targets in self._rules.items():
+            result[kind] = {
+                target: {
+                    metric: {
+                        **rule,
+                        "state": {
+                            direction: self._state_as_dict(kind, target, metric, direction)
+                            for direction in (DIRECTION_ABOVE, DIRECTION_BELOW)
+                            if rule.get(direction) is not None
+                        },
+                    }
+                    for metric, rule in rules.items()
+                }
+                for target, rules in targets.items()
+            }
+        return result
+
+    async def async_set_rule(
+        self,
+        kind: str,
+        target: str,
+        metric: str,
+        above: float | None,
+        below: float | None,
+        hysteresis: float = ALERT_DEFAULT_HYSTERESIS,
+        debounce: int = ALERT_DEFAULT_DEBOUNCE,
+    ) -> None:
+        """Add or replace the thresholds of one metric of a fund or group."""
+        if metric not in (ALERT_FUND_METRICS if kind == KIND_FUND else ALERT_GROUP_METRICS):
+            raise HomeAssistantError(f"组合与分组不支持指标 {metric}")
+        if above is None and below is None:
+            raise HomeAssistantError("需要至少提供上限或下限之一")
+        if above is not None and below is not None and below >= above:
+            raise HomeAssistantError("下限必须小于上限")
+
+        self._rules[kind].setdefault(target, {})[metric] = {
+            DIRECTION_ABOVE: above,
+            DIRECTION_BELOW: below,
+            "hysteresis": hysteresis,
+            "debounce": debounce,
+        }
+        # 规则变化后重新开始判断
+        self._drop_states(kind, target, metric)
+        await self._store.async_save(self._data_to_save())
+
+    async def async_remove_rule(
+        self, kind: str, target: str, metric: str | None = None
+    ) -> None:
+        """Remove one metric's thresholds, or all of a fund's or group's."""
+        rules = self._rules[kind].get(target)
+        if rules is None or (metric is not None and metric not in rules):
+            raise HomeAssistantError(f"{target} 没有对应的阈值提醒")
+        if metric is None:
+            del self._rules[kind][target]
+        else:
+            del rules[metric]
+            if not rules:
+                del self._rules[kind][target]
+        self._drop_states(kind, target, metric)
+        await self._store.async_save(self._data_to_save())
+
+    async def async_remove_fund(self, fund_code: str) -> None:
+        """Forget a fund's thresholds."""
+        if self._rules[KIND_FUND].pop(fund_code, None) is not None:
+            self._drop_states(KIND_FUND, fund_code, None)
+            await self._store.async_save(self._data_to_save())
+
+    @callback
+    def async_evaluate_fund(self, data: FundSnapshot) -> None:
+        """Check a fund's freshly processed data against its thresholds."""
+        if (rules := self._rules[KIND_FUND].get(data.fund_code)) is None:
+            return
+        self._evaluate(
+            KIND_FUND,
+            data.fund_code,
+            rules,
+            fund_metrics(data),
+            {"fund_code": data.fund_code, "fund_name": data.fund_name},
+        )
+
+    @callback
+    def async_evaluate_group(self, group: str, totals: dict[str, Any]) -> None:
+        """Check the totals of the portfolio or a group against its thresholds."""
+        if (rules := self._rules[KIND_GROUP].get(group)) is None:
+            return
+        self._evaluate(KIND_GROUP, group, rules, group_metrics(totals), {"group": group})
+
+    def _evaluate(
+        self,
+        kind: str,
+        target: str,
+        rules: dict[str, dict[str, Any]],
+        values: dict[str, float | None],
+        event_data: dict[str, Any],
+    ) -> None:
+        """Update every threshold of a target and fire the changes."""
+        for metric, rule in rules.items():
+            if (value := values.get(metric)) is None:
+                continue
+            for direction in (DIRECTION_ABOVE, DIRECTION_BELOW):
+                if (threshold := rule.get(direction)) is None:
+                    continue
+                key = (kind, target, metric, direction)
+                if (state := self._states.get(key)) is None:
+                    state = self._states[key] = AlertState()
+                crossed = state.update(
+                    direction, threshold, value, rule["hysteresis"], rule["debounce"]
+                )
+                if crossed is None:
+                    continue
+                _LOGGER.debug(
+                    "%s 的 %s %s阈值 %s（当前 %s）",
+                    target,
+                    metric,
+                    "越过" if crossed else "解除",
+                    threshold,
+                    value,
+                )
+                self.hass.bus.async_fire(
+                    EVENT_THRESHOLD_CROSSED if crossed else EVENT_THRESHOLD_CLEARED,
+                    {
+                        **event_data,
+                        "metric": metric,
+                        "direction": direction,
+                        "threshold": threshold,
+                        "value": value,
+                    },
+                )
+
+    def _drop_states(self, kind: str, target: str, metric: str | None) -> None:
+        """Forget the crossing state of a target's thresholds."""
+        for key in [
+            key
+            for key in self._states
+            if key[0] == kind and key[1] == target and metric in (None, key[2])
+        ]:
+            del self._states[key]
+
+    def _state_as_dict(
+        self, kind: str, target: str, metric: str, direction: str
+    ) -> dict[str, Any]:
+        """Return one threshold's crossing state."""
+        state = self._states.get((kind, target, metric, direction))
+        if state is None:
+            return {"active": None, "streak": 0, "value": None}
+        return {"active": state.active, "streak": state.streak, "value": state.value}
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return data to store."""
+        return dict(self._rules)
+
+
+async def async_get_alerts(hass: HomeAssistant) -> FundAlerts:
+    """Return the shared alert rules, loading them on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_ALERTS in domain_data:
+        return domain_data[DATA_ALERTS]
+
+    lock: asyncio.Lock = domain_data.setdefault(f"{DATA_ALERTS}_lock", asyncio.Lock())
+    async with lock:
+        if DATA_ALERTS not in domain_data:
+            alerts = FundAlerts(hass)
+            await alerts.async_load()
+            domain_data[DATA_ALERTS] = alerts
+    return domain_data[DATA_ALERTS]
@@ -0,0 +1,149 @@
+"""Vectorized NAV history analytics for Daily Fund integration."""
+from __future__ import annotations
+
+import math
+from bisect import bisect_right
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from .const import (
+    ANALYTICS_RETURN_WINDOWS,
+    ANALYTICS_MA_WINDOWS,
+    ANALYTICS_VOLATILITY_WINDOW,
+    ANALYTICS_TRADING_DAYS,
+    ANALYTICS_REBUILD_THRESHOLD,
+)
+
+if TYPE_CHECKING:
+    from .history import FundHistory
+
+
+class FundAnalytics:
+    """Rolling statistics over one fund's stored NAV history.
+
+    ``rebuild`` computes the running peak, maximum drawdown, moving-average
+    sums and the sums of daily log returns with NumPy over zero-copy views
+    of the history arrays. ``update`` then folds each new row in with O(1)
+    scalar updates, so a daily NAV never triggers a full recomputation.
+    Returns and drawdown use the accumulated NAV, so dividends do not show
+    up as losses; moving averages use the unit NAV.
+    """
+
+    def __init__(self, history: FundHistory) -> None:
+        """Initialize."""
+        self.history = history
+        self._count = 0
+        self._peak = 0.0
+        self._max_drawdown = 0.0
+        self._ma_sums: dict[int, float] = {}
+        self._return_sum = 0.0
+        self._return_squares = 0.0
+        self._return_count = 0
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        """Recompute every running value from the full history."""
+        self._count = count = len(self.history)
+        self._ma_sums = dict.fromkeys(ANALYTICS_MA_WINDOWS, 0.0)
+        self._peak = self._max_drawdown = 0.0
+        self._return_sum = self._return_squares = 0.0
+        self._return_count = 0
+        if not count:
+            return
+
+        # 直接映射 array 的内存，不复制数据
+        acc_nav = np.frombuffer(self.history.acc_nav, dtype=np.float64)
+        nav = np.frombuffer(self.history.nav, dtype=np.float64)
+
+        peaks = np.maximum.accumulate(acc_nav)
+        self._peak = float(peaks[-1])
+        self._max_drawdown = float((acc_nav / peaks).min() - 1)
+
+        for window in ANALYTICS_MA_WINDOWS:
+            self._ma_sums[window] = float(nav[-window:].sum())
+
+        returns = np.diff(np.log(acc_nav[-(ANALYTICS_VOLATILITY_WINDOW + 1):]))
+        self._return_sum = float(returns.sum())
+        self._return_squares = float(np.dot(returns, returns))
+        self._return_count = len(returns)
+
+    def update(self) -> None:
+        """Fold rows appended to the history since the last call."""
+        count = len(self.history)
+        if count - self._count > ANALYTICS_REBUILD_THRESHOLD or not self._count:
+            # 回填等大批量新增时直接整体重算更快
+            self.rebuild()
+            return
+
+        nav = self.history.nav
+        acc_nav = self.history.acc_nav
+        for index in range(self._count, count):
+            value = acc_nav[index]
+            self._peak = max(self._peak, value)
+            self._max_drawdown = min(self._max_drawdown, value / self._peak - 1)
+
+            for window in ANALYTICS_MA_WINDOWS:
+                self._ma_sums[window] += nav[index]
+                if index >= window:
+                    self._ma_sums[window] -= nav[index - window]
+
+            change = math.log(value / acc_nav[index - 1])
+            self._return_sum += change
+            self._return_squares += change * change
+            if self._return_count < ANALYTICS_VOLATILITY_WINDOW:
+                self._return_count += 1
+            else:
+                old = index - ANALYTICS_VOLATILITY_WINDOW
+                dropped = math.log(acc_nav[old] / acc_nav[old - 1])
+                self._return_sum -= dropped
+                self._return_squares -= dropped * dropped
+        self._count = count
+
+    def period_return(self, days: int) -> float | None:
+        """Return the percentage change over the last number of calendar days."""
+        history = self.history
+        if not self._count:
+            return None
+        # 以窗口起点当天或之前最近的净值为基准
+        start = bisect_right(history.days, history.days[-1] - days) - 1
+        if start < 0:
+            return None
+        return (history.acc_nav[-1] / history.acc_nav[start] - 1) * 100
+
+    @property
+    def volatility(self) -> float | None:
+        """Return the annualized volatility of daily returns in percent."""
+        count = self._return_count
+        if count < 2:
+            return None
+        variance = (self._return_squares - self._return_sum**2 / count) / (count - 1)
+        return math.sqrt(max(variance, 0) * ANALYTICS_TRADING_DAYS) * 100
+
+    @property
+    def max_drawdown(self) -> float | None:
+        """Return the maximum drawdown over the whole history in percent."""
+        return self._max_drawdown * 100 if self._count else None
+
+    def moving_average(self, window: int) -> float | None:
+        """Return the moving average of the unit NAV over trading days."""
+        if self._count < window:
+            return None
+        return self._ma_sums[window] / window
+
+    def as_dict(self) -> dict[str, float | None]:
+        """Return every statistic keyed by name, rounded for display."""
+        metrics = {
+            f"return_{days}d": _round(self.period_return(days), 2)
+            for days in ANALYTICS_RETURN_WINDOWS
+        }
+        metrics["volatility"] = _round(self.volatility, 2)
+        metrics["max_drawdown"] = _round(self.max_drawdown, 2)
+        for window in ANALYTICS_MA_WINDOWS:
+            metrics[f"ma_{window}"] = _round(self.moving_average(window), 4)
+        return metrics
+
+
+def _round(value: float | None, decimals: int) -> float | None:
+    """Round a value that may be missing."""
+    return None if value is None else round(value, decimals)
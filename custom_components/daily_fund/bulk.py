@@ -0,0 +1,268 @@
+"""Bulk import and export of funds for Daily Fund integration."""
+from __future__ import annotations
+
+import asyncio
+import csv
+import io
+import logging
+import re
+from typing import Any
+
+import voluptuous as vol
+import yaml
+
+from homeassistant.config_entries import SOURCE_IMPORT
+from homeassistant.core import CoreState, HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import (
+    DOMAIN,
+    DATA_IMPORTING,
+    CONF_FUND_CODE,
+    CONF_FUND_NAME,
+    CONF_HOLD_SHARES,
+    CONF_INITIAL_COST,
+    CONF_AVG_NET_VALUE,
+    CONF_GROUP,
+    CONF_ENTRY_TYPE,
+    ENTRY_TYPE_PORTFOLIO,
+    FUND_LIST_CSV,
+    FUND_LIST_YAML,
+)
+from .coordinator import DailyFundCoordinator
+from .fund_directory import async_get_directory
+
+_LOGGER = logging.getLogger(__name__)
+
+# 导入导出的列，无表头的CSV按此顺序解析
+FUND_LIST_FIELDS = (
+    CONF_FUND_CODE,
+    CONF_FUND_NAME,
+    CONF_HOLD_SHARES,
+    CONF_INITIAL_COST,
+    CONF_AVG_NET_VALUE,
+    CONF_GROUP,
+)
+
+# 表头也可以使用中文列名
+COLUMN_ALIASES = {
+    "基金代码": CONF_FUND_CODE,
+    "代码": CONF_FUND_CODE,
+    "基金名称": CONF_FUND_NAME,
+    "名称": CONF_FUND_NAME,
+    "持仓份额": CONF_HOLD_SHARES,
+    "份额": CONF_HOLD_SHARES,
+    "初始成本": CONF_INITIAL_COST,
+    "成本": CONF_INITIAL_COST,
+    "平均净值": CONF_AVG_NET_VALUE,
+    "分组": CONF_GROUP,
+    "账户": CONF_GROUP,
+}
+
+_YAML_START_RE = re.compile(r"^\s*(-|[\w\"']+\s*:)")
+
+FUND_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_FUND_CODE): vol.All(
+            str, vol.Match(r"^\d{6}$", msg="基金代码必须是6位数字")
+        ),
+        vol.Optional(CONF_FUND_NAME): str,
+        vol.Optional(CONF_HOLD_SHARES, default=0): vol.All(
+            vol.Coerce(float), vol.Range(min=0)
+        ),
+        vol.Optional(CONF_INITIAL_COST, default=0): vol.All(
+            vol.Coerce(float), vol.Range(min=0)
+        ),
+        vol.Optional(CONF_AVG_NET_VALUE, default=0): vol.All(
+            vol.Coerce(float), vol.Range(min=0)
+        ),
+        vol.Optional(CONF_GROUP, default=""): str,
+    }
+)
+
+
+def detect_format(text: str) -> str:
+    """Guess whether a fund list is YAML or CSV."""
+    first = next((line for line in text.splitlines() if line.strip()), "")
+    return FUND_LIST_YAML if _YAML_START_RE.match(first) else FUND_LIST_CSV
+
+
+def parse_fund_list(text: str, fmt: str | None = None) -> list[dict[str, Any]]:
+    """Parse a CSV or YAML fund list into rows of raw string values."""
+    if (fmt or detect_format(text)) == FUND_LIST_YAML:
+        return _parse_yaml(text)
+    return _parse_csv(text)
+
+
+def _parse_csv(text: str) -> list[dict[str, Any]]:
+    """Parse CSV with a header row, or positional columns without one."""
+    lines = [row for row in csv.reader(io.StringIO(text.strip())) if any(row)]
+    if not lines:
+        return []
+    header = [cell.strip() for cell in lines[0]]
+    if header[0].isdigit():
+        columns = list(FUND_LIST_FIELDS)
+    else:
+        columns = [COLUMN_ALIASES.get(name, name) for name in header]
+        lines = lines[1:]
+    return [dict(zip(columns, (cell.strip() for cell in row))) for row in lines]
+
+
+def _parse_yaml(text: str) -> list[dict[str, Any]]:
+    """Parse a list of funds, or a mapping of fund code to fields."""
+    try:
+        # BaseLoader 把所有标量读为字符串，以0开头的基金代码不会被当成数字
+        data = yaml.load(text, Loader=yaml.BaseLoader)
+    except yaml.YAMLError as err:
+        raise HomeAssistantError(f"YAML格式错误: {err}") from err
+    if isinstance(data, dict):
+        data = [
+            {CONF_FUND_CODE: code, **(fields if isinstance(fields, dict) else {})}
+            for code, fields in data.items()
+        ]
+    if not isinstance(data, list):
+        raise HomeAssistantError("YAML内容应为基金列表")
+    return [
+        {COLUMN_ALIASES.get(key, key): value for key, value in row.items()}
+        if isinstance(row, dict)
+        else {CONF_FUND_CODE: row}
+        for row in data
+    ]
+
+
+async def async_validate_fund_list(
+    hass: HomeAssistant, text: str, fmt: str | None = None
+) -> tuple[list[dict[str, Any]], list[str]]:
+    """Validate a whole fund list at once.
+
+    Returns the funds to add and the codes skipped because they are
+    already configured. Every problem is collected and raised together,
+    so nothing is imported from a list with errors. Missing names come
+    from the fund directory, loaded once for the whole list.
+    """
+    rows = parse_fund_list(text, fmt)
+    if not rows:
+        raise HomeAssistantError("基金列表为空")
+
+    configured = {
+        entry.data.get(CONF_FUND_CODE) for entry in hass.config_entries.async_entries(DOMAIN)
+    }
+    errors: list[str] = []
+    funds: list[dict[str, Any]] = []
+    skipped: list[str] = []
+    seen: set[str] = set()
+    for number, row in enumerate(rows, 1):
+        # 空单元格视为未填写
+        row = {key: value for key, value in row.items() if value not in ("", None)}
+        try:
+            fund = FUND_SCHEMA(row)
+        except vol.Invalid as err:
+            errors.append(f"第{number}条: {err}")
+            continue
+        code = fund[CONF_FUND_CODE]
+        if code in seen:
+            errors.append(f"第{number}条: 基金 {code} 重复")
+        elif code in configured:
+            skipped.append(code)
+        else:
+            funds.append(fund)
+        seen.add(code)
+
+    if any(not fund.get(CONF_FUND_NAME) for fund in funds):
+        index = await async_get_directory(hass).async_get_index()
+        for fund in funds:
+            if fund.get(CONF_FUND_NAME):
+                continue
+            if index is not None and (info := index.get(fund[CONF_FUND_CODE])):
+                fund[CONF_FUND_NAME] = info.name
+            else:
+                errors.append(f"基金 {fund[CONF_FUND_CODE]}: 基金目录中没有该代码，请填写名称")
+
+    if errors:
+        raise HomeAssistantError("\n".join(errors))
+    return funds, skipped
+
+
+async def async_import_funds(
+    hass: HomeAssistant, funds: list[dict[str, Any]]
+) -> list[str]:
+    """Create an entry per fund and fetch them all in one engine round.
+
+    Entries are set up concurrently and skip their own first refresh;
+    their coordinators then refresh together, which the quote engine
+    coalesces into a single batched round instead of one per fund.
+    """
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    importing: set[str] = domain_data.setdefault(DATA_IMPORTING, set())
+    codes = {fund[CONF_FUND_CODE] for fund in funds}
+    importing.update(codes)
+    try:
+        results = await asyncio.gather(
+            *(
+                hass.config_entries.flow.async_init(
+                    DOMAIN, context={"source": SOURCE_IMPORT}, data=fund
+                )
+                for fund in funds
+            )
+        )
+    finally:
+        importing.difference_update(codes)
+
+    coordinators = [
+        coordinator
+        for coordinator in domain_data.values()
+        if isinstance(coordinator, DailyFundCoordinator)
+        and coordinator.fund_code in codes
+        and coordinator.data is None
+    ]
+    # 启动期间导入的基金由启动流程在启动完成后统一刷新
+    if coordinators and hass.state is CoreState.running:
+        hass.async_create_background_task(
+            _async_refresh_all(coordinators), f"{DOMAIN} bulk import refresh"
+        )
+
+    imported = [
+        result["result"].data[CONF_FUND_CODE]
+        for result in results
+        if result.get("result") is not None
+    ]
+    _LOGGER.info("批量导入 %s 只基金", len(imported))
+    return imported
+
+
+async def _async_refresh_all(coordinators: list[DailyFundCoordinator]) -> None:
+    """Refresh imported funds at once so that they share one engine round."""
+    await asyncio.gather(*(coordinator.async_refresh() for coordinator in coordinators))
+
+
+def export_fund_list(hass: HomeAssistant, fmt: str = FUND_LIST_CSV) -> str:
+    """Return every configured fund with its current holding as CSV or YAML.
+
+    Loaded funds export the holding in effect, including one built from
+    the transaction ledger, so the output imports back unchanged.
+    """
+    coordinators = {
+        coordinator.entry.entry_id: coordinator
+        for coordinator in hass.data.get(DOMAIN, {}).values()
+        if isinstance(coordinator, DailyFundCoordinator)
+    }
+    rows = []
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        if entry.data.get(CONF_ENTRY_TYPE) == ENTRY_TYPE_PORTFOLIO:
+            continue
+        row = {field: entry.data.get(field) for field in FUND_LIST_FIELDS}
+        if (coordinator := coordinators.get(entry.entry_id)) is not None:
+            row[CONF_HOLD_SHARES] = round(coordinator.hold_shares, 2)
+            row[CONF_INITIAL_COST] = round(coordinator.initial_cost, 2)
+            row[CONF_AVG_NET_VALUE] = round(coordinator.avg_net_value, 4)
+        row[CONF_GROUP] = row[CONF_GROUP] or ""
+        rows.append(row)
+    rows.sort(key=lambda row: row[CONF_FUND_CODE])
+
+    if fmt == FUND_LIST_YAML:
+        return yaml.safe_dump(rows, allow_unicode=True, sort_keys=False)
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=FUND_LIST_FIELDS, lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(rows)
+    return output.getvalue()
@@ -0,0 +1,287 @@
+"""Record and replay raw upstream responses for Daily Fund integration."""
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+import time
+from bisect import bisect_right
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+
+from .client import (
+    HTTP_NOT_MODIFIED,
+    THROTTLE_STATUS,
+    FundHttpClient,
+    ResponseValidator,
+    content_digest,
+)
+from .const import (
+    CAPTURE_DIR,
+    CAPTURE_FLUSH_INTERVAL,
+    CAPTURE_FLUSH_SIZE,
+    HTTP_STREAM_CHUNK_SIZE,
+    HTTP_TIMEOUT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def request_key(url: str, params: dict | None) -> str:
+    """Identify a request by its URL and query parameters."""
+    if not params:
+        return url
+    return url + "?" + "&".join(f"{key}={params[key]}" for key in sorted(params))
+
+
+class CaptureRecorder:
+    """Append every upstream response to a gzip-compressed JSON lines archive.
+
+    Each line holds the wall-clock time, URL, parameters and HTTP status of
+    one response. A body is only stored when it differs from the previous
+    response to the same request, so polling an unchanged fund costs a
+    few dozen bytes. Lines are buffered and appended from the executor as
+    separate gzip members, which ``gzip.open`` reads back as one stream.
+    Streamed responses store only the part that was read.
+    """
+
+    def __init__(self, hass: HomeAssistant, path: str) -> None:
+        """Initialize."""
+        self.hass = hass
+        self.path = path
+        self.records = 0
+        self._buffer: list[str] = []
+        self._buffered = 0
+        self._last_bodies: dict[str, bytes] = {}
+        self._unsub: Callable[[], None] | None = async_track_time_interval(
+            hass, self._async_flush_interval, timedelta(seconds=CAPTURE_FLUSH_INTERVAL)
+        )
+
+    @callback
+    def record(
+        self,
+        url: str,
+        params: dict | None,
+        status: int | None,
+        body: str | None = None,
+        error: Exception | None = None,
+    ) -> None:
+        """Buffer one response or transport error."""
+        entry: dict[str, Any] = {"t": round(time.time(), 3), "u": url}
+        if params:
+            entry["p"] = params
+        if status is not None:
+            entry["s"] = status
+        if error is not None:
+            entry["e"] = f"{type(error).__name__}: {error}"
+        if body is not None:
+            key = request_key(url, params)
+            digest = content_digest()
+            digest.update(body.encode())
+            if self._last_bodies.get(key) == digest.digest():
+                # 与上一次相同的内容只记录引用
+                entry["r"] = 1
+            else:
+                entry["b"] = body
+                self._last_bodies[key] = digest.digest()
+
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+        self._buffer.append(line)
+        self._buffered += len(line)
+        self.records += 1
+        if self._buffered >= CAPTURE_FLUSH_SIZE:
+            self.hass.async_create_background_task(
+                self.async_flush(), "daily_fund capture flush"
+            )
+
+    async def async_flush(self) -> None:
+        """Append the buffered lines to the archive."""
+        if not self._buffer:
+            return
+        lines, self._buffer, self._buffered = self._buffer, [], 0
+        await self.hass.async_add_executor_job(_append_lines, self.path, lines)
+
+    async def _async_flush_interval(self, _now: datetime) -> None:
+        """Flush periodically."""
+        await self.async_flush()
+
+    async def async_stop(self) -> None:
+        """Stop the flush timer and write what is left."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+        await self.async_flush()
+        _LOGGER.info("已停止录制上游响应，共 %s 条，保存在 %s", self.records, self.path)
+
+
+def _append_lines(path: str, lines: list[str]) -> None:
+    """Append lines as one gzip member (blocking)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with gzip.open(path, "at", encoding="utf-8") as file:
+        file.write("\n".join(lines) + "\n")
+
+
+def capture_path(hass: HomeAssistant) -> str:
+    """Return a new archive path under the configuration directory."""
+    name = datetime.now().strftime("%Y%m%d-%H%M%S") + ".jsonl.gz"
+    return hass.config.path(CAPTURE_DIR, name)
+
+
+class CaptureArchive:
+    """A recorded archive loaded into memory, ordered by time."""
+
+    def __init__(self, records: list[dict[str, Any]]) -> None:
+        """Initialize from records whose repeated bodies are resolved."""
+        self.records = records
+        self._responses: dict[str, list[dict[str, Any]]] = {}
+        for record in records:
+            self._responses.setdefault(
+                request_key(record["u"], record.get("p")), []
+            ).append(record)
+        self._times = {
+            key: [record["t"] for record in responses]
+            for key, responses in self._responses.items()
+        }
+
+    @classmethod
+    def load(cls, path: str) -> CaptureArchive:
+        """Read an archive and restore repeated bodies (blocking)."""
+        records = []
+        last_bodies: dict[str, str] = {}
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                key = request_key(record["u"], record.get("p"))
+                if "b" in record:
+                    last_bodies[key] = record["b"]
+                elif record.pop("r", None) or record.get("s") == HTTP_NOT_MODIFIED:
+                    # 304 同样对应上一次的内容，回放时可能需要完整响应
+                    record["b"] = last_bodies.get(key, "")
+                records.append(record)
+        records.sort(key=lambda record: record["t"])
+        return cls(records)
+
+    @property
+    def start(self) -> float:
+        """Return the time of the first response."""
+        return self.records[0]["t"] if self.records else 0.0
+
+    @property
+    def end(self) -> float:
+        """Return the time of the last response."""
+        return self.records[-1]["t"] if self.records else 0.0
+
+    def fund_codes(self) -> list[str]:
+        """Return every fund code requested in the archive."""
+        codes: dict[str, None] = {}
+        for record in self.records:
+            params = record.get("p") or {}
+            if code := params.get("fundCode"):
+                codes.setdefault(code)
+            elif fcodes := params.get("Fcodes"):
+                codes.update(dict.fromkeys(fcodes.split(",")))
+            else:
+                name = record["u"].rsplit("/", 1)[-1]
+                if name.endswith(".js") and name[:-3].isdigit():
+                    codes.setdefault(name[:-3])
+        return list(codes)
+
+    def rounds(self, gap: float) -> list[tuple[float, float]]:
+        """Group responses into refresh rounds separated by at least gap seconds."""
+        rounds: list[tuple[float, float]] = []
+        for record in self.records:
+            moment = record["t"]
+            if rounds and moment - rounds[-1][1] < gap:
+                rounds[-1] = (rounds[-1][0], moment)
+            else:
+                rounds.append((moment, moment))
+        return rounds
+
+    def response(self, url: str, params: dict | None, moment: float) -> dict[str, Any] | None:
+        """Return the last response to a request recorded at or before moment."""
+        key = request_key(url, params)
+        if (times := self._times.get(key)) is None:
+            return None
+        # 早于首次录制的请求使用最早的响应
+        index = max(bisect_right(times, moment) - 1, 0)
+        return self._responses[key][index]
+
+
+class ReplayHttpClient(FundHttpClient):
+    """Serve requests from a recorded archive instead of the network.
+
+    ``clock`` is the recorded moment being replayed; each request gets the
+    latest response to the same URL and parameters recorded up to then,
+    with the recorded status or transport error. A recorded 304 is only
+    replayed as such when the caller holds a parsed result; otherwise the
+    body it stood for is returned. The rate limiter is bypassed, so a
+    replay runs as fast as the code under test allows.
+    """
+
+    def __init__(self, hass: HomeAssistant, archive: CaptureArchive) -> None:
+        """Initialize."""
+        super().__init__(hass)
+        self.archive = archive
+        self.clock = archive.start
+        self.missing = 0
+
+    def _response(
+        self, url: str, params: dict | None, validator: ResponseValidator | None
+    ) -> str | None:
+        """Return the recorded body, None for not modified, or raise the failure."""
+        record = self.archive.response(url, params, self.clock)
+        if record is None:
+            self.missing += 1
+            raise Exception(f"回放存档中没有该请求: {request_key(url, params)}")
+        if error := record.get("e"):
+            raise Exception(error)
+        status = record.get("s", 200)
+        if status in THROTTLE_STATUS:
+            self.throttled()
+        if status == HTTP_NOT_MODIFIED and validator is not None:
+            if validator.result is not None:
+                validator.not_modified()
+                return None
+            status = 200
+        if status != 200:
+            raise Exception(f"HTTP {status}")
+        text = record.get("b", "")
+        if validator is not None:
+            digest = content_digest()
+            digest.update(text.encode())
+            validator.update(digest.digest())
+        return text
+
+    async def async_get_text(
+        self,
+        url: str,
+        params: dict | None = None,
+        timeout: float = HTTP_TIMEOUT,
+        validator: ResponseValidator | None = None,
+        background: bool = False,
+    ) -> str:
+        """Return the recorded body."""
+        return self._response(url, params, validator) or ""
+
+    async def async_stream_text(
+        self,
+        url: str,
+        feed: Callable[[str], bool],
+        params: dict | None = None,
+        timeout: float = HTTP_TIMEOUT,
+        validator: ResponseValidator | None = None,
+    ) -> None:
+        """Feed the recorded body in chunks until feed returns True."""
+        if (text := self._response(url, params, validator)) is None:
+            return
+        for offset in range(0, len(text), HTTP_STREAM_CHUNK_SIZE):
+            if feed(text[offset:offset + HTTP_STREAM_CHUNK_SIZE]):
+                return
+        feed("")
@@ -0,0 +1,264 @@
+"""Shared pooled HTTP client for Daily Fund integration."""
+from __future__ import annotations
+
+import asyncio
+import codecs
+import hashlib
+import logging
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any
+
+import aiohttp
+from aiohttp import hdrs
+
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    HTTP_TIMEOUT,
+    HTTP_LIMIT,
+    HTTP_LIMIT_PER_HOST,
+    HTTP_KEEPALIVE_TIMEOUT,
+    HTTP_DNS_CACHE_TTL,
+    HTTP_HEADERS,
+    HTTP_STREAM_CHUNK_SIZE,
+    RATE_LIMIT_RATE,
+    RATE_LIMIT_BURST,
+    RATE_LIMIT_BACKOFF,
+    RATE_LIMIT_RESERVE,
+)
+from .rate_limiter import TokenBucket
+
+if TYPE_CHECKING:
+    from .capture import CaptureRecorder
+
+_LOGGER = logging.getLogger(__name__)
+
+# 上游限流时返回的状态码
+THROTTLE_STATUS = {429, 503}
+HTTP_NOT_MODIFIED = 304
+
+
+def content_digest() -> Any:
+    """Return a new hash object for response bodies."""
+    return hashlib.blake2b(digest_size=16)
+
+
+class ResponseValidator:
+    """Validators and content hash of the last response to one request.
+
+    The caller keeps one per request and stores what it parsed from the
+    body in ``result``. Conditional headers are only sent while a result
+    is held, so a 304 always has something to fall back on. After each
+    request ``changed`` tells whether the body differs from the one the
+    result was parsed from; if not, parsing can be skipped.
+    """
+
+    __slots__ = ("etag", "last_modified", "digest", "changed", "result")
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.etag: str | None = None
+        self.last_modified: str | None = None
+        self.digest: bytes | None = None
+        self.changed = True
+        self.result: Any = None
+
+    def headers(self) -> dict[str, str] | None:
+        """Return the conditional request headers, if any."""
+        if self.result is None:
+            return None
+        headers = {}
+        if self.etag:
+            headers[hdrs.IF_NONE_MATCH] = self.etag
+        if self.last_modified:
+            headers[hdrs.IF_MODIFIED_SINCE] = self.last_modified
+        return headers or None
+
+    def not_modified(self) -> None:
+        """Record a 304 response."""
+        self.changed = False
+
+    def update(
+        self, digest: bytes, etag: str | None = None, last_modified: str | None = None
+    ) -> None:
+        """Record a full response."""
+        self.changed = self.result is None or digest != self.digest
+        self.digest = digest
+        self.etag = etag
+        self.last_modified = last_modified
+
+
+class FundHttpClient:
+    """Own a single keep-alive connection pool shared by every fund.
+
+    The connector keeps connections to the eastmoney hosts open between
+    polls, caches DNS lookups and caps connections per host, so a refresh
+    round reuses sockets instead of opening one per request. Every request
+    first takes a token from the domain-wide rate limiter.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize."""
+        self.hass = hass
+        self._session: aiohttp.ClientSession | None = None
+        self.limiter = TokenBucket(RATE_LIMIT_RATE, RATE_LIMIT_BURST, RATE_LIMIT_RESERVE)
+        # 录制模式下保存每个原始响应，平时为 None
+        self.recorder: CaptureRecorder | None = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Return the pooled session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=HTTP_LIMIT,
+                limit_per_host=HTTP_LIMIT_PER_HOST,
+                keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+                use_dns_cache=True,
+                ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=HTTP_HEADERS,
+                timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT),
+            )
+        return self._session
+
+    async def async_get_text(
+        self,
+        url: str,
+        params: dict | None = None,
+        timeout: float = HTTP_TIMEOUT,
+        validator: ResponseValidator | None = None,
+        background: bool = False,
+    ) -> str:
+        """GET a URL through the pool and return the body as text.
+
+        With a validator the request is conditional; a 304 returns an
+        empty string and, like an identical body, clears ``changed``.
+        Background requests only use capacity that live polls leave spare.
+        """
+        if background:
+            await self.limiter.async_acquire_background()
+        else:
+            await self.limiter.async_acquire()
+        try:
+            async with self.session.get(
+                url,
+                params=params,
+                headers=validator.headers() if validator is not None else None,
+                timeout=aiohttp.ClientTimeout(total=timeout),
+            ) as response:
+                if validator is not None and response.status == HTTP_NOT_MODIFIED:
+                    validator.not_modified()
+                    if self.recorder is not None:
+                        self.recorder.record(url, params, response.status)
+                    return ""
+                if response.status in THROTTLE_STATUS:
+                    self.throttled()
+                if response.status != 200:
+                    if self.recorder is not None:
+                        self.recorder.record(url, params, response.status)
+                    raise Exception(f"HTTP {response.status}")
+                body = await response.read()
+                text = await response.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            if self.recorder is not None:
+                self.recorder.record(url, params, None, error=err)
+            raise
+        if validator is not None:
+            digest = content_digest()
+            digest.update(body)
+            validator.update(
+                digest.digest(),
+                response.headers.get(hdrs.ETAG),
+                response.headers.get(hdrs.LAST_MODIFIED),
+            )
+        if self.recorder is not None:
+            self.recorder.record(url, params, 200, text)
+        return text
+
+    async def async_stream_text(
+        self,
+        url: str,
+        feed: Callable[[str], bool],
+        params: dict | None = None,
+        timeout: float = HTTP_TIMEOUT,
+        validator: ResponseValidator | None = None,
+    ) -> None:
+        """GET a URL and pass decoded chunks to feed until it returns True.
+
+        Stopping early skips the rest of the body; the connection is then
+        dropped instead of being returned to the pool. With a validator
+        the request is conditional, a 304 feeds nothing, and the hash
+        covers the part of the body that was read.
+        """
+        recorder = self.recorder
+
+        await self.limiter.async_acquire()
+        try:
+            async with self.session.get(
+                url,
+                params=params,
+                headers=validator.headers() if validator is not None else None,
+                timeout=aiohttp.ClientTimeout(total=timeout),
+            ) as response:
+                if validator is not None and response.status == HTTP_NOT_MODIFIED:
+                    validator.not_modified()
+                    if recorder is not None:
+                        recorder.record(url, params, response.status)
+                    return
+                if response.status in THROTTLE_STATUS:
+                    self.throttled()
+                if response.status != 200:
+                    if recorder is not None:
+                        recorder.record(url, params, response.status)
+                    raise Exception(f"HTTP {response.status}")
+
+                decoder = codecs.getincrementaldecoder(response.charset or "utf-8")(
+                    errors="replace"
+                )
+                digest = content_digest() if validator is not None else None
+                # 录制时保存已读取的部分，读完（或提前停止）后只写一条记录
+                read: list[str] | None = [] if recorder is not None else None
+                chunks = response.content.iter_chunked(HTTP_STREAM_CHUNK_SIZE)
+                async for chunk in chunks:
+                    if digest is not None:
+                        digest.update(chunk)
+                    text = decoder.decode(chunk)
+                    if read is not None:
+                        read.append(text)
+                    if feed(text):
+                        break
+                else:
+                    text = decoder.decode(b"", final=True)
+                    if read is not None:
+                        read.append(text)
+                    feed(text)
+
+                if recorder is not None:
+                    recorder.record(url, params, 200, "".join(read))
+
+                if validator is not None:
+                    validator.update(
+                        digest.digest(),
+                        response.headers.get(hdrs.ETAG),
+                        response.headers.get(hdrs.LAST_MODIFIED),
+                    )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            if recorder is not None:
+                recorder.record(url, params, None, error=err)
+            raise
+
+    def throttled(self) -> None:
+        """Back off after the upstream signalled throttling."""
+        self.limiter.throttled(RATE_LIMIT_BACKOFF)
+
+    async def async_close(self) -> None:
+        """Close the pooled session and its connections."""
+        if self.recorder is not None:
+            await self.recorder.async_stop()
+            self.recorder = None
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            _LOGGER.debug("已关闭共享HTTP连接池")
+        self._session = None
@@ -5,6 +5,14 @@ import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.core import HomeAssistant
 from homeassistant.data_entry_flow import FlowResult
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.selector import (
+    SelectOptionDict,
+    SelectSelector,
+    SelectSelectorConfig,
+    TextSelector,
+    TextSelectorConfig,
+)
 
 from .const import (
     DOMAIN,
@@ -16,11 +24,20 @@ from .const import (
     CONF_UPDATE_INTERVAL,
     CONF_TRADING_INTERVAL,
     CONF_NET_VALUE_INTERVAL,
+    CONF_HEDGE_DELAY,
+    CONF_REFRESH_DEADLINE,
+    CONF_GROUP,
+    CONF_ENTRY_TYPE,
+    CONF_FUNDS,
+    ENTRY_TYPE_PORTFOLIO,
     DEFAULT_SCAN_INTERVAL,
     DEFAULT_TRADING_INTERVAL,
     DEFAULT_NET_VALUE_INTERVAL,
     DEFAULT_NON_TRADING_INTERVAL,
+    DEFAULT_HEDGE_DELAY,
+    DEFAULT_REFRESH_DEADLINE,
 )
+from .fund_directory import FundInfo, async_get_directory
 
 
 class DailyFundConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -28,32 +45,118 @@ class DailyFundConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    def __init__(self) -> None:
+        """Initialize."""
+        self._fund_input: dict = {}
+        self._matches: list[FundInfo] = []
+
     async def async_step_user(self, user_input=None) -> FlowResult:
         """Handle the initial step."""
+        return self.async_show_menu(step_id="user", menu_options=["fund", "bulk", "portfolio"])
+
+    async def async_step_portfolio(self, user_input=None) -> FlowResult:
+        """Add the portfolio summary entry."""
+        await self.async_set_unique_id(ENTRY_TYPE_PORTFOLIO)
+        self._abort_if_unique_id_configured(error="single_instance_allowed")
+
+        if user_input is not None:
+            return self.async_create_entry(
+                title="投资组合",
+                data={CONF_ENTRY_TYPE: ENTRY_TYPE_PORTFOLIO},
+            )
+        return self.async_show_form(step_id="portfolio")
+
+    async def async_step_bulk(self, user_input=None) -> FlowResult:
+        """Add many funds at once from a CSV or YAML list."""
+        from .bulk import async_import_funds, async_validate_fund_list
+
         errors = {}
+        details = ""
 
         if user_input is not None:
-            # Validate fund code (6 digits)
-            fund_code = user_input[CONF_FUND_CODE]
-            if len(fund_code) != 6 or not fund_code.isdigit():
-                errors[CONF_FUND_CODE] = "invalid_fund_code"
+            try:
+                funds, skipped = await async_validate_fund_list(
+                    self.hass, user_input[CONF_FUNDS]
+                )
+            except HomeAssistantError as err:
+                errors["base"] = "invalid_fund_list"
+                details = str(err)
             else:
-                # Check if already configured
-                await self.async_set_unique_id(fund_code)
-                self._abort_if_unique_id_configured()
-
-                return self.async_create_entry(
-                    title=user_input[CONF_FUND_NAME],
-                    data=user_input,
+                if not funds:
+                    return self.async_abort(reason="already_configured")
+                imported = await async_import_funds(self.hass, funds)
+                return self.async_abort(
+                    reason="bulk_imported",
+                    description_placeholders={
+                        "imported": str(len(imported)),
+                        "skipped": str(len(skipped)),
+                    },
                 )
 
+        return self.async_show_form(
+            step_id="bulk",
+            data_schema=vol.Schema({
+                vol.Required(CONF_FUNDS): TextSelector(TextSelectorConfig(multiline=True)),
+            }),
+            errors=errors,
+            description_placeholders={"details": details},
+        )
+
+    async def async_step_import(self, import_data: dict) -> FlowResult:
+        """Create a fund entry validated by the bulk import."""
+        await self.async_set_unique_id(import_data[CONF_FUND_CODE])
+        self._abort_if_unique_id_configured()
+        return self.async_create_entry(
+            title=import_data[CONF_FUND_NAME],
+            data=import_data,
+        )
+
+    async def async_step_fund(self, user_input=None) -> FlowResult:
+        """Add a fund."""
+        errors = {}
+
+        directory = async_get_directory(self.hass)
+
+        if user_input is not None:
+            # 输入可以是基金代码、名称或拼音缩写
+            query = user_input[CONF_FUND_CODE].strip()
+            if len(query) == 6 and query.isdigit():
+                fund = await directory.async_lookup(query)
+                if fund is None and directory.loaded and not user_input.get(CONF_FUND_NAME):
+                    # 填写了名称时仍允许添加目录中尚未收录的新基金
+                    errors[CONF_FUND_CODE] = "unknown_fund_code"
+                elif not (user_input.get(CONF_FUND_NAME) or fund):
+                    errors[CONF_FUND_NAME] = "fund_name_required"
+                else:
+                    return await self._async_create_fund(user_input, query, fund)
+            else:
+                matches = await directory.async_search(query)
+                if not matches:
+                    errors[CONF_FUND_CODE] = (
+                        "fund_not_found" if directory.loaded else "invalid_fund_code"
+                    )
+                elif len(matches) == 1:
+                    return await self._async_create_fund(
+                        user_input, matches[0].code, matches[0]
+                    )
+                else:
+                    self._fund_input = user_input
+                    self._matches = matches
+                    return await self.async_step_fund_select()
+        else:
+            # 用户填写表单期间在后台加载基金目录
+            self.hass.async_create_background_task(
+                directory.async_get_index(), f"{DOMAIN} directory load"
+            )
+
         # 使用中文标签
         data_schema = vol.Schema({
             vol.Required(CONF_FUND_CODE): str,
-            vol.Required(CONF_FUND_NAME): str,
+            vol.Optional(CONF_FUND_NAME, default=""): str,
             vol.Optional(CONF_AVG_NET_VALUE, default=0): vol.Coerce(float),
             vol.Optional(CONF_HOLD_SHARES, default=0): vol.Coerce(float),
             vol.Optional(CONF_INITIAL_COST, default=0): vol.Coerce(float),
+            vol.Optional(CONF_GROUP, default=""): str,
             vol.Optional(
                 CONF_TRADING_INTERVAL, 
                 default=DEFAULT_TRADING_INTERVAL
@@ -62,19 +165,64 @@ class DailyFundConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 CONF_NET_VALUE_INTERVAL, 
                 default=DEFAULT_NET_VALUE_INTERVAL
             ): vol.All(vol.Coerce(int), vol.Range(min=300, max=3600)),
+            vol.Optional(
+                CONF_HEDGE_DELAY,
+                default=DEFAULT_HEDGE_DELAY
+            ): vol.All(vol.Coerce(float), vol.Range(min=0.5, max=10)),
+            vol.Optional(
+                CONF_REFRESH_DEADLINE,
+                default=DEFAULT_REFRESH_DEADLINE
+            ): vol.All(vol.Coerce(float), vol.Range(min=5, max=60)),
         })
 
         return self.async_show_form(
-            step_id="user",
+            step_id="fund",
             data_schema=data_schema,
             errors=errors,
             description_placeholders={
-                "fund_code": "基金代码 (6位数字)",
-                "fund_name": "基金名称",
+                "fund_code": "基金代码、名称或拼音缩写",
+                "fund_name": "基金名称(留空则使用基金全称)",
                 "avg_net_value": "平均净值",
                 "hold_shares": "持仓份额",
                 "initial_cost": "初始成本",
+                "group": "分组/账户，多个用逗号分隔(可选)",
                 "trading_interval": "交易时段更新间隔(秒, 1-60分钟)",
-                "net_value_interval": "净值公布时段更新间隔(秒)"
+                "net_value_interval": "净值公布时段更新间隔(秒)",
+                "hedge_delay": "估算延迟预算(秒)，超出后启用备用数据源",
+                "refresh_deadline": "单次刷新时限(秒)"
             }
-        )
\ No newline at end of file
+        )
+
+    async def async_step_fund_select(self, user_input=None) -> FlowResult:
+        """Pick one of several funds matching the search."""
+        if user_input is not None:
+            fund_code = user_input[CONF_FUND_CODE]
+            fund = next(fund for fund in self._matches if fund.code == fund_code)
+            return await self._async_create_fund(self._fund_input, fund_code, fund)
+
+        options = [
+            SelectOptionDict(value=fund.code, label=f"{fund.code} {fund.name}（{fund.type}）")
+            for fund in self._matches
+        ]
+        return self.async_show_form(
+            step_id="fund_select",
+            data_schema=vol.Schema({
+                vol.Required(CONF_FUND_CODE): SelectSelector(
+                    SelectSelectorConfig(options=options)
+                ),
+            }),
+            description_placeholders={"query": self._fund_input[CONF_FUND_CODE]},
+        )
+
+    async def _async_create_fund(
+        self, user_input: dict, fund_code: str, fund: FundInfo | None
+    ) -> FlowResult:
+        """Create the entry of a fund chosen by code."""
+        await self.async_set_unique_id(fund_code)
+        self._abort_if_unique_id_configured()
+
+        fund_name = user_input.get(CONF_FUND_NAME) or fund.name
+        return self.async_create_entry(
+            title=fund_name,
+            data={**user_input, CONF_FUND_CODE: fund_code, CONF_FUND_NAME: fund_name},
+        )
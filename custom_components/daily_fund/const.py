@@ -10,6 +10,9 @@ CONF_AVG_NET_VALUE = "avg_net_value"
 CONF_HOLD_SHARES = "hold_shares"
 CONF_INITIAL_COST = "initial_cost"
 CONF_UPDATE_INTERVAL = "update_interval"
+CONF_GROUP = "group"  # 分组标签/账户，多个用逗号分隔
+CONF_ENTRY_TYPE = "entry_type"
+ENTRY_TYPE_PORTFOLIO = "portfolio"  # 投资组合汇总条目
 
 # 智能更新策略常量
 CONF_TRADING_INTERVAL = "trading_interval"  # 交易时段更新间隔
@@ -18,6 +21,12 @@ DEFAULT_TRADING_INTERVAL = 300  # 交易时段默认5分钟
 DEFAULT_NET_VALUE_INTERVAL = 900  # 净值公布时段默认15分钟
 DEFAULT_NON_TRADING_INTERVAL = 3600  # 非交易时段默认1小时
 
+# 数据源对冲策略
+CONF_HEDGE_DELAY = "hedge_delay"  # 估算延迟预算，超出后对冲请求备用源
+CONF_REFRESH_DEADLINE = "refresh_deadline"  # 单次刷新总时限
+DEFAULT_HEDGE_DELAY = 3.0  # 默认3秒
+DEFAULT_REFRESH_DEADLINE = 15.0  # 默认15秒
+
 # 交易时间设置
 TRADING_HOURS_AM_START = 9
 TRADING_HOURS_AM_START_MINUTE = 30
@@ -29,3 +38,155 @@ TRADING_HOURS_PM_END = 15
 # 净值公布时段
 NET_VALUE_PUBLISH_START = 18  # 18:00开始
 NET_VALUE_PUBLISH_END = 22    # 22:00结束
+
+# 批量行情引擎
+DATA_ENGINE = "engine"
+ENGINE_BATCH_WINDOW = 1.0  # 收集同一轮请求的窗口(秒)
+ENGINE_BATCH_SIZE = 50  # 多代码接口每批基金数量
+ENGINE_MAX_CONCURRENCY = 8  # 无批量接口时的并发上限
+ENGINE_RESULT_MAX_AGE = 30  # 一轮结果可复用的时长(秒)
+REFRESH_COOLDOWN = 30  # 手动刷新请求的合并冷却时间(秒)
+
+# 批量估算接口：天天基金 App 使用的多代码行情接口，没有公开文档，
+# 地址与参数取自 App 的请求，设备ID 只需非空。上游随时可能改动或下线该接口，
+# 失败时熔断器会跳过它，各基金回退到 fundgz 单只估算（受 ENGINE_MAX_CONCURRENCY 限制）
+BATCH_ESTIMATE_URL = "https://fundmobapi.eastmoney.com/FundMNewApi/FundMNFInfo"
+BATCH_ESTIMATE_DEVICE_ID = "hass_daily_fund"
+BATCH_ESTIMATE_PARAMS = {
+    "pageIndex": 1,
+    "plat": "Android",
+    "appType": "ttjj",
+    "product": "EFund",
+    "Version": 1,
+    "deviceid": BATCH_ESTIMATE_DEVICE_ID,
+}
+
+# 共享HTTP连接池
+DATA_CLIENT = "client"
+DATA_CLOSE_UNSUB = "close_unsub"  # 关闭时释放连接池的监听，最后一个基金卸载时取消
+HTTP_TIMEOUT = 10  # 单次请求超时(秒)
+HTTP_LIMIT = 20  # 连接池总连接数上限
+HTTP_LIMIT_PER_HOST = 6  # 每个上游主机的连接数上限
+HTTP_KEEPALIVE_TIMEOUT = 60  # 空闲连接保持时间(秒)
+HTTP_DNS_CACHE_TTL = 600  # DNS缓存时间(秒)
+HTTP_STREAM_CHUNK_SIZE = 65536  # 流式读取的块大小(字节)
+PINGZHONG_EXECUTOR_THRESHOLD = 262144  # 超过该长度的平中数据在线程池中解析(字符)
+HTTP_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    "Referer": "https://fund.eastmoney.com/",
+}
+
+# 本地快照缓存
+DATA_SNAPSHOTS = "snapshots"
+SNAPSHOT_STORAGE_KEY = f"{DOMAIN}.snapshots"
+SNAPSHOT_STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 30  # 合并写入的延迟(秒)
+
+# 交易日历
+DATA_CALENDAR = "calendar"
+MARKET_TIME_ZONE = "Asia/Shanghai"
+HOLIDAYS_FILE = "holidays.json"  # 随集成发布的沪深交易所休市表
+LOCAL_HOLIDAYS_FILE = "daily_fund_holidays.json"  # 配置目录下的本地补充休市表
+
+# 全局请求限速（令牌桶）
+RATE_LIMIT_RATE = 5.0  # 每秒补充的请求数
+RATE_LIMIT_BURST = 10  # 允许的突发请求数
+RATE_LIMIT_BACKOFF = 30  # 上游限流后暂停请求的时间(秒)
+RATE_LIMIT_RESERVE = 5  # 后台请求（历史净值同步）不动用的令牌数，留给实时轮询
+
+# 数据源熔断
+SOURCE_BATCH = "batch"  # 多代码批量估算
+SOURCE_HISTORY = "history"  # f10/lsjz 历史净值
+SOURCE_FUNDGZ = "fundgz"  # fundgz 实时估算
+SOURCE_PINGZHONG = "pingzhong"  # pingzhongdata 备用数据
+CIRCUIT_FAILURE_THRESHOLD = 3  # 连续失败多少次后熔断
+CIRCUIT_OPEN_SECONDS = 60  # 首次熔断时长(秒)，之后逐次翻倍
+CIRCUIT_MAX_OPEN_SECONDS = 1800  # 熔断时长上限(秒)
+SOURCE_PRIOR_LATENCY = 1.0  # 尚无样本时假定的延迟(秒)
+SOURCE_STATS_TTL = 900  # 超过该时间未使用的源按先验值重新排序(秒)
+
+# 本地历史净值
+DATA_HISTORY = "history"
+HISTORY_STORAGE_KEY = f"{DOMAIN}.history"  # 每只基金一个文件: daily_fund.history.<代码>
+HISTORY_STORAGE_VERSION = 1
+HISTORY_PAGE_SIZE = 20  # f10/lsjz 每页条数
+HISTORY_MAX_CONCURRENCY = 4  # 回填时所有基金共享的并发页请求数
+HISTORY_NAV_SCALE = 10000  # 净值按万分之一取整后差分存储
+
+# 历史指标
+ANALYTICS_RETURN_WINDOWS = (7, 30, 90, 365)  # 区间收益率的自然日窗口
+ANALYTICS_MA_WINDOWS = (5, 20, 60, 250)  # 均线的交易日窗口
+ANALYTICS_VOLATILITY_WINDOW = 250  # 计算波动率的日收益个数
+ANALYTICS_TRADING_DAYS = 250  # 年化使用的每年交易日数
+ANALYTICS_REBUILD_THRESHOLD = 64  # 一次新增超过该行数时整体重算
+
+# 投资组合汇总
+DATA_PORTFOLIO = "portfolio"
+PORTFOLIO_ALL = "全部"  # 整个组合的分组名
+
+# 盘中估算走势
+INTRADAY_CAPACITY = 256  # 每只基金保留的估算点数（覆盖1分钟间隔的整个交易日）
+INTRADAY_MAX_GAP = 900  # 时间加权均值中单个间隔的上限(秒)
+
+# 交易记录
+DATA_LEDGER = "ledger"
+LEDGER_STORAGE_KEY = f"{DOMAIN}.ledger"
+LEDGER_STORAGE_VERSION = 1
+COST_METHOD_FIFO = "fifo"  # 先进先出
+COST_METHOD_AVERAGE = "average"  # 移动加权平均
+TRANSACTION_BUY = "buy"
+TRANSACTION_SELL = "sell"
+TRANSACTION_DIVIDEND = "dividend"
+
+# 基金目录
+DATA_DIRECTORY = "directory"
+DIRECTORY_STORAGE_KEY = f"{DOMAIN}.directory"
+DIRECTORY_STORAGE_VERSION = 1
+DIRECTORY_TTL = 7 * 24 * 3600  # 本地缓存有效期(秒)
+DIRECTORY_TIMEOUT = 30  # 下载目录的超时(秒)
+DIRECTORY_RETRY = 600  # 下载失败后的重试间隔(秒)
+DIRECTORY_IDLE = 900  # 闲置多久后释放内存中的索引(秒)
+DIRECTORY_SEARCH_LIMIT = 20  # 搜索结果最多条数
+
+# 批量导入导出
+CONF_FUNDS = "funds"  # 批量导入的基金列表文本
+DATA_IMPORTING = "importing"  # 正在批量导入、由导入流程统一首次刷新的基金代码
+FUND_LIST_CSV = "csv"
+FUND_LIST_YAML = "yaml"
+
+# 上游响应录制与回放
+CAPTURE_DIR = "daily_fund_captures"  # 配置目录下保存录制存档的目录
+CAPTURE_FLUSH_INTERVAL = 60  # 录制缓冲写入磁盘的间隔(秒)
+CAPTURE_FLUSH_SIZE = 1048576  # 缓冲超过该大小时立即写入(字节)
+
+# 刷新性能统计
+DATA_METRICS = "metrics"
+METRICS_BUCKETS = (  # 耗时直方图各桶的上界(秒)
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+METRICS_LOOP_PROBE_INTERVAL = 0.5  # 事件循环延迟探测间隔(秒)
+METRICS_LOOP_BLOCK_THRESHOLD = 0.01  # 探测延迟超过该值计为阻塞(秒)
+METRICS_SCAN_INTERVAL = 60  # 性能统计传感器的更新间隔(秒)
+
+# 阈值提醒
+DATA_ALERTS = "alerts"
+ALERTS_STORAGE_KEY = f"{DOMAIN}.alerts"
+ALERTS_STORAGE_VERSION = 1
+ALERT_METRIC_GROWTH = "estimated_growth_rate"  # 估算涨幅(%)，组合为当日估算涨幅
+ALERT_METRIC_PROFIT_RATE = "profit_rate"  # 估算收益率(%)
+ALERT_METRIC_NAV_VS_AVG = "nav_vs_avg"  # 估算净值相对平均净值的偏离(%)，仅限单只基金
+ALERT_FUND_METRICS = (ALERT_METRIC_GROWTH, ALERT_METRIC_PROFIT_RATE, ALERT_METRIC_NAV_VS_AVG)
+ALERT_GROUP_METRICS = (ALERT_METRIC_GROWTH, ALERT_METRIC_PROFIT_RATE)  # 组合没有平均净值
+ALERT_DEFAULT_HYSTERESIS = 0.2  # 回到阈值另一侧超过该幅度(百分点)才算解除
+ALERT_DEFAULT_DEBOUNCE = 1  # 连续多少次数据更新越过阈值才触发
+EVENT_THRESHOLD_CROSSED = f"{DOMAIN}_threshold_crossed"
+EVENT_THRESHOLD_CLEARED = f"{DOMAIN}_threshold_cleared"
+
+# 启动
+DATA_STARTUP = "startup"
+STARTUP_WAVE_SIZE = 50  # 启动后每一波首次刷新的基金数量，与批量接口每批数量一致
+STARTUP_STAGGER = 5  # 启动后相邻两波首次刷新的间隔(秒)
+
+# 传感器
+CURRENCY_CNY = "CNY"
@@ -1,17 +1,22 @@
 """Coordinator for Daily Fund integration."""
 from __future__ import annotations
 
+import asyncio
 import logging
-from datetime import timedelta, datetime, time
+from datetime import timedelta, datetime
 import aiohttp
 import json
-import re
+import zlib
+from time import monotonic, perf_counter
+from typing import TYPE_CHECKING
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.debounce import Debouncer
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
 from .const import (
+    DOMAIN,
     CONF_FUND_CODE,
     CONF_FUND_NAME,
     CONF_AVG_NET_VALUE,
@@ -19,133 +24,312 @@ from .const import (
     CONF_INITIAL_COST,
     CONF_TRADING_INTERVAL,
     CONF_NET_VALUE_INTERVAL,
+    CONF_HEDGE_DELAY,
+    CONF_REFRESH_DEADLINE,
     DEFAULT_TRADING_INTERVAL,
     DEFAULT_NET_VALUE_INTERVAL,
-    DEFAULT_NON_TRADING_INTERVAL,
-    TRADING_HOURS_AM_START,
-    TRADING_HOURS_AM_START_MINUTE,
-    TRADING_HOURS_AM_END,
-    TRADING_HOURS_AM_END_MINUTE,
-    TRADING_HOURS_PM_START,
-    TRADING_HOURS_PM_END,
-    NET_VALUE_PUBLISH_START,
-    NET_VALUE_PUBLISH_END,
+    DEFAULT_HEDGE_DELAY,
+    DEFAULT_REFRESH_DEADLINE,
+    INTRADAY_CAPACITY,
+    PINGZHONG_EXECUTOR_THRESHOLD,
+    REFRESH_COOLDOWN,
+    SOURCE_BATCH,
+    SOURCE_HISTORY,
+    SOURCE_FUNDGZ,
+    SOURCE_PINGZHONG,
 )
+from .client import ResponseValidator
+from .health import SourceUnavailable
+from .intraday import IntradaySeries
+from .metrics import (
+    TIMING_REFRESH,
+    TIMING_PROCESS,
+    TIMING_STATE_WRITE,
+    COUNT_BATCH_HIT,
+    COUNT_HEDGE,
+    COUNT_NAV_CACHE_HIT,
+    COUNT_NAV_CACHE_FALLBACK,
+    COUNT_NAV_AS_ESTIMATE,
+    COUNT_ESTIMATE_ONLY,
+    COUNT_DEADLINE,
+    COUNT_NOT_MODIFIED,
+    COUNT_PROCESS_SKIPPED,
+)
+from .pingzhong import PingzhongExtractor
+from .snapshot import FundSnapshot
+
+if TYPE_CHECKING:
+    from .alerts import FundAlerts
+    from .engine import FundQuoteEngine
+    from .analytics import FundAnalytics
+    from .history import FundHistoryManager
+    from .ledger import FundLedger, Position
+    from .store import FundSnapshotStore
 
 _LOGGER = logging.getLogger(__name__)
 
-class DailyFundCoordinator(DataUpdateCoordinator):
+class DailyFundCoordinator(DataUpdateCoordinator[FundSnapshot]):
     """Class to manage fetching Daily Fund data."""
 
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        engine: FundQuoteEngine,
+        snapshots: FundSnapshotStore,
+        history: FundHistoryManager,
+        ledger: FundLedger,
+        alerts: FundAlerts,
+    ) -> None:
         """Initialize."""
         # 获取智能更新间隔配置
         self.trading_interval = entry.data.get(CONF_TRADING_INTERVAL, DEFAULT_TRADING_INTERVAL)
         self.net_value_interval = entry.data.get(CONF_NET_VALUE_INTERVAL, DEFAULT_NET_VALUE_INTERVAL)
-        self.non_trading_interval = DEFAULT_NON_TRADING_INTERVAL
         
-        # 初始使用默认间隔
+        self.calendar = engine.calendar
+        self.engine = engine
+        # 由基金代码决定的固定相位(0~1)，按批次把各基金的轮询错开
+        self.phase = zlib.crc32(entry.data[CONF_FUND_CODE].encode()) / 2**32
+
+        # 初始间隔由交易日历决定
+        self._nav_cache: dict | None = None
         initial_interval = self._calculate_optimal_interval()
         
         super().__init__(
             hass,
             _LOGGER,
             name=entry.data[CONF_FUND_NAME],
-            update_interval=timedelta(seconds=initial_interval),
+            update_interval=initial_interval,
+            # 冷却期内的多次刷新请求合并为一次
+            request_refresh_debouncer=Debouncer(
+                hass, _LOGGER, cooldown=REFRESH_COOLDOWN, immediate=True
+            ),
         )
         
         self.entry = entry
+        self.client = engine.client
+        self.health = engine.health
+        self.metrics = engine.metrics
+        self.snapshots = snapshots
+        self.history = history
+        self.ledger = ledger
+        self.alerts = alerts
         self.fund_code = entry.data[CONF_FUND_CODE]
         self.fund_name = entry.data[CONF_FUND_NAME]
-        self.avg_net_value = float(entry.data.get(CONF_AVG_NET_VALUE, 0))
-        self.hold_shares = float(entry.data.get(CONF_HOLD_SHARES, 0))
-        self.initial_cost = float(entry.data.get(CONF_INITIAL_COST, 0))
+        # 有交易记录时持仓由交易记录决定，否则使用配置的持仓
+        self.position: Position | None = None
+        self._apply_position(ledger.async_get_position(self.fund_code))
+        self.hedge_delay = float(entry.data.get(CONF_HEDGE_DELAY, DEFAULT_HEDGE_DELAY))
+        self.refresh_deadline = float(
+            entry.data.get(CONF_REFRESH_DEADLINE, DEFAULT_REFRESH_DEADLINE)
+        )
         
         self._fund_name_cache = None
 
-    def _calculate_optimal_interval(self) -> int:
-        """Calculate optimal update interval based on current time."""
-        now = datetime.now()
-        current_time = now.time()
-        
-        # 检查是否在交易时段内
-        is_trading_hours = self._is_trading_hours(current_time)
-        
-        # 检查是否在净值公布时段内
-        is_net_value_publish_hours = self._is_net_value_publish_hours(current_time)
-        
-        # 确定更新间隔
-        if is_trading_hours:
-            return self.trading_interval
-        elif is_net_value_publish_hours:
-            return self.net_value_interval
-        else:
-            return self.non_trading_interval
+        # 最近一次的原始数据，持仓变化时据此重新计算而不必请求网络
+        self._raw: dict | None = None
+
+        # 各数据源的条件请求标识、内容哈希与上次解析结果
+        self._validators = {
+            source: ResponseValidator()
+            for source in (SOURCE_HISTORY, SOURCE_FUNDGZ, SOURCE_PINGZHONG)
+        }
+
+        # 净值慢轨道：历史净值每个交易日只在晚间公布一次
+        self._nav_valid_until: datetime | None = None
+
+        self._history_task: asyncio.Task | None = None
 
-    def _is_trading_hours(self, current_time: time) -> bool:
-        """Check if current time is within trading hours."""
-        am_start = time(TRADING_HOURS_AM_START, TRADING_HOURS_AM_START_MINUTE)
-        am_end = time(TRADING_HOURS_AM_END, TRADING_HOURS_AM_END_MINUTE)
-        pm_start = time(TRADING_HOURS_PM_START, 0)
-        pm_end = time(TRADING_HOURS_PM_END, 0)
-        return (am_start <= current_time <= am_end) or (pm_start <= current_time <= pm_end)
+        # 当日盘中估算走势
+        self.intraday = IntradaySeries(INTRADAY_CAPACITY)
 
-    def _is_net_value_publish_hours(self, current_time: time) -> bool:
-        publish_start = time(NET_VALUE_PUBLISH_START, 0)
-        publish_end = time(NET_VALUE_PUBLISH_END, 0)
-        return publish_start <= current_time <= publish_end
+        # 来自本地快照、尚未被实时数据刷新
+        self.is_stale = False
+        self.snapshot_time: str | None = None
+
+    @callback
+    def async_restore_snapshot(self) -> bool:
+        """Show the persisted snapshot until the first real refresh lands."""
+        if (snapshot := self.snapshots.async_get(self.fund_code)) is None:
+            return False
+
+        self.data = snapshot["data"]
+        self._raw = self._raw_from_data(self.data)
+        self.is_stale = True
+        self.snapshot_time = snapshot.get("saved_at")
+
+        # 快照中的净值仍是最新时，首次刷新不必再请求历史净值
+        if nav := snapshot.get("nav"):
+            now = self.calendar.now()
+            self._nav_cache = nav
+            if self._is_nav_current(now):
+                self._nav_valid_until = self._next_nav_check(now)
+            else:
+                self._nav_valid_until = now
+        self._schedule_next_update()
+        return True
+
+    @property
+    def batch_phase(self) -> float:
+        """Return the phase of the engine batch slot the fund polls with."""
+        return self.engine.slot_phase(self.phase)
+
+    def _is_nav_current(self, now: datetime) -> bool:
+        """Return True if the cached NAV is the latest one expected."""
+        return (
+            self._nav_cache is not None
+            and self._nav_cache.get("jzrq", "")
+            >= self.calendar.expected_nav_date(now).isoformat()
+        )
+
+    def _calculate_optimal_interval(self) -> timedelta:
+        """Calculate the delay until the next calendar-aligned poll."""
+        now = self.calendar.now()
+        wakeup = self.calendar.next_wakeup(
+            now,
+            self.trading_interval,
+            self.net_value_interval,
+            self._is_nav_current(now),
+            self.batch_phase,
+        )
+        # 多等一秒，确保在边界之后而不是之前醒来
+        return max(wakeup - now, timedelta(0)) + timedelta(seconds=1)
+
+    def _schedule_next_update(self) -> None:
+        """Point the coordinator's next refresh at the next wake-up time."""
+        new_interval = self._calculate_optimal_interval()
+        self.update_interval = new_interval
+        _LOGGER.debug(
+            "Next refresh of fund %s in %s",
+            self.fund_code,
+            new_interval,
+        )
 
     async def _async_update_data(self):
         """Update data via API."""
+        started = perf_counter()
         try:
-            # 在每次更新前重新计算最优间隔
-            new_interval = self._calculate_optimal_interval()
-            if self.update_interval != timedelta(seconds=new_interval):
-                self.update_interval = timedelta(seconds=new_interval)
-                _LOGGER.debug(
-                    "Updated refresh interval to %s seconds for fund %s",
-                    new_interval,
-                    self.fund_code
-                )
+            # 先按当前状态排好下一次刷新，失败时也不会错过开盘等边界
+            self._schedule_next_update()
             
-            fund_data = await self._fetch_fund_data()
+            # 由全局引擎与其他基金合并为一轮请求
+            fund_data = await self.engine.async_fetch(self.fund_code)
             
             if not fund_data:
                 raise UpdateFailed("无法获取基金数据")
             
-            return self._process_fund_data(fund_data)
+            return self.handle_fetched_data(fund_data)
                     
         except aiohttp.ClientError as err:
             raise UpdateFailed(f"网络请求错误: {err}")
         except Exception as err:
             raise UpdateFailed(f"未知错误: {err}")
+        finally:
+            self.metrics.record_time(TIMING_REFRESH, perf_counter() - started)
 
-    async def _fetch_fund_data(self) -> dict:
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update all listeners, timing the state writes."""
+        started = perf_counter()
+        super().async_update_listeners()
+        self.metrics.record_time(TIMING_STATE_WRITE, perf_counter() - started)
+
+    async def async_fetch_fund_data(self, batch_estimate: dict | None = None) -> dict:
         """
         获取基金数据，合并多个API源：
-        1. 先从历史净值API获取基础数据（含前天），保证前天数据。
-        2. 再从fundgz获取实时估算数据（gsz, gszzl, gztime），覆盖估算字段。
-        3. 如果fundgz失败，则使用历史净值的净值作为估算。
-        4. 如果历史净值失败，尝试其他源（平中数据）作为备用。
+        1. 历史净值（含前天，慢轨道，多数时候直接命中缓存）与实时估算并发请求；
+           引擎已通过批量接口取得估算时直接使用，不再单独请求。
+        2. 估算源(fundgz/平中数据)按各自的成功率与延迟排序，熔断中的源排在最后且不发请求。
+        3. 首选估算源在延迟预算(hedge_delay)内未返回或已失败时，立即对冲请求备用源，
+           先返回有效数据的一方胜出，其余请求被取消。
+        4. 整次刷新受refresh_deadline限制，超时后使用已取得的数据。
+        5. 如果没有估算，则使用历史净值的净值作为估算。
         """
-        base_data = None
-        estimate_data = None
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        hedge_at = started + self.hedge_delay
+        deadline = started + self.refresh_deadline
+
+        fetchers = {
+            SOURCE_FUNDGZ: self._fetch_from_fundgz,
+            SOURCE_PINGZHONG: self._fetch_from_eastmoney_pingzhong,
+        }
+        primary, fallback = self.health.rank([SOURCE_FUNDGZ, SOURCE_PINGZHONG])
 
-        # 第一步：获取历史净值（含前天）
-        try:
-            base_data = await self._fetch_from_eastmoney_api()
-            if base_data:
-                _LOGGER.debug("成功获取历史净值数据（含前天）")
-        except Exception as e:
-            _LOGGER.warning("获取历史净值失败: %s", e)
+        tasks: dict[str, asyncio.Task] = {
+            SOURCE_HISTORY: asyncio.create_task(self._fetch_nav(batch_estimate)),
+        }
+        results: dict[str, dict | None] = {}
+        if batch_estimate:
+            self.metrics.count(COUNT_BATCH_HIT)
+            results[SOURCE_BATCH] = dict(batch_estimate)
+        else:
+            tasks[primary] = asyncio.create_task(
+                self._call_source(primary, fetchers[primary])
+            )
 
-        # 第二步：获取实时估算（如果历史净值成功，则用估算覆盖；如果历史净值失败，则尝试单独获取估算）
         try:
-            estimate_data = await self._fetch_from_fundgz()
-            if estimate_data:
-                _LOGGER.debug("成功获取实时估算数据")
-        except Exception as e:
-            _LOGGER.warning("获取实时估算失败: %s", e)
+            while True:
+                for source, task in tasks.items():
+                    if source not in results and task.done():
+                        results[source] = self._task_result(source, task)
+
+                estimate_data = next(
+                    (results[source] for source in (SOURCE_BATCH, primary, fallback)
+                     if results.get(source)),
+                    None,
+                )
+
+                # 估算缺失且超出预算（或首选源已失败）时，对冲请求备用源
+                if (
+                    estimate_data is None
+                    and fallback not in tasks
+                    and (loop.time() >= hedge_at or primary in results)
+                ):
+                    _LOGGER.debug(
+                        "基金 %s 估算源 %s 未按时返回，对冲请求 %s",
+                        self.fund_code,
+                        primary,
+                        fallback,
+                    )
+                    self.metrics.count(COUNT_HEDGE)
+                    tasks[fallback] = asyncio.create_task(
+                        self._call_source(fallback, fetchers[fallback])
+                    )
+
+                waiting_base = SOURCE_HISTORY not in results
+                waiting_estimate = estimate_data is None and any(
+                    source not in results for source in (primary, fallback)
+                    if source in tasks
+                )
+                if not waiting_base and not waiting_estimate:
+                    break
+
+                now = loop.time()
+                if now >= deadline:
+                    self.metrics.count(COUNT_DEADLINE)
+                    _LOGGER.warning(
+                        "基金 %s 刷新超过 %s 秒上限，使用已获取的数据",
+                        self.fund_code,
+                        self.refresh_deadline,
+                    )
+                    break
+
+                # 尚未对冲时最迟在预算到期时醒来检查
+                hedge_pending = estimate_data is None and fallback not in tasks
+                wake_at = min(hedge_at, deadline) if hedge_pending else deadline
+                pending = [task for source, task in tasks.items() if source not in results]
+                await asyncio.wait(
+                    pending,
+                    timeout=max(wake_at - now, 0),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+        finally:
+            for task in tasks.values():
+                if not task.done():
+                    task.cancel()
+
+        base_data = results.get(SOURCE_HISTORY)
 
         # 合并数据
         if base_data:
@@ -153,32 +337,138 @@ class DailyFundCoordinator(DataUpdateCoordinator):
             if estimate_data:
                 base_data["gsz"] = estimate_data.get("gsz", base_data.get("dwjz", "0"))
                 base_data["gszzl"] = estimate_data.get("gszzl", "0")
-                base_data["gztime"] = estimate_data.get("gztime", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+                base_data["gztime"] = estimate_data.get("gztime") or base_data.get("jzrq", "")
             else:
-                # 无估算，使用历史净值作为估算
+                # 无估算，使用历史净值作为估算；时间取净值日期，数据不变时不产生新状态
+                self.metrics.count(COUNT_NAV_AS_ESTIMATE)
                 base_data["gsz"] = base_data.get("dwjz", "0")
                 base_data["gszzl"] = "0"
-                base_data["gztime"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                base_data["gztime"] = base_data.get("jzrq", "")
             return base_data
 
-        # 如果历史净值失败，尝试其他源（fundgz或平中）
+        # 如果历史净值失败，使用估算数据（只有平中数据带有前天净值）
         if estimate_data:
-            # 仅估算数据（无前天信息）
-            estimate_data["prev_dwjz"] = "0"
-            estimate_data["prev_jzrq"] = ""
+            self.metrics.count(COUNT_ESTIMATE_ONLY)
             return estimate_data
 
-        # 最后尝试平中数据
+        return None
+
+    async def _call_source(self, source: str, fetch) -> dict | None:
+        """Call a source through its circuit breaker, recording its health.
+
+        Only exceptions count against the source; a fetcher returns None
+        when the response is fine but holds no data for this fund.
+        """
+        health = self.health.get(source)
+        if not health.allow():
+            raise SourceUnavailable(f"{source} 熔断中")
+
+        started = monotonic()
         try:
-            pingzhong_data = await self._fetch_from_eastmoney_pingzhong()
-            if pingzhong_data:
-                pingzhong_data["prev_dwjz"] = "0"
-                pingzhong_data["prev_jzrq"] = ""
-                return pingzhong_data
-        except Exception as e:
-            _LOGGER.warning("获取平中数据失败: %s", e)
+            result = await fetch()
+        except asyncio.CancelledError:
+            health.record_abandoned()
+            raise
+        except Exception:
+            health.record_failure()
+            self.metrics.record_request(source, monotonic() - started, False)
+            raise
+        latency = monotonic() - started
+        health.record_success(latency)
+        self.metrics.record_request(source, latency, True)
+        return result
+
+    def _task_result(self, source: str, task: asyncio.Task) -> dict | None:
+        """Return the result of a finished source task, logging failures."""
+        if task.cancelled():
+            return None
+        if (err := task.exception()) is not None:
+            _LOGGER.warning("基金 %s 数据源 %s 获取失败: %s", self.fund_code, source, err)
+            return None
+        _LOGGER.debug("基金 %s 数据源 %s 获取成功", self.fund_code, source)
+        return task.result()
+
+    async def _fetch_nav(self, batch_estimate: dict | None = None) -> dict:
+        """
+        净值慢轨道：
+        1. 缓存的净值已是最新交易日时，直到下一个净值公布时段都直接复用。
+        2. 到达公布时段后轮询，直到出现新的净值日期(FSRQ)再次休眠。
+        3. 批量估算接口已带回更新的净值日期时立即失效缓存。
+        """
+        now = self.calendar.now()
+        cache = self._nav_cache
 
-        return None
+        if cache is not None:
+            published = (
+                batch_estimate is not None
+                and batch_estimate.get("jzrq", "") > cache["jzrq"]
+            )
+            if now < self._nav_valid_until and not published:
+                self.metrics.count(COUNT_NAV_CACHE_HIT)
+                return dict(cache)
+
+        try:
+            data = await self._call_source(SOURCE_HISTORY, self._fetch_from_eastmoney_api)
+        except Exception as err:
+            if cache is None:
+                raise
+            _LOGGER.warning("基金 %s 更新历史净值失败，沿用缓存: %s", self.fund_code, err)
+            self.metrics.count(COUNT_NAV_CACHE_FALLBACK)
+            self._nav_valid_until = now + timedelta(seconds=self.net_value_interval)
+            return dict(cache)
+
+        if data["jzrq"] >= self.calendar.expected_nav_date(now).isoformat():
+            # 已是最新净值，休眠到下一个公布时段
+            self._nav_valid_until = self._next_nav_check(now)
+        elif self.calendar.is_net_value_publish_hours(now):
+            self._nav_valid_until = now + timedelta(seconds=self.net_value_interval)
+        else:
+            # 公布时段之外不再查净值，等下一个可能公布的时段
+            self._nav_valid_until = self._next_nav_check(now, late=True)
+
+        _LOGGER.debug(
+            "基金 %s 净值日期 %s，下次检查净值 %s",
+            self.fund_code,
+            data["jzrq"],
+            self._nav_valid_until,
+        )
+        if cache is not None and data["jzrq"] > cache["jzrq"]:
+            # 新净值公布，把新增的行追加到本地历史
+            self.async_schedule_history_sync()
+        self._nav_cache = dict(data)
+        return data
+
+    @callback
+    def async_schedule_history_sync(self) -> None:
+        """Sync the local NAV history in the background unless already running."""
+        if self._history_task is not None and not self._history_task.done():
+            return
+        self._history_task = self.entry.async_create_background_task(
+            self.hass,
+            self._async_sync_history(),
+            f"{DOMAIN} {self.fund_code} history sync",
+        )
+
+    async def _async_sync_history(self) -> None:
+        """Backfill or extend the local NAV history."""
+        try:
+            await self.history.async_sync(self.fund_code)
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.warning("基金 %s 同步历史净值失败: %s", self.fund_code, err)
+        # 历史指标可能已变化，由实体自行判断是否需要写入状态
+        if self.data is not None:
+            self.async_update_listeners()
+
+    @property
+    def analytics(self) -> FundAnalytics | None:
+        """Return the statistics over the fund's local NAV history."""
+        return self.history.async_peek_analytics(self.fund_code)
+
+    def _next_nav_check(self, now: datetime, late: bool = False) -> datetime:
+        """Return the first NAV poll of the next publish window for this fund."""
+        return self.calendar.next_publish_time(now, late) + timedelta(
+            seconds=self.batch_phase * self.net_value_interval
+        )
 
     # ---------- API源1：历史净值（含前天） ----------
     async def _fetch_from_eastmoney_api(self) -> dict:
@@ -189,250 +479,263 @@ class DailyFundCoordinator(DataUpdateCoordinator):
             "pageIndex": 1,
             "pageSize": 2,
         }
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-            "Referer": "https://fund.eastmoney.com/"
-        }
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params, headers=headers, timeout=10) as response:
-                if response.status != 200:
-                    raise Exception(f"HTTP {response.status}")
-                text = await response.text()
-                data = json.loads(text)
-                
-                if data.get("Data") and data["Data"].get("LSJZList"):
-                    lsjz_list = data["Data"]["LSJZList"]
-                    if not lsjz_list:
-                        raise Exception("无历史净值")
-                    
-                    latest = lsjz_list[0]
-                    prev = lsjz_list[1] if len(lsjz_list) > 1 else None
-                    fund_name = data["Data"].get("FundName", self.fund_name)
-                    
-                    return {
-                        "fundcode": self.fund_code,
-                        "name": fund_name,
-                        "dwjz": latest.get("DWJZ", "0"),
-                        "jzrq": latest.get("FSRQ", ""),
-                        "prev_dwjz": prev.get("DWJZ", "0") if prev else "0",
-                        "prev_jzrq": prev.get("FSRQ", "") if prev else "",
-                        # 估算字段占位，后续会被覆盖
-                        "gsz": "0",
-                        "gszzl": "0",
-                        "gztime": "",
-                    }
-                raise Exception("无法解析历史净值")
+
+        validator = self._validators[SOURCE_HISTORY]
+        text = await self.client.async_get_text(url, params=params, validator=validator)
+        if (unchanged := self._unchanged_result(SOURCE_HISTORY)) is not None:
+            return unchanged
+        parse_started = perf_counter()
+        data = json.loads(text)
+
+        if data.get("Data") and data["Data"].get("LSJZList"):
+            lsjz_list = data["Data"]["LSJZList"]
+            if not lsjz_list:
+                raise Exception("无历史净值")
+
+            latest = lsjz_list[0]
+            prev = lsjz_list[1] if len(lsjz_list) > 1 else None
+            fund_name = data["Data"].get("FundName", self.fund_name)
+            self.metrics.record_payload(
+                SOURCE_HISTORY, len(text), perf_counter() - parse_started
+            )
+
+            validator.result = {
+                "fundcode": self.fund_code,
+                "name": fund_name,
+                "dwjz": latest.get("DWJZ", "0"),
+                "jzrq": latest.get("FSRQ", ""),
+                "prev_dwjz": prev.get("DWJZ", "0") if prev else "0",
+                "prev_jzrq": prev.get("FSRQ", "") if prev else "",
+                # 估算字段占位，后续会被覆盖
+                "gsz": "0",
+                "gszzl": "0",
+                "gztime": "",
+            }
+            return dict(validator.result)
+        raise Exception("无法解析历史净值")
 
     # ---------- API源2：fundgz（实时估算） ----------
-    async def _fetch_from_fundgz(self) -> dict:
-        """从天天基金 fundgz 接口获取实时估算数据."""
+    async def _fetch_from_fundgz(self) -> dict | None:
+        """从天天基金 fundgz 接口获取实时估算数据，没有估算的基金返回None."""
         url = f"http://fundgz.1234567.com.cn/js/{self.fund_code}.js"
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-            "Referer": "https://fund.eastmoney.com/"
+
+        validator = self._validators[SOURCE_FUNDGZ]
+        text = await self.client.async_get_text(url, validator=validator)
+        if (unchanged := self._unchanged_result(SOURCE_FUNDGZ)) is not None:
+            return unchanged
+        parse_started = perf_counter()
+        text = text.strip()
+
+        # 处理 JSONP
+        if text.startswith('jsonpgz(') and text.endswith(');'):
+            json_str = text[8:-2].strip()
+        else:
+            json_str = text
+
+        # QDII、部分债券基金等没有盘中估算，接口返回空白、jsonpgz(); 或不含基金代码的内容。
+        # 这是正常的"无估算"结果，不计为数据源故障，也不触发限流退避；
+        # 真正的限流由HTTP状态码识别
+        if not json_str:
+            return None
+        data = json.loads(json_str)
+        if not isinstance(data, dict) or not data.get('fundcode'):
+            return None
+        self.metrics.record_payload(SOURCE_FUNDGZ, len(text), perf_counter() - parse_started)
+
+        validator.result = {
+            "fundcode": self.fund_code,
+            "name": data.get('name', self.fund_name),
+            "dwjz": data.get('dwjz', '0'),   # 也可提供，但不一定是最新
+            "jzrq": data.get('jzrq', ''),
+            "gsz": data.get('gsz', '0'),
+            "gszzl": data.get('gszzl', '0'),
+            "gztime": data.get('gztime', ''),
+            # 不提供前天数据
+            "prev_dwjz": "0",
+            "prev_jzrq": "",
         }
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers, timeout=10) as response:
-                if response.status != 200:
-                    raise Exception(f"HTTP {response.status}")
-                text = await response.text()
-                text = text.strip()
-                if not text:
-                    raise Exception("空响应")
-                
-                # 处理 JSONP
-                if text.startswith('jsonpgz(') and text.endswith(');'):
-                    json_str = text[8:-2]
-                else:
-                    json_str = text
-                
-                data = json.loads(json_str)
-                
-                if not data.get('fundcode'):
-                    raise Exception("缺少 fundcode")
-                
-                return {
-                    "fundcode": self.fund_code,
-                    "name": data.get('name', self.fund_name),
-                    "dwjz": data.get('dwjz', '0'),   # 也可提供，但不一定是最新
-                    "jzrq": data.get('jzrq', ''),
-                    "gsz": data.get('gsz', '0'),
-                    "gszzl": data.get('gszzl', '0'),
-                    "gztime": data.get('gztime', ''),
-                    # 不提供前天数据
-                    "prev_dwjz": "0",
-                    "prev_jzrq": "",
-                }
-
-    # ---------- API源3：平中数据（备用实时估算） ----------
+        return dict(validator.result)
+
+    # ---------- API源3：平中数据（备用数据） ----------
     async def _fetch_from_eastmoney_pingzhong(self) -> dict:
-        """从天天基金网平中数据API获取数据."""
+        """从天天基金网平中数据API获取数据（流式读取，取到净值走势即停止）."""
         url = f"https://fund.eastmoney.com/pingzhongdata/{self.fund_code}.js"
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-            "Referer": "https://fund.eastmoney.com/"
+
+        extractor = PingzhongExtractor()
+        parse_time = 0.0
+
+        def _feed(chunk: str) -> bool:
+            # 扫描与下载交替进行，只累计扫描本身的耗时
+            nonlocal parse_time
+            started = perf_counter()
+            done = extractor.feed(chunk)
+            parse_time += perf_counter() - started
+            return done
+
+        validator = self._validators[SOURCE_PINGZHONG]
+        await self.client.async_stream_text(url, _feed, validator=validator)
+        if (unchanged := self._unchanged_result(SOURCE_PINGZHONG)) is not None:
+            return unchanged
+
+        # 大文件的解析放到线程池，避免阻塞事件循环
+        started = perf_counter()
+        if extractor.size > PINGZHONG_EXECUTOR_THRESHOLD:
+            values = await self.hass.async_add_executor_job(extractor.result)
+        else:
+            values = extractor.result()
+        self.metrics.record_payload(
+            SOURCE_PINGZHONG, extractor.size, parse_time + perf_counter() - started
+        )
+
+        dwjz = values.get("fS_dwjz") or values.get("trend_dwjz")
+        gsz = values.get("fS_gsz")
+        if not dwjz and not gsz:
+            raise Exception("未提取到净值数据")
+
+        jzrq = values.get("fS_jzrq") or values.get("trend_jzrq", "")
+        validator.result = {
+            "fundcode": self.fund_code,
+            "name": values.get("fS_name") or self.fund_name,
+            "dwjz": dwjz or "0",
+            "jzrq": jzrq,
+            "gsz": gsz or dwjz or "0",
+            "gszzl": values.get("fS_gszzl", "0"),
+            "gztime": values.get("fS_gztime") or jzrq,
+            # 净值走势数组的倒数第二个点即前天净值
+            "prev_dwjz": values.get("trend_prev_dwjz", "0"),
+            "prev_jzrq": values.get("trend_prev_jzrq", ""),
         }
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers, timeout=10) as response:
-                if response.status != 200:
-                    raise Exception(f"HTTP {response.status}")
-                text = await response.text()
-                
-                fund_name = self._extract_js_value(text, "fS_name")
-                dwjz = self._extract_js_value(text, "fS_dwjz")
-                gsz = self._extract_js_value(text, "fS_gsz")
-                gszzl = self._extract_js_value(text, "fS_gszzl")
-                jzrq = self._extract_js_value(text, "fS_jzrq")
-                gztime = self._extract_js_value(text, "fS_gztime")
-                
-                if not dwjz and not gsz:
-                    raise Exception("未提取到净值数据")
-                
-                return {
-                    "fundcode": self.fund_code,
-                    "name": fund_name or self.fund_name,
-                    "dwjz": dwjz or "0",
-                    "jzrq": jzrq or "",
-                    "gsz": gsz or dwjz or "0",
-                    "gszzl": gszzl or "0",
-                    "gztime": gztime or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "prev_dwjz": "0",
-                    "prev_jzrq": "",
-                }
-
-    # ---------- 辅助方法 ----------
-    def _extract_js_value(self, text: str, key: str) -> str:
-        """从JavaScript代码中提取变量值（支持多种格式）."""
-        patterns = [
-            rf'{key}\s*=\s*"([^"]*)"',
-            rf'{key}\s*=\s*\'([^\']*)\'',
-            rf'{key}\s*=\s*([^;]*);',
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, text)
-            if match:
-                value = match.group(1).strip()
-                if value:
-                    return value
-        return ""
-
-    def _process_fund_data(self, fund_data: dict) -> dict:
-        """处理基金数据，计算各项指标."""
+        return dict(validator.result)
+
+    def handle_fetched_data(self, fund_data: dict) -> FundSnapshot:
+        """Process fetched raw data unless it is what is already shown."""
+        if not self.is_stale and self.data is not None and fund_data == self._raw:
+            # 各数据源均未变化，指标不变，不必重新计算与保存快照
+            self.metrics.count(COUNT_PROCESS_SKIPPED)
+            self._schedule_next_update()
+            return self.data
+        return self._handle_fund_data(fund_data)
+
+    def _unchanged_result(self, source: str) -> dict | None:
+        """Return a copy of the last parsed result if the response did not change."""
+        validator = self._validators[source]
+        if validator.changed or validator.result is None:
+            # 解析成功前不保留旧结果，也不发送条件请求
+            validator.result = None
+            return None
+        self.metrics.count(COUNT_NOT_MODIFIED)
+        return dict(validator.result)
+
+    def _handle_fund_data(self, fund_data: dict) -> FundSnapshot:
+        """Process fresh raw data and persist it as the fund's snapshot."""
+        started = perf_counter()
+        data = self._process_fund_data(fund_data)
+        self.metrics.record_time(TIMING_PROCESS, perf_counter() - started)
+        self.alerts.async_evaluate_fund(data)
+        self._raw = fund_data
+        self._record_intraday(data)
+        self.is_stale = False
+        self._schedule_next_update()
+        self.snapshots.async_update(self.fund_code, data, self._nav_cache)
+        return data
+
+    @callback
+    def async_apply_position(self, position: Position | None) -> None:
+        """Use a new ledger position and recompute the data without fetching."""
+        self._apply_position(position)
+        if self._raw is None:
+            return
+        # 不走网络，直接用最近一次的原始数据重新计算
+        self.async_set_updated_data(self._handle_fund_data(self._raw))
+
+    def _apply_position(self, position: Position | None) -> None:
+        """Take the holding from the ledger, or from the entry without one."""
+        self.position = position
+        if position is None:
+            self.avg_net_value = float(self.entry.data.get(CONF_AVG_NET_VALUE, 0))
+            self.hold_shares = float(self.entry.data.get(CONF_HOLD_SHARES, 0))
+            self.initial_cost = float(self.entry.data.get(CONF_INITIAL_COST, 0))
+            return
+        self.avg_net_value = position.average_cost
+        self.hold_shares = position.shares
+        self.initial_cost = position.cost
+
+    @staticmethod
+    def _raw_from_data(data: FundSnapshot) -> dict:
+        """Rebuild the raw fields from processed (snapshot) data."""
+        return {
+            "name": data.fund_full_name,
+            "dwjz": data.actual_net_value,
+            "jzrq": data.net_value_date,
+            "gsz": data.estimated_net_value,
+            "gszzl": data.estimated_growth_rate,
+            "gztime": data.update_time,
+            "prev_dwjz": data.prev_net_value,
+            "prev_jzrq": data.prev_net_value_date,
+        }
+
+    def _record_intraday(self, data: FundSnapshot) -> None:
+        """Append the estimate to the intraday series if it is a new session tick."""
+        update_time = data.update_time or ""
+        # 只有净值日期的回退时间不是盘中估算
+        if len(update_time) <= 10:
+            return
+        try:
+            moment = datetime.fromisoformat(update_time).replace(tzinfo=self.calendar.tz)
+        except ValueError:
+            return
+        if not self.calendar.is_trading_hours(moment):
+            return
+        self.intraday.add(
+            moment, data.estimated_net_value, data.estimated_growth_rate
+        )
+
+    def _process_fund_data(self, fund_data: dict) -> FundSnapshot:
+        """处理基金数据，派生指标在首次读取时计算."""
         try:
             gsz = self._parse_number(fund_data.get('gsz', 0))
             gszzl = self._parse_number(fund_data.get('gszzl', 0))
             dwjz = self._parse_number(fund_data.get('dwjz', 0))
             prev_dwjz = self._parse_number(fund_data.get('prev_dwjz', 0))
-            prev_jzrq = fund_data.get('prev_jzrq', '')
         except Exception as e:
             _LOGGER.error("数值解析错误: %s", e)
             raise UpdateFailed(f"数值解析错误: {e}")
 
-        # 如果估算净值为0，使用单位净值代替
-        if gsz == 0 and dwjz > 0:
-            gsz = dwjz
-
-        # 如果前天净值为0，则无法计算前天相关指标，设为0
-        if prev_dwjz <= 0:
-            prev_net_value = 0
-            prev_value = 0
-            prev_profit = 0
-            prev_profit_rate = 0
-            prev_growth_rate = 0
-            # 涨跌净值也无法计算，使用0
-            rise_fall_net_value = 0
-        else:
-            prev_net_value = self._format_number(prev_dwjz, 4)
-            # 前天市值
-            prev_value = self._format_number(self.hold_shares * prev_dwjz, 2)
-            # 前天收益（相对于初始成本）
-            prev_profit = self._format_number(prev_value - self.initial_cost, 2)
-            # 前天收益率
-            prev_profit_rate = self._format_number(
-                (prev_profit / self.initial_cost * 100) if self.initial_cost else 0, 2
-            )
-            # 前天增长率（前天到昨天的增长率） = (dwjz - prev_dwjz) / prev_dwjz * 100
-            prev_growth_rate = self._format_number(
-                (dwjz - prev_dwjz) / prev_dwjz * 100, 4
-            )
-            # 涨跌净值 = 单位净值 - 前天净值
-            rise_fall_net_value = self._format_number(dwjz - prev_dwjz, 4)
-
-        fund_full_name = fund_data.get('name', self.fund_name)
-
-        # 估算指标
-        estimated_net_value = self._format_number(gsz, 4)
-        estimated_growth_rate = self._format_number(gszzl, 4)
-        estimated_value = self._format_number(self.hold_shares * gsz, 2)
-        estimated_profit = self._format_number(estimated_value - self.initial_cost, 2)
-        estimated_profit_rate = self._format_number(
-            (estimated_profit / self.initial_cost * 100) if self.initial_cost else 0, 2
-        )
-
-        # 实际（昨天）指标
-        actual_net_value = self._format_number(dwjz, 4)
-        actual_value = self._format_number(self.hold_shares * dwjz, 2)
-        actual_profit = self._format_number(actual_value - self.initial_cost, 2)
-        actual_profit_rate = self._format_number(
-            (actual_profit / self.initial_cost * 100) if self.initial_cost else 0, 2
+        position = self.position
+        return FundSnapshot(
+            fund_code=self.fund_code,
+            fund_name=self.fund_name,
+            fund_full_name=fund_data.get('name', self.fund_name),
+            net_value_date=fund_data.get('jzrq', ''),
+            update_time=fund_data.get('gztime', ''),
+            prev_net_value_date=fund_data.get('prev_jzrq', ''),  # 将作为“前天日期”
+            dwjz=dwjz,
+            gsz=gsz,
+            gszzl=gszzl,
+            prev_dwjz=prev_dwjz,
+            hold_shares=self.hold_shares,
+            initial_cost=self.initial_cost,
+            avg_net_value=self.avg_net_value,
+            # 交易记录
+            cost_method=position.method if position else None,
+            realized=position.realized if position else 0.0,
+            dividends=position.dividends if position else 0.0,
         )
 
-        avg_net_value = self._format_number(self.avg_net_value, 4)
-
-        net_value_date = fund_data.get('jzrq', '')
-        update_time = fund_data.get('gztime', '')
-
-        rise_fall_icon = "📈" if estimated_profit >= actual_profit else "📉"
-
-        return {
-            "fund_code": self.fund_code,
-            "fund_name": self.fund_name,
-            "fund_full_name": fund_full_name,
-            "rise_fall_net_value": rise_fall_net_value,
-            "rise_fall_icon": rise_fall_icon,
-            "avg_net_value": avg_net_value,
-            "hold_shares": self._format_number(self.hold_shares, 2),
-            "initial_cost": self._format_number(self.initial_cost, 2),
-            "net_value_date": net_value_date,
-            "actual_net_value": actual_net_value,
-            "actual_value": actual_value,
-            "actual_profit": actual_profit,
-            "actual_profit_rate": actual_profit_rate,
-            "update_time": update_time,
-            "estimated_net_value": estimated_net_value,
-            "estimated_growth_rate": estimated_growth_rate,
-            "estimated_value": estimated_value,
-            "estimated_profit": estimated_profit,
-            "estimated_profit_rate": estimated_profit_rate,
-            # 前天相关
-            "prev_net_value": prev_net_value,
-            "prev_net_value_date": prev_jzrq,      # 将作为“前天日期”
-            "prev_value": prev_value,
-            "prev_profit": prev_profit,
-            "prev_profit_rate": prev_profit_rate,
-            "prev_growth_rate": prev_growth_rate,
-        }
-
     def _parse_number(self, value):
         """Parse number from string, handling percentages and commas."""
         if value is None:
             return 0
         if isinstance(value, (int, float)):
             return value
+        try:
+            # 上游多为纯数字字符串，直接转换，不必先生成清理后的副本
+            return float(value)
+        except (ValueError, TypeError):
+            pass
         try:
             cleaned = str(value).replace('%', '').replace(',', '')
             return float(cleaned)
         except (ValueError, TypeError):
             _LOGGER.warning("无法解析数值: %s", value)
-            return 0
-
-    def _format_number(self, value, decimals=2):
-        """Format number with specified decimal places."""
-        try:
-            factor = 10 ** decimals
-            return round(value * factor) / factor
-        except (TypeError, ValueError):
             return 0
\ No newline at end of file
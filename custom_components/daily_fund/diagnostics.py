@@ -0,0 +1,58 @@
+"""Diagnostics support for Daily Fund integration."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, DATA_CLIENT, DATA_ALERTS, CONF_ENTRY_TYPE, ENTRY_TYPE_PORTFOLIO
+from .history import FundHistory
+from .metrics import async_get_metrics
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    alerts = hass.data[DOMAIN].get(DATA_ALERTS)
+    rules = alerts.async_get_rules() if alerts is not None else {}
+    if entry.data.get(CONF_ENTRY_TYPE) == ENTRY_TYPE_PORTFOLIO:
+        return {
+            "entry": dict(entry.data),
+            "totals": coordinator.data,
+            "alerts": rules.get("groups", {}),
+            "metrics": async_get_metrics(hass).stats,
+        }
+
+    client = hass.data[DOMAIN][DATA_CLIENT]
+
+    return {
+        "entry": dict(entry.data),
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": str(coordinator.update_interval),
+            "is_stale": coordinator.is_stale,
+            "phase": coordinator.phase,
+            "batch_phase": coordinator.batch_phase,
+            "nav_valid_until": str(coordinator._nav_valid_until),
+        },
+        "data": None if coordinator.data is None else coordinator.data.as_dict(),
+        "rate_limiter": client.limiter.stats,
+        "sources": coordinator.health.stats,
+        "history": _history_info(coordinator.history.async_peek(coordinator.fund_code)),
+        "metrics": coordinator.metrics.stats,
+        "alerts": rules.get("funds", {}).get(coordinator.fund_code),
+    }
+
+
+def _history_info(history: FundHistory | None) -> dict[str, Any] | None:
+    """Summarize a loaded NAV history."""
+    if history is None:
+        return None
+    return {
+        "rows": len(history),
+        "first_date": str(history.first_date),
+        "last_date": str(history.last_date),
+    }
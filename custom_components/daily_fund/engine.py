@@ -0,0 +1,254 @@
+"""Domain-wide batched quote engine for Daily Fund integration."""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import math
+from time import monotonic, perf_counter
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    BATCH_ESTIMATE_URL,
+    BATCH_ESTIMATE_PARAMS,
+    ENGINE_BATCH_WINDOW,
+    ENGINE_BATCH_SIZE,
+    ENGINE_MAX_CONCURRENCY,
+    ENGINE_RESULT_MAX_AGE,
+    SOURCE_BATCH,
+)
+from .client import FundHttpClient, ResponseValidator
+from .health import SourceHealthRegistry
+from .metrics import COUNT_ENGINE_REUSE, COUNT_NOT_MODIFIED, async_get_metrics
+from .trading_calendar import TradingCalendar
+
+if TYPE_CHECKING:
+    from .coordinator import DailyFundCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class FundQuoteEngine:
+    """Fetch quotes for every configured fund in one shared round.
+
+    Coordinators call ``async_fetch`` from their update cycle. The first call
+    opens a round; calls arriving within ``ENGINE_BATCH_WINDOW`` join it, and
+    the round fetches those funds together. Funds are spread over one slot
+    per ``ENGINE_BATCH_SIZE`` funds (see ``slot_phase``): the funds of a slot
+    wake together and share a batched request, while the slots poll at
+    different moments of each interval. A fund fetched by a round that
+    ended less than ``ENGINE_RESULT_MAX_AGE`` ago reuses that result.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, client: FundHttpClient, calendar: TradingCalendar
+    ) -> None:
+        """Initialize."""
+        self.hass = hass
+        self.client = client
+        self.calendar = calendar
+        self.health = SourceHealthRegistry()
+        self.metrics = async_get_metrics(hass)
+        self._coordinators: dict[str, DailyFundCoordinator] = {}
+        self._semaphore = asyncio.Semaphore(ENGINE_MAX_CONCURRENCY)
+        self._round: asyncio.Task[dict[str, Exception]] | None = None
+        self._waiting: set[str] = set()
+        self._results: dict[str, Any] = {}
+        # 各基金最近一次随轮次获取完成的时间
+        self._fetched_at: dict[str, float] = {}
+        # 批量接口每批基金的条件请求标识与上次解析结果
+        self._batch_validators: dict[str, ResponseValidator] = {}
+
+    @property
+    def is_empty(self) -> bool:
+        """Return True if no coordinator is registered."""
+        return not self._coordinators
+
+    @callback
+    def async_register(self, coordinator: DailyFundCoordinator) -> None:
+        """Register a per-fund coordinator."""
+        self._coordinators[coordinator.fund_code] = coordinator
+
+    @callback
+    def async_unregister(self, coordinator: DailyFundCoordinator) -> None:
+        """Unregister a per-fund coordinator."""
+        self._coordinators.pop(coordinator.fund_code, None)
+        self._results.pop(coordinator.fund_code, None)
+        self._fetched_at.pop(coordinator.fund_code, None)
+
+    async def async_fetch(self, fund_code: str) -> dict | None:
+        """Return raw fund data for one fund, joining or opening a round."""
+        # 本轮开始后才注册的基金需要再等下一轮
+        for attempt in range(2):
+            if self._is_fresh(fund_code):
+                if not attempt:
+                    self.metrics.count(COUNT_ENGINE_REUSE)
+                break
+            self._waiting.add(fund_code)
+            if self._round is None or self._round.done():
+                self._round = self.hass.async_create_task(self._async_run_round())
+            errors = await asyncio.shield(self._round)
+            # 失败只交给本轮的请求方，下一轮照常重试
+            if (err := errors.get(fund_code)) is not None:
+                raise err
+
+        return self._results.get(fund_code)
+
+    @property
+    def slots(self) -> int:
+        """Return the number of batch slots the funds are spread over."""
+        return math.ceil(len(self._coordinators) / ENGINE_BATCH_SIZE) or 1
+
+    def slot_phase(self, phase: float) -> float:
+        """Return a fund's phase rounded down to the start of its batch slot."""
+        slots = self.slots
+        return math.floor(phase * slots) / slots
+
+    def _is_fresh(self, fund_code: str) -> bool:
+        """Return True if a recent round already holds data for the fund."""
+        if (fetched_at := self._fetched_at.get(fund_code)) is None:
+            return False
+        return monotonic() - fetched_at < ENGINE_RESULT_MAX_AGE
+
+    async def _async_run_round(self) -> dict[str, Exception]:
+        """Fetch the funds that asked and return the failures by code."""
+        # 等待其他协调器加入本轮
+        await asyncio.sleep(ENGINE_BATCH_WINDOW)
+
+        # 只获取本轮请求的基金，其他批次在各自的相位上刷新
+        waiting, self._waiting = self._waiting, set()
+        coordinators = {
+            code: coordinator
+            for code in sorted(waiting)
+            if (coordinator := self._coordinators.get(code)) is not None
+        }
+        codes = list(coordinators)
+        started = monotonic()
+
+        estimates = await self._async_fetch_estimates(codes)
+
+        async def _fetch_one(coordinator: DailyFundCoordinator):
+            async with self._semaphore:
+                try:
+                    return await coordinator.async_fetch_fund_data(
+                        estimates.get(coordinator.fund_code)
+                    )
+                except Exception as err:  # pylint: disable=broad-except
+                    return err
+
+        results = await asyncio.gather(
+            *(_fetch_one(coordinator) for coordinator in coordinators.values())
+        )
+        finished = monotonic()
+        errors: dict[str, Exception] = {}
+        for code, result in zip(codes, results):
+            if isinstance(result, Exception):
+                errors[code] = result
+                continue
+            # 只有成功的结果才算新鲜，失败的基金不会被后续轮次跳过
+            self._results[code] = result
+            self._fetched_at[code] = finished
+
+        _LOGGER.debug(
+            "批量获取 %s 只基金完成，耗时 %.2f 秒（批量估算命中 %s 只，限速器: %s）",
+            len(codes),
+            finished - started,
+            len(estimates),
+            self.client.limiter.stats,
+        )
+
+        return errors
+
+    async def _async_fetch_estimates(self, codes: list[str]) -> dict[str, dict]:
+        """Fetch NAV and estimates for many funds via the multi-code endpoint."""
+        health = self.health.get(SOURCE_BATCH)
+        if not codes or not health.allow():
+            return {}
+
+        chunks = [
+            codes[i:i + ENGINE_BATCH_SIZE]
+            for i in range(0, len(codes), ENGINE_BATCH_SIZE)
+        ]
+        for key in (",".join(chunk) for chunk in chunks):
+            self._batch_validators[key] = (
+                self._batch_validators.pop(key, None) or ResponseValidator()
+            )
+        # 各相位批次轮流使用，只保留最近用过的
+        while len(self._batch_validators) > 2 * self.slots:
+            del self._batch_validators[next(iter(self._batch_validators))]
+        estimates: dict[str, dict] = {}
+        started = monotonic()
+        results = await asyncio.gather(
+            *(self._async_fetch_estimate_chunk(chunk) for chunk in chunks),
+            return_exceptions=True,
+        )
+        failed = False
+        for chunk, result in zip(chunks, results):
+            if isinstance(result, Exception):
+                _LOGGER.warning("批量获取估算失败(%s 只基金): %s", len(chunk), result)
+                failed = True
+                continue
+            estimates.update(result)
+
+        # 批量接口失败时各基金自动回退到单只估算源
+        if failed:
+            health.record_failure()
+        else:
+            health.record_success(monotonic() - started)
+        return estimates
+
+    async def _async_fetch_estimate_chunk(self, codes: list[str]) -> dict[str, dict]:
+        """Fetch one chunk of the multi-code endpoint, reusing an unchanged parse."""
+        validator = self._batch_validators[",".join(codes)]
+        params = {
+            **BATCH_ESTIMATE_PARAMS,
+            "pageSize": len(codes),
+            "Fcodes": ",".join(codes),
+        }
+
+        started = perf_counter()
+        try:
+            text = await self.client.async_get_text(
+                BATCH_ESTIMATE_URL, params=params, validator=validator
+            )
+        except Exception:
+            self.metrics.record_request(SOURCE_BATCH, perf_counter() - started, False)
+            raise
+        if not validator.changed and validator.result is not None:
+            self.metrics.record_request(SOURCE_BATCH, perf_counter() - started, True)
+            self.metrics.count(COUNT_NOT_MODIFIED)
+            return validator.result
+        validator.result = None
+        parse_started = perf_counter()
+        estimates = parse_batch_estimates(text)
+        finished = perf_counter()
+        self.metrics.record_request(SOURCE_BATCH, finished - started, True)
+        self.metrics.record_payload(SOURCE_BATCH, len(text), finished - parse_started)
+        validator.result = estimates
+        return estimates
+
+
+def parse_batch_estimates(text: str) -> dict[str, dict]:
+    """Parse the multi-code endpoint into fundgz-shaped dicts keyed by code."""
+    data = json.loads(text)
+    estimates = {}
+    for item in data.get("Datas") or []:
+        code = item.get("FCODE")
+        gsz = item.get("GSZ")
+        # QDII 等基金没有盘中估算，交给单只接口处理
+        if not code or gsz in (None, "", "--"):
+            continue
+        estimates[code] = {
+            "fundcode": code,
+            "name": item.get("SHORTNAME", ""),
+            "dwjz": item.get("NAV", "0"),
+            "jzrq": item.get("PDATE", ""),
+            "gsz": gsz,
+            "gszzl": item.get("GSZZL", "0"),
+            "gztime": item.get("GZTIME", ""),
+            "prev_dwjz": "0",
+            "prev_jzrq": "",
+        }
+    return estimates
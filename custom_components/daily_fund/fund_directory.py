@@ -0,0 +1,261 @@
+"""Cached, indexed eastmoney fund directory for Daily Fund integration."""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from bisect import bisect_left
+from collections.abc import Callable
+from typing import Any, NamedTuple
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DOMAIN,
+    DATA_CLIENT,
+    DATA_DIRECTORY,
+    DIRECTORY_STORAGE_KEY,
+    DIRECTORY_STORAGE_VERSION,
+    DIRECTORY_TTL,
+    DIRECTORY_TIMEOUT,
+    DIRECTORY_RETRY,
+    DIRECTORY_IDLE,
+    DIRECTORY_SEARCH_LIMIT,
+    HTTP_HEADERS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+FUNDCODE_SEARCH_URL = "https://fund.eastmoney.com/js/fundcode_search.js"
+
+
+class FundInfo(NamedTuple):
+    """One fund of the directory."""
+
+    code: str
+    name: str
+    type: str
+
+
+def parse_fundcode_search(text: str) -> list[list[str]]:
+    """Extract the rows of ``var r = [[代码, 简拼, 名称, 类型, 全拼], ...];``."""
+    start = text.find("[")
+    end = text.rfind("]")
+    if start < 0 or end < start:
+        raise ValueError("基金目录格式无法识别")
+    return [row for row in json.loads(text[start:end + 1]) if len(row) >= 5]
+
+
+class FundDirectoryIndex:
+    """In-memory search index over the fund directory.
+
+    Every fund is listed under its code, name, pinyin abbreviation and
+    full pinyin in one sorted key list, so a prefix query of any kind is a
+    single bisection followed by a short scan. Names are also scanned for
+    substrings when the prefixes leave room in the result.
+    """
+
+    def __init__(self, rows: list[list[str]]) -> None:
+        """Build the index (blocking, tens of thousands of rows)."""
+        self.funds = [FundInfo(row[0], row[2], row[3]) for row in rows]
+        self._positions = {fund.code: index for index, fund in enumerate(self.funds)}
+        keys: list[tuple[str, int]] = []
+        for index, row in enumerate(rows):
+            keys.append((row[0], index))
+            keys.append((row[2].upper(), index))
+            if row[1]:
+                keys.append((row[1].upper(), index))
+            if row[4]:
+                keys.append((row[4].upper(), index))
+        keys.sort()
+        self._keys = [key for key, _ in keys]
+        self._rows = [index for _, index in keys]
+
+    def __len__(self) -> int:
+        """Return the number of funds."""
+        return len(self.funds)
+
+    def get(self, fund_code: str) -> FundInfo | None:
+        """Return a fund by code."""
+        index = self._positions.get(fund_code)
+        return None if index is None else self.funds[index]
+
+    def search(self, query: str, limit: int = DIRECTORY_SEARCH_LIMIT) -> list[FundInfo]:
+        """Return funds whose code, name or pinyin starts with or names contain the query."""
+        query = query.strip().upper()
+        if not query:
+            return []
+
+        found: dict[int, None] = {}
+        if (exact := self._positions.get(query)) is not None:
+            # 完整代码精确匹配排在最前
+            found[exact] = None
+        position = bisect_left(self._keys, query)
+        while (
+            len(found) < limit
+            and position < len(self._keys)
+            and self._keys[position].startswith(query)
+        ):
+            found.setdefault(self._rows[position])
+            position += 1
+
+        if len(found) < limit:
+            for index, fund in enumerate(self.funds):
+                if query in fund.name.upper():
+                    found.setdefault(index)
+                    if len(found) >= limit:
+                        break
+        return [self.funds[index] for index in found]
+
+
+class FundDirectory:
+    """Keep the eastmoney fund directory cached on disk and indexed in memory.
+
+    The directory (``fundcode_search.js``, several megabytes) is downloaded
+    at most once per TTL and kept in ``.storage``; a stale copy keeps
+    serving searches while it is refreshed or when the download fails.
+    Downloads go through the shared fund client once a fund is set up.
+    The index is only built on first use, in the executor, so importing
+    or setting up the integration never pays for it, and dropped again
+    after a while without searches.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize."""
+        self.hass = hass
+        self._store: Store[dict[str, Any]] = Store(
+            hass, DIRECTORY_STORAGE_VERSION, DIRECTORY_STORAGE_KEY
+        )
+        self._index: FundDirectoryIndex | None = None
+        self._fetched = 0.0
+        self._retry_at = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh_task: asyncio.Task | None = None
+        self._release_unsub: Callable[[], None] | None = None
+
+    @property
+    def loaded(self) -> bool:
+        """Return True once the index is available."""
+        return self._index is not None
+
+    async def async_get_index(self) -> FundDirectoryIndex | None:
+        """Return the index, loading the directory on first use.
+
+        A stale index is returned as is while a fresh copy is downloaded in
+        the background.
+        """
+        if self._index is None:
+            async with self._lock:
+                if self._index is None:
+                    await self._async_load_cache()
+                if self._index is None and time.time() >= self._retry_at:
+                    await self._async_download()
+        if (
+            self._index is not None
+            and self._refresh_task is None
+            and time.time() - self._fetched >= DIRECTORY_TTL
+            and time.time() >= self._retry_at
+        ):
+            self._refresh_task = self.hass.async_create_background_task(
+                self._async_refresh(), f"{DOMAIN} directory refresh"
+            )
+        if self._release_unsub is not None:
+            self._release_unsub()
+        self._release_unsub = async_call_later(self.hass, DIRECTORY_IDLE, self._async_release)
+        return self._index
+
+    @callback
+    def _async_release(self, _now) -> None:
+        """Free the in-memory index; the disk cache stays."""
+        self._release_unsub = None
+        if self._refresh_task is None:
+            self._index = None
+            _LOGGER.debug("基金目录闲置，已释放内存索引")
+
+    async def _async_refresh(self) -> None:
+        """Replace a stale directory."""
+        try:
+            async with self._lock:
+                await self._async_download()
+        finally:
+            self._refresh_task = None
+
+    async def async_search(self, query: str) -> list[FundInfo]:
+        """Search the directory; empty if it cannot be loaded."""
+        if (index := await self.async_get_index()) is None:
+            return []
+        return index.search(query)
+
+    async def async_lookup(self, fund_code: str) -> FundInfo | None:
+        """Return a fund by code, or None if unknown or unavailable."""
+        if (index := await self.async_get_index()) is None:
+            return None
+        return index.get(fund_code)
+
+    async def _async_load_cache(self) -> None:
+        """Build the index from the copy in ``.storage``."""
+        if (data := await self._store.async_load()) is None:
+            return
+        try:
+            self._index = await self.hass.async_add_executor_job(
+                _build_index, data["text"]
+            )
+        except (KeyError, ValueError) as err:
+            _LOGGER.warning("本地基金目录缓存无效: %s", err)
+            return
+        self._fetched = data.get("fetched", 0)
+        _LOGGER.debug("已从缓存加载基金目录，共 %s 只基金", len(self._index))
+
+    async def _async_download(self) -> None:
+        """Download the directory, index it and cache it on disk."""
+        try:
+            text = (await self._async_fetch_text()).lstrip("\ufeff")
+            index = await self.hass.async_add_executor_job(_build_index, text)
+        except Exception as err:
+            _LOGGER.warning("下载基金目录失败: %s", err)
+            # 推迟下次重试，避免每次搜索都重新下载；期间继续使用本地缓存
+            self._retry_at = time.time() + DIRECTORY_RETRY
+            return
+
+        self._index = index
+        self._fetched = time.time()
+        # 仅保存原始文本，单个字符串在存储文件中不会被逐项展开
+        await self._store.async_save({"fetched": self._fetched, "text": text})
+        _LOGGER.debug("已下载基金目录，共 %s 只基金", len(index))
+
+    async def _async_fetch_text(self) -> str:
+        """Return the directory text, through the fund client when there is one."""
+        # 共享连接池受全局限速并可录制；添加第一只基金之前还没有连接池
+        if (client := self.hass.data.get(DOMAIN, {}).get(DATA_CLIENT)) is not None:
+            return await client.async_get_text(
+                FUNDCODE_SEARCH_URL, timeout=DIRECTORY_TIMEOUT
+            )
+        session = async_get_clientsession(self.hass)
+        async with session.get(
+            FUNDCODE_SEARCH_URL,
+            headers=HTTP_HEADERS,
+            timeout=aiohttp.ClientTimeout(total=DIRECTORY_TIMEOUT),
+        ) as response:
+            if response.status != 200:
+                raise Exception(f"HTTP {response.status}")
+            return await response.text(encoding="utf-8")
+
+
+def _build_index(text: str) -> FundDirectoryIndex:
+    """Parse and index the directory text (blocking)."""
+    return FundDirectoryIndex(parse_fundcode_search(text))
+
+
+@callback
+def async_get_directory(hass: HomeAssistant) -> FundDirectory:
+    """Return the shared fund directory, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (directory := domain_data.get(DATA_DIRECTORY)) is None:
+        directory = domain_data[DATA_DIRECTORY] = FundDirectory(hass)
+    return directory
@@ -0,0 +1,166 @@
+"""Per-source health tracking and circuit breaking for Daily Fund integration."""
+from __future__ import annotations
+
+import logging
+from time import monotonic
+from typing import Any
+
+from .const import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_OPEN_SECONDS,
+    CIRCUIT_MAX_OPEN_SECONDS,
+    SOURCE_PRIOR_LATENCY,
+    SOURCE_STATS_TTL,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+# 指数加权平均的平滑系数
+EWMA_ALPHA = 0.2
+
+
+class SourceUnavailable(Exception):
+    """Raised when a source's circuit is open."""
+
+
+class SourceHealth:
+    """Circuit breaker and EWMA statistics for one upstream source.
+
+    After ``CIRCUIT_FAILURE_THRESHOLD`` consecutive failures the circuit
+    opens and calls fail immediately. Once the open period ends a single
+    half-open probe is let through; success closes the circuit, failure
+    reopens it for twice as long.
+    """
+
+    def __init__(self, name: str) -> None:
+        """Initialize."""
+        self.name = name
+        self.state = STATE_CLOSED
+        self.consecutive_failures = 0
+        self.success_rate = 1.0
+        self.latency = SOURCE_PRIOR_LATENCY
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self._open_seconds = CIRCUIT_OPEN_SECONDS
+        self._retry_at = 0.0
+        self._sampled_at = 0.0
+
+    @property
+    def available(self) -> bool:
+        """Return True if a call would currently be let through."""
+        if self.state == STATE_CLOSED:
+            return True
+        return self.state == STATE_OPEN and monotonic() >= self._retry_at
+
+    @property
+    def score(self) -> float:
+        """Return the expected cost of a call; lower is better."""
+        # 长时间未被使用的源回到先验值，让它有机会重新成为首选
+        if monotonic() - self._sampled_at > SOURCE_STATS_TTL:
+            return SOURCE_PRIOR_LATENCY
+        return self.latency / max(self.success_rate, 0.05)
+
+    def allow(self) -> bool:
+        """Return True if a call may proceed, claiming the probe if half-open."""
+        if self.state == STATE_CLOSED:
+            return True
+        if self.state == STATE_OPEN and monotonic() >= self._retry_at:
+            self.state = STATE_HALF_OPEN
+            _LOGGER.debug("数据源 %s 半开，放行一次探测请求", self.name)
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self, latency: float) -> None:
+        """Record a successful call."""
+        self.successes += 1
+        self._sampled_at = monotonic()
+        self.consecutive_failures = 0
+        self.success_rate += EWMA_ALPHA * (1 - self.success_rate)
+        self.latency += EWMA_ALPHA * (latency - self.latency)
+        if self.state != STATE_CLOSED:
+            _LOGGER.info("数据源 %s 已恢复", self.name)
+            self.state = STATE_CLOSED
+            self._open_seconds = CIRCUIT_OPEN_SECONDS
+
+    def record_failure(self) -> None:
+        """Record a failed call."""
+        self.failures += 1
+        self._sampled_at = monotonic()
+        self.consecutive_failures += 1
+        self.success_rate -= EWMA_ALPHA * self.success_rate
+
+        if self.state == STATE_HALF_OPEN:
+            self._open_seconds = min(self._open_seconds * 2, CIRCUIT_MAX_OPEN_SECONDS)
+            self._open()
+        elif (
+            self.state == STATE_CLOSED
+            and self.consecutive_failures >= CIRCUIT_FAILURE_THRESHOLD
+        ):
+            self._open()
+
+    def record_abandoned(self) -> None:
+        """Release a half-open probe whose call was cancelled."""
+        if self.state == STATE_HALF_OPEN:
+            self.state = STATE_OPEN
+
+    def _open(self) -> None:
+        """Open the circuit."""
+        self.state = STATE_OPEN
+        self._retry_at = monotonic() + self._open_seconds
+        _LOGGER.warning(
+            "数据源 %s 连续失败 %s 次，熔断 %s 秒",
+            self.name,
+            self.consecutive_failures,
+            self._open_seconds,
+        )
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return counters for diagnostics."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "success_rate": round(self.success_rate, 3),
+            "latency": round(self.latency, 3),
+            "successes": self.successes,
+            "failures": self.failures,
+            "rejected": self.rejected,
+        }
+
+
+class SourceHealthRegistry:
+    """Health of every upstream source, shared by all funds."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self._sources: dict[str, SourceHealth] = {}
+
+    def get(self, name: str) -> SourceHealth:
+        """Return the health of a source."""
+        if name not in self._sources:
+            self._sources[name] = SourceHealth(name)
+        return self._sources[name]
+
+    def rank(self, names: list[str]) -> list[str]:
+        """Order interchangeable sources by measured cost.
+
+        Each later position in the default order doubles a source's score,
+        so a fallback is only promoted once it is clearly better.
+        """
+        def key(item: tuple[int, str]) -> tuple[bool, float]:
+            index, name = item
+            health = self.get(name)
+            return (not health.available, health.score * 2**index)
+
+        return [name for _, name in sorted(enumerate(names), key=key)]
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return statistics of every source."""
+        return {name: health.stats for name, health in self._sources.items()}
@@ -0,0 +1,344 @@
+"""Local long-term NAV history store for Daily Fund integration."""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from itertools import accumulate
+from time import monotonic
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    HISTORY_STORAGE_KEY,
+    HISTORY_STORAGE_VERSION,
+    HISTORY_PAGE_SIZE,
+    HISTORY_MAX_CONCURRENCY,
+    HISTORY_NAV_SCALE,
+    SOURCE_HISTORY,
+)
+from .analytics import FundAnalytics
+from .client import FundHttpClient
+from .health import SourceHealthRegistry, SourceUnavailable
+
+_LOGGER = logging.getLogger(__name__)
+
+LSJZ_URL = "https://api.fund.eastmoney.com/f10/lsjz"
+
+
+class FundHistory:
+    """Array-backed NAV series of one fund, sorted by date.
+
+    Dates are kept as day ordinals and NAVs as doubles in flat arrays, so
+    a date range is found with two bisections and sliced without building
+    per-row objects. On disk every column is a delta-encoded integer list
+    joined into one string (``.storage`` files are pretty-printed, which
+    would otherwise put every number on its own line); consecutive days,
+    NAV ticks and the accumulated-minus-unit offset, which only moves on
+    dividends, then take one to three characters each.
+    """
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.days = array("l")
+        self.nav = array("d")
+        self.acc_nav = array("d")
+
+    def __len__(self) -> int:
+        """Return the number of stored rows."""
+        return len(self.days)
+
+    @property
+    def first_date(self) -> date | None:
+        """Return the oldest stored date."""
+        return date.fromordinal(self.days[0]) if self.days else None
+
+    @property
+    def last_date(self) -> date | None:
+        """Return the newest stored date."""
+        return date.fromordinal(self.days[-1]) if self.days else None
+
+    def extend(self, rows: list[tuple[date, float, float]]) -> int:
+        """Append rows newer than the last stored date; return how many."""
+        last = self.days[-1] if self.days else 0
+        added = 0
+        for day, nav, acc_nav in sorted(rows):
+            ordinal = day.toordinal()
+            if ordinal <= last:
+                continue
+            self.days.append(ordinal)
+            self.nav.append(nav)
+            self.acc_nav.append(acc_nav)
+            last = ordinal
+            added += 1
+        return added
+
+    def index_range(
+        self, start: date | None = None, end: date | None = None
+    ) -> tuple[int, int]:
+        """Return the slice bounds of rows between start and end inclusive."""
+        lo = bisect_left(self.days, start.toordinal()) if start else 0
+        hi = bisect_right(self.days, end.toordinal()) if end else len(self.days)
+        return lo, max(lo, hi)
+
+    def between(
+        self, start: date | None = None, end: date | None = None
+    ) -> list[tuple[date, float, float]]:
+        """Return (date, NAV, accumulated NAV) rows between two dates."""
+        lo, hi = self.index_range(start, end)
+        return [
+            (date.fromordinal(day), nav, acc_nav)
+            for day, nav, acc_nav in zip(
+                self.days[lo:hi], self.nav[lo:hi], self.acc_nav[lo:hi]
+            )
+        ]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the delta-encoded columns for storage."""
+        nav = [round(value * HISTORY_NAV_SCALE) for value in self.nav]
+        offset = [
+            round(acc_nav * HISTORY_NAV_SCALE) - scaled
+            for acc_nav, scaled in zip(self.acc_nav, nav)
+        ]
+        return {
+            "scale": HISTORY_NAV_SCALE,
+            "days": _delta_encode(self.days),
+            "nav": _delta_encode(nav),
+            "acc_offset": _delta_encode(offset),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> FundHistory:
+        """Rebuild a history from stored columns."""
+        history = cls()
+        scale = data.get("scale", HISTORY_NAV_SCALE)
+        nav = list(accumulate(_split(data.get("nav", ""))))
+        offset = accumulate(_split(data.get("acc_offset", "")))
+        history.days = array("l", accumulate(_split(data.get("days", ""))))
+        history.nav = array("d", (value / scale for value in nav))
+        history.acc_nav = array(
+            "d", ((value + delta) / scale for value, delta in zip(nav, offset))
+        )
+        return history
+
+
+def _delta_encode(values) -> str:
+    """Return the first value and successive differences as one string."""
+    previous = 0
+    deltas = []
+    for value in values:
+        deltas.append(value - previous)
+        previous = value
+    return ",".join(map(str, deltas))
+
+
+def _split(text: str) -> list[int]:
+    """Return the integers of a delta-encoded column."""
+    return [int(value) for value in text.split(",")] if text else []
+
+
+def parse_lsjz_rows(items: list[dict[str, Any]]) -> list[tuple[date, float, float]]:
+    """Convert f10/lsjz rows into (date, NAV, accumulated NAV) tuples."""
+    rows = []
+    for item in items:
+        try:
+            day = date.fromisoformat(item["FSRQ"])
+            nav = float(item["DWJZ"])
+        except (KeyError, TypeError, ValueError):
+            # 货币基金等没有单位净值的行直接跳过
+            continue
+        if nav <= 0:
+            continue
+        try:
+            acc_nav = float(item.get("LJJZ") or nav)
+        except ValueError:
+            acc_nav = nav
+        if not acc_nav > 0:
+            # 累计净值为0、负数或NaN时无法计算收益率与回撤，改用单位净值
+            acc_nav = nav
+        rows.append((day, nav, acc_nav))
+    return rows
+
+
+class FundHistoryManager:
+    """Backfill, extend and persist the NAV history of every fund.
+
+    Each fund has its own file under ``.storage`` so a sync only rewrites
+    the fund that changed. The first sync pages through ``f10/lsjz`` once,
+    with page requests of all funds sharing ``HISTORY_MAX_CONCURRENCY``
+    slots and only the rate limiter's spare capacity, so a backfill never
+    delays live polls; later syncs only ask for rows after the last stored
+    date. Every page counts towards the history source's circuit breaker.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        client: FundHttpClient,
+        health: SourceHealthRegistry,
+    ) -> None:
+        """Initialize."""
+        self.hass = hass
+        self.client = client
+        self.health = health
+        self._semaphore = asyncio.Semaphore(HISTORY_MAX_CONCURRENCY)
+        self._stores: dict[str, Store[dict[str, Any]]] = {}
+        self._histories: dict[str, FundHistory] = {}
+        self._analytics: dict[str, FundAnalytics] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    @callback
+    def async_peek(self, fund_code: str) -> FundHistory | None:
+        """Return a fund's history if it is already loaded."""
+        return self._histories.get(fund_code)
+
+    @callback
+    def async_peek_analytics(self, fund_code: str) -> FundAnalytics | None:
+        """Return a fund's history statistics if its history is loaded."""
+        return self._analytics.get(fund_code)
+
+    async def async_get(self, fund_code: str) -> FundHistory:
+        """Return a fund's history, loading it from disk on first use."""
+        if (history := self._histories.get(fund_code)) is not None:
+            return history
+        async with self._lock(fund_code):
+            return await self._async_load(fund_code)
+
+    async def async_sync(self, fund_code: str) -> int:
+        """Backfill or extend a fund's history; return the new row count."""
+        async with self._lock(fund_code):
+            history = await self._async_load(fund_code)
+            # 熔断中不开始同步；是否放行由每页请求经熔断器判断
+            if not self.health.get(SOURCE_HISTORY).available:
+                return 0
+
+            if last := history.last_date:
+                start = (last + timedelta(days=1)).isoformat()
+                rows = await self._async_fetch_rows(fund_code, start)
+            else:
+                rows = await self._async_backfill(fund_code)
+
+            if not (added := history.extend(rows)):
+                return 0
+            self._analytics[fund_code].update()
+            await self._store(fund_code).async_save(history.as_dict())
+            _LOGGER.debug(
+                "基金 %s 历史净值新增 %s 条，共 %s 条（%s 至 %s）",
+                fund_code,
+                added,
+                len(history),
+                history.first_date,
+                history.last_date,
+            )
+            return added
+
+    @callback
+    def async_unload(self, fund_code: str) -> None:
+        """Drop a fund's history from memory."""
+        self._histories.pop(fund_code, None)
+        self._analytics.pop(fund_code, None)
+        self._stores.pop(fund_code, None)
+        self._locks.pop(fund_code, None)
+
+    def _lock(self, fund_code: str) -> asyncio.Lock:
+        """Return the per-fund lock."""
+        return self._locks.setdefault(fund_code, asyncio.Lock())
+
+    def _store(self, fund_code: str) -> Store[dict[str, Any]]:
+        """Return the storage file of a fund."""
+        if (store := self._stores.get(fund_code)) is None:
+            store = self._stores[fund_code] = _history_store(self.hass, fund_code)
+        return store
+
+    async def _async_load(self, fund_code: str) -> FundHistory:
+        """Load a fund's history (caller holds the fund lock)."""
+        if (history := self._histories.get(fund_code)) is None:
+            data = await self._store(fund_code).async_load()
+            history = FundHistory.from_dict(data) if data else FundHistory()
+            self._histories[fund_code] = history
+            self._analytics[fund_code] = FundAnalytics(history)
+        return history
+
+    async def _async_backfill(self, fund_code: str) -> list[tuple[date, float, float]]:
+        """Download the complete history, fetching pages concurrently."""
+        rows, total, page_size = await self._async_fetch_page(fund_code, 1)
+        if not rows or total <= page_size:
+            return rows
+
+        # 页大小以接口实际返回为准
+        pages = math.ceil(total / page_size)
+        _LOGGER.debug("基金 %s 回填历史净值：%s 条，%s 页", fund_code, total, pages)
+        results = await asyncio.gather(
+            *(self._async_fetch_page(fund_code, page) for page in range(2, pages + 1)),
+            return_exceptions=True,
+        )
+        for result in results:
+            # 任一页失败时整体放弃，下次同步重新回填
+            if isinstance(result, BaseException):
+                raise result
+            rows.extend(result[0])
+        return rows
+
+    async def _async_fetch_rows(
+        self, fund_code: str, start_date: str
+    ) -> list[tuple[date, float, float]]:
+        """Fetch every row published on or after start_date."""
+        rows: list[tuple[date, float, float]] = []
+        page = 1
+        while True:
+            page_rows, total, page_size = await self._async_fetch_page(
+                fund_code, page, start_date
+            )
+            rows.extend(page_rows)
+            if not page_size or page * page_size >= total:
+                return rows
+            page += 1
+
+    async def _async_fetch_page(
+        self, fund_code: str, page: int, start_date: str = ""
+    ) -> tuple[list[tuple[date, float, float]], int, int]:
+        """Fetch one page; return (rows, total count, rows on the page)."""
+        params = {
+            "fundCode": fund_code,
+            "pageIndex": page,
+            "pageSize": HISTORY_PAGE_SIZE,
+            "startDate": start_date,
+            "endDate": "",
+        }
+        async with self._semaphore:
+            health = self.health.get(SOURCE_HISTORY)
+            if not health.allow():
+                raise SourceUnavailable(f"{SOURCE_HISTORY} 熔断中")
+            started = monotonic()
+            try:
+                text = await self.client.async_get_text(
+                    LSJZ_URL, params=params, background=True
+                )
+                data = json.loads(text)
+                items = (data.get("Data") or {}).get("LSJZList") or []
+                total = int(data.get("TotalCount") or 0)
+                rows = parse_lsjz_rows(items)
+            except asyncio.CancelledError:
+                health.record_abandoned()
+                raise
+            except Exception:
+                health.record_failure()
+                raise
+            health.record_success(monotonic() - started)
+        return rows, total, len(items)
+
+
+def _history_store(hass: HomeAssistant, fund_code: str) -> Store[dict[str, Any]]:
+    """Return the Store holding one fund's history."""
+    return Store(hass, HISTORY_STORAGE_VERSION, f"{HISTORY_STORAGE_KEY}.{fund_code}")
+
+
+async def async_remove_history(hass: HomeAssistant, fund_code: str) -> None:
+    """Delete a fund's history file."""
+    await _history_store(hass, fund_code).async_remove()
@@ -0,0 +1,119 @@
+"""Intraday estimate ring buffer for Daily Fund integration."""
+from __future__ import annotations
+
+from array import array
+from datetime import date, datetime
+from typing import Any
+
+from .const import INTRADAY_MAX_GAP
+
+
+class IntradaySeries:
+    """Keep one session's estimate ticks in fixed-size arrays.
+
+    Timestamps, estimated NAVs and estimated growth rates live in three
+    preallocated arrays used as a ring buffer, so recording a tick never
+    allocates. The series resets on the first tick of a new session. The
+    open, high, low, tick mean and time-weighted average are updated as
+    each tick arrives and cover the whole session even if the buffer wraps.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        """Initialize."""
+        self.capacity = capacity
+        self._times = array("q", [0]) * capacity
+        self._values = array("d", [0.0]) * capacity
+        self._rates = array("d", [0.0]) * capacity
+        self.day: date | None = None
+        self.reset(None)
+
+    def __len__(self) -> int:
+        """Return the number of buffered ticks."""
+        return self._count
+
+    def reset(self, day: date | None) -> None:
+        """Start a new session."""
+        self.day = day
+        self._start = 0
+        self._count = 0
+        self.ticks = 0
+        self.open: float | None = None
+        self.high: float | None = None
+        self.low: float | None = None
+        self.last: float | None = None
+        self._last_time = 0
+        self._sum = 0.0
+        self._weighted_sum = 0.0
+        self._weighted_time = 0
+
+    def add(self, moment: datetime, value: float, rate: float) -> bool:
+        """Record an estimate tick; return False if it is not newer than the last."""
+        timestamp = int(moment.timestamp())
+        if moment.date() != self.day:
+            self.reset(moment.date())
+        elif self.ticks and timestamp <= self._last_time:
+            return False
+
+        if self.ticks:
+            # 时间加权均值：午间休市等长间隔只按上限计入
+            elapsed = min(timestamp - self._last_time, INTRADAY_MAX_GAP)
+            self._weighted_sum += self.last * elapsed
+            self._weighted_time += elapsed
+            self.high = max(self.high, value)
+            self.low = min(self.low, value)
+        else:
+            self.open = self.high = self.low = value
+
+        index = (self._start + self._count) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+        else:
+            self._start = (self._start + 1) % self.capacity
+        self._times[index] = timestamp
+        self._values[index] = value
+        self._rates[index] = rate
+
+        self.ticks += 1
+        self.last = value
+        self._last_time = timestamp
+        self._sum += value
+        return True
+
+    @property
+    def average(self) -> float | None:
+        """Return the mean of all ticks of the session."""
+        return self._sum / self.ticks if self.ticks else None
+
+    @property
+    def time_weighted_average(self) -> float | None:
+        """Return the estimate averaged over the time each value was held."""
+        if not self._weighted_time:
+            return self.last
+        return self._weighted_sum / self._weighted_time
+
+    def _ordered(self, column: array) -> list:
+        """Return a column oldest first."""
+        end = self._start + self._count
+        if end <= self.capacity:
+            return column[self._start:end].tolist()
+        return column[self._start:].tolist() + column[:end - self.capacity].tolist()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the session curve as columns plus its statistics."""
+        return {
+            "date": self.day.isoformat() if self.day else None,
+            "time": self._ordered(self._times),
+            "value": self._ordered(self._values),
+            "rate": self._ordered(self._rates),
+            "open": self.open,
+            "high": self.high,
+            "low": self.low,
+            "last": self.last,
+            "average": _round(self.average),
+            "time_weighted_average": _round(self.time_weighted_average),
+        }
+
+
+def _round(value: float | None) -> float | None:
+    """Round an average to NAV precision."""
+    return None if value is None else round(value, 4)
@@ -0,0 +1,299 @@
+"""Transaction ledger and cost basis tracking for Daily Fund integration."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from typing import Any
+from uuid import uuid4
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DOMAIN,
+    DATA_LEDGER,
+    LEDGER_STORAGE_KEY,
+    LEDGER_STORAGE_VERSION,
+    COST_METHOD_FIFO,
+    COST_METHOD_AVERAGE,
+    TRANSACTION_BUY,
+    TRANSACTION_SELL,
+    TRANSACTION_DIVIDEND,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# 份额按两位小数记账，低于该值视为已清仓
+SHARE_EPSILON = 0.005
+
+
+class Position:
+    """Holding, cost basis and realized profit built from transactions.
+
+    ``apply`` folds one transaction in: a buy adds a lot, a sell removes
+    cost by FIFO lots or at the average cost and books the difference as
+    realized profit, a dividend is realized profit (and a zero-gain lot
+    when reinvested). Appending a transaction therefore never replays the
+    ledger; only backdated or removed entries do.
+    """
+
+    def __init__(self, method: str = COST_METHOD_FIFO) -> None:
+        """Initialize."""
+        self.method = method
+        self.shares = 0.0
+        self.cost = 0.0
+        self.realized = 0.0
+        self.dividends = 0.0
+        # 先进先出法的持仓批次: [份额, 单位成本]
+        self._lots: deque[list[float]] = deque()
+
+    @property
+    def average_cost(self) -> float:
+        """Return the cost per held share."""
+        return self.cost / self.shares if self.shares > SHARE_EPSILON else 0.0
+
+    def apply(self, transaction: dict[str, Any]) -> None:
+        """Fold one transaction into the position."""
+        kind = transaction["type"]
+        shares = float(transaction.get("shares") or 0)
+        amount = float(transaction.get("amount") or 0)
+        fee = float(transaction.get("fee") or 0)
+
+        if kind == TRANSACTION_BUY:
+            # 买入金额含手续费，全部计入成本
+            self._add_lot(shares, amount)
+        elif kind == TRANSACTION_SELL:
+            if shares > self.shares + SHARE_EPSILON:
+                raise HomeAssistantError(
+                    f"卖出份额 {shares} 超过持有份额 {round(self.shares, 2)}"
+                )
+            removed = self._remove_shares(shares)
+            self.realized += amount - fee - removed
+        elif kind == TRANSACTION_DIVIDEND:
+            self.dividends += amount
+            self.realized += amount
+            if shares:
+                # 红利再投资：分红金额作为新份额的成本
+                self._add_lot(shares, amount)
+        else:
+            raise HomeAssistantError(f"未知交易类型: {kind}")
+
+    def _add_lot(self, shares: float, cost: float) -> None:
+        """Add bought shares at a total cost."""
+        if shares <= 0:
+            raise HomeAssistantError("买入份额必须大于0")
+        self.shares += shares
+        self.cost += cost
+        self._lots.append([shares, cost / shares])
+
+    def _remove_shares(self, shares: float) -> float:
+        """Take shares out of the position; return the cost removed."""
+        if self.method == COST_METHOD_AVERAGE:
+            removed = self.average_cost * shares
+        else:
+            removed = 0.0
+            remaining = shares
+            while remaining > SHARE_EPSILON and self._lots:
+                lot = self._lots[0]
+                taken = min(lot[0], remaining)
+                removed += taken * lot[1]
+                lot[0] -= taken
+                remaining -= taken
+                if lot[0] <= SHARE_EPSILON:
+                    self._lots.popleft()
+
+        self.shares -= shares
+        self.cost -= removed
+        if self.shares <= SHARE_EPSILON:
+            # 清仓后去掉浮点残差
+            self.shares = self.cost = 0.0
+            self._lots.clear()
+        elif self.method == COST_METHOD_AVERAGE:
+            self._lots = deque([[self.shares, self.average_cost]])
+        return removed
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the position rounded for display."""
+        return {
+            "method": self.method,
+            "shares": round(self.shares, 2),
+            "cost": round(self.cost, 2),
+            "average_cost": round(self.average_cost, 4),
+            "realized": round(self.realized, 2),
+            "dividends": round(self.dividends, 2),
+        }
+
+
+class FundLedger:
+    """Persist every fund's transactions and keep their positions current.
+
+    All funds share one file under ``.storage``; each change is saved
+    right away since transactions cannot be fetched again. A fund whose
+    stored transactions cannot be replayed has no position and takes no
+    new transactions until the offending ones are removed.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, LEDGER_STORAGE_VERSION, LEDGER_STORAGE_KEY
+        )
+        self._funds: dict[str, dict[str, Any]] = {}
+        self._positions: dict[str, Position] = {}
+        # 无法重放的基金及原因
+        self._broken: dict[str, str] = {}
+
+    async def async_load(self) -> None:
+        """Load the ledger and replay it into positions."""
+        if (data := await self._store.async_load()) is not None:
+            self._funds = data.get("funds", {})
+        for fund_code in self._funds:
+            try:
+                self._replay(fund_code)
+            except HomeAssistantError as err:
+                self._broken[fund_code] = str(err)
+                _LOGGER.error("基金 %s 的交易记录无法重放: %s", fund_code, err)
+        _LOGGER.debug("已加载 %s 只基金的交易记录", len(self._funds))
+
+    @callback
+    def async_get_position(self, fund_code: str) -> Position | None:
+        """Return a fund's position, or None if it has no transactions."""
+        if not self._funds.get(fund_code, {}).get("transactions"):
+            return None
+        return self._positions.get(fund_code)
+
+    @callback
+    def async_get_transactions(self, fund_code: str) -> list[dict[str, Any]]:
+        """Return a fund's transactions in date order."""
+        return list(self._funds.get(fund_code, {}).get("transactions", []))
+
+    async def async_add_transaction(
+        self,
+        fund_code: str,
+        transaction: dict[str, Any],
+        opening: dict[str, Any] | None = None,
+    ) -> Position:
+        """Record a transaction and update the fund's position.
+
+        ``opening`` seeds a new ledger with the holding configured for the
+        fund so that earlier purchases are not lost.
+        """
+        self._check_replayable(fund_code)
+        fund = self._funds.setdefault(
+            fund_code, {"method": COST_METHOD_FIFO, "transactions": []}
+        )
+        transactions = fund["transactions"]
+        if not transactions and opening:
+            transactions.append({"id": uuid4().hex, **opening})
+            self._replay(fund_code)
+
+        transaction = {"id": uuid4().hex, **transaction}
+        position = self._positions.setdefault(fund_code, Position(fund["method"]))
+        if transactions and _sort_key(transaction) < _sort_key(transactions[-1]):
+            # 补记更早的交易需要按日期重放
+            transactions.append(transaction)
+            transactions.sort(key=_sort_key)
+            try:
+                self._replay(fund_code)
+            except HomeAssistantError:
+                transactions.remove(transaction)
+                self._replay(fund_code)
+                raise
+        else:
+            position.apply(transaction)
+            transactions.append(transaction)
+
+        await self._store.async_save(self._data_to_save())
+        return self._positions[fund_code]
+
+    async def async_remove_transaction(
+        self, fund_code: str, transaction_id: str
+    ) -> Position | None:
+        """Delete a transaction and rebuild the fund's position."""
+        transactions = self._funds.get(fund_code, {}).get("transactions", [])
+        for index, transaction in enumerate(transactions):
+            if transaction["id"] == transaction_id:
+                break
+        else:
+            raise HomeAssistantError(f"未找到交易记录 {transaction_id}")
+
+        del transactions[index]
+        if fund_code in self._broken:
+            # 删除出错的记录后重新尝试重放，仍失败时保持不可用
+            try:
+                self._replay(fund_code)
+            except HomeAssistantError as err:
+                self._broken[fund_code] = str(err)
+            else:
+                del self._broken[fund_code]
+        else:
+            try:
+                self._replay(fund_code)
+            except HomeAssistantError:
+                transactions.insert(index, transaction)
+                self._replay(fund_code)
+                raise
+        await self._store.async_save(self._data_to_save())
+        return self.async_get_position(fund_code)
+
+    async def async_set_cost_method(
+        self, fund_code: str, method: str
+    ) -> Position | None:
+        """Switch a fund between FIFO and average cost."""
+        self._check_replayable(fund_code)
+        fund = self._funds.setdefault(
+            fund_code, {"method": method, "transactions": []}
+        )
+        fund["method"] = method
+        self._replay(fund_code)
+        await self._store.async_save(self._data_to_save())
+        return self.async_get_position(fund_code)
+
+    async def async_remove_fund(self, fund_code: str) -> None:
+        """Forget a fund's transactions."""
+        if self._funds.pop(fund_code, None) is not None:
+            self._positions.pop(fund_code, None)
+            self._broken.pop(fund_code, None)
+            await self._store.async_save(self._data_to_save())
+
+    def _check_replayable(self, fund_code: str) -> None:
+        """Refuse changes to a fund whose ledger could not be replayed."""
+        if (reason := self._broken.get(fund_code)) is not None:
+            raise ServiceValidationError(
+                f"基金 {fund_code} 的交易记录无法重放（{reason}），请先删除出错的记录"
+            )
+
+    def _replay(self, fund_code: str) -> None:
+        """Rebuild a fund's position from its whole ledger."""
+        fund = self._funds[fund_code]
+        position = Position(fund["method"])
+        for transaction in fund["transactions"]:
+            position.apply(transaction)
+        self._positions[fund_code] = position
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return data to store."""
+        return {"funds": self._funds}
+
+
+def _sort_key(transaction: dict[str, Any]) -> str:
+    """Order transactions by date; the opening holding comes first."""
+    return transaction.get("date") or ""
+
+
+async def async_get_ledger(hass: HomeAssistant) -> FundLedger:
+    """Return the shared ledger, loading it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_LEDGER in domain_data:
+        return domain_data[DATA_LEDGER]
+
+    lock: asyncio.Lock = domain_data.setdefault(f"{DATA_LEDGER}_lock", asyncio.Lock())
+    async with lock:
+        if DATA_LEDGER not in domain_data:
+            ledger = FundLedger(hass)
+            await ledger.async_load()
+            domain_data[DATA_LEDGER] = ledger
+    return domain_data[DATA_LEDGER]
@@ -0,0 +1,258 @@
+"""Refresh pipeline instrumentation for Daily Fund integration."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from bisect import bisect_left
+from collections import Counter
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    DATA_METRICS,
+    METRICS_BUCKETS,
+    METRICS_LOOP_PROBE_INTERVAL,
+    METRICS_LOOP_BLOCK_THRESHOLD,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# 计时项
+TIMING_REFRESH = "refresh"  # 协调器一次完整刷新
+TIMING_PROCESS = "process"  # 计算各项指标
+TIMING_STATE_WRITE = "state_write"  # 通知实体并写入状态
+TIMING_LOOP_LAG = "loop_lag"  # 事件循环延迟探测
+
+# 计数项
+COUNT_ENGINE_REUSE = "engine_result_reuse"  # 复用引擎上一轮的结果
+COUNT_BATCH_HIT = "batch_estimate_hit"  # 估算来自批量接口
+COUNT_HEDGE = "hedge"  # 对冲请求了备用估算源
+COUNT_NAV_CACHE_HIT = "nav_cache_hit"  # 净值直接使用缓存
+COUNT_NAV_CACHE_FALLBACK = "nav_cache_fallback"  # 净值请求失败后沿用缓存
+COUNT_NAV_AS_ESTIMATE = "nav_as_estimate"  # 无估算，以净值代替
+COUNT_ESTIMATE_ONLY = "estimate_only"  # 历史净值失败，只用估算
+COUNT_DEADLINE = "deadline_exceeded"  # 超过刷新时限
+COUNT_NOT_MODIFIED = "response_unchanged"  # 响应未变(304或内容相同)，跳过解析
+COUNT_PROCESS_SKIPPED = "process_skipped"  # 原始数据未变，跳过指标计算
+
+
+class Histogram:
+    """Fixed-bucket histogram of durations in seconds."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.counts = [0] * (len(METRICS_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float) -> None:
+        """Add one sample."""
+        self.counts[bisect_left(METRICS_BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percent: float) -> float | None:
+        """Return the upper bound of the bucket holding a percentile."""
+        if not self.count:
+            return None
+        rank = self.count * percent / 100
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                break
+        # 落在最后一个桶或超过最大值时以最大值为准
+        if index == len(METRICS_BUCKETS):
+            return self.max
+        return min(METRICS_BUCKETS[index], self.max)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the summary and buckets in milliseconds."""
+        return {
+            "count": self.count,
+            "mean_ms": _ms(self.total / self.count) if self.count else None,
+            "p50_ms": _ms(self.percentile(50)),
+            "p90_ms": _ms(self.percentile(90)),
+            "p99_ms": _ms(self.percentile(99)),
+            "max_ms": _ms(self.max),
+            "buckets": {
+                **{
+                    f"le_{bound * 1000:g}ms": count
+                    for bound, count in zip(METRICS_BUCKETS, self.counts)
+                },
+                "inf": self.counts[-1],
+            },
+        }
+
+
+class SourceMetrics:
+    """Request, size and parse statistics of one upstream source.
+
+    Latency covers the whole call including parsing, which is also
+    recorded on its own; sizes are in characters of the decoded body.
+    """
+
+    __slots__ = ("requests", "failures", "chars", "latency", "parse")
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.requests = 0
+        self.failures = 0
+        self.chars = 0
+        self.latency = Histogram()
+        self.parse = Histogram()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the statistics."""
+        parsed = self.parse.count
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "response_chars": self.chars,
+            "mean_response_chars": round(self.chars / parsed) if parsed else None,
+            "latency": self.latency.as_dict(),
+            "parse": self.parse.as_dict(),
+        }
+
+
+class RefreshMetrics:
+    """Domain-wide timings and counters of the refresh pipeline.
+
+    Collection is off until something turns it on (the metrics sensor or
+    the ``set_metrics`` service); until then every ``record_*`` call
+    returns after a single attribute check. While on, a loop probe also
+    measures how late the event loop runs a short timer.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize."""
+        self.hass = hass
+        self.enabled = False
+        self._holders: set[str] = set()
+        self._probe: asyncio.TimerHandle | None = None
+        self._probe_due = 0.0
+        self.reset()
+
+    @callback
+    def reset(self) -> None:
+        """Forget every sample."""
+        self.since = dt_util.utcnow()
+        self.sources: dict[str, SourceMetrics] = {}
+        self.timings: dict[str, Histogram] = {}
+        self.counters: Counter[str] = Counter()
+        self.loop_blocked = 0.0
+
+    @callback
+    def async_enable(self, holder: str) -> None:
+        """Turn collection on on behalf of holder."""
+        self._holders.add(holder)
+        if self.enabled:
+            return
+        self.enabled = True
+        self.reset()
+        self._schedule_probe()
+        _LOGGER.debug("已开启刷新性能统计")
+
+    @callback
+    def async_disable(self, holder: str) -> None:
+        """Release holder's claim; collection stops once nobody holds it."""
+        self._holders.discard(holder)
+        if self._holders or not self.enabled:
+            return
+        self.enabled = False
+        if self._probe is not None:
+            self._probe.cancel()
+            self._probe = None
+        _LOGGER.debug("已关闭刷新性能统计")
+
+    def record_request(self, source: str, latency: float, success: bool) -> None:
+        """Record one upstream request and its latency."""
+        if not self.enabled:
+            return
+        metrics = self._source(source)
+        metrics.requests += 1
+        if not success:
+            metrics.failures += 1
+        metrics.latency.add(latency)
+
+    def record_payload(self, source: str, chars: int, parse_time: float) -> None:
+        """Record the size of a response and the time spent parsing it."""
+        if not self.enabled:
+            return
+        metrics = self._source(source)
+        metrics.chars += chars
+        metrics.parse.add(parse_time)
+
+    def record_time(self, name: str, seconds: float) -> None:
+        """Record the duration of a pipeline stage."""
+        if not self.enabled:
+            return
+        if (histogram := self.timings.get(name)) is None:
+            histogram = self.timings[name] = Histogram()
+        histogram.add(seconds)
+
+    def count(self, name: str) -> None:
+        """Increment a counter."""
+        if self.enabled:
+            self.counters[name] += 1
+
+    def _source(self, source: str) -> SourceMetrics:
+        """Return the statistics of a source."""
+        if (metrics := self.sources.get(source)) is None:
+            metrics = self.sources[source] = SourceMetrics()
+        return metrics
+
+    def _schedule_probe(self) -> None:
+        """Arm the next loop probe."""
+        loop = self.hass.loop
+        self._probe_due = loop.time() + METRICS_LOOP_PROBE_INTERVAL
+        self._probe = loop.call_at(self._probe_due, self._run_probe)
+
+    def _run_probe(self) -> None:
+        """Measure how late the timer fired and re-arm it."""
+        lag = max(self.hass.loop.time() - self._probe_due, 0.0)
+        self.record_time(TIMING_LOOP_LAG, lag)
+        if lag > METRICS_LOOP_BLOCK_THRESHOLD:
+            self.loop_blocked += lag
+        if self.enabled:
+            self._schedule_probe()
+
+    def timing(self, name: str) -> Histogram | None:
+        """Return the histogram of a pipeline stage."""
+        return self.timings.get(name)
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return everything collected, for diagnostics."""
+        if not self.enabled:
+            return {"enabled": False}
+        return {
+            "enabled": True,
+            "since": self.since.isoformat(),
+            "loop_blocked_ms": _ms(self.loop_blocked),
+            "counters": dict(self.counters),
+            "timings": {name: hist.as_dict() for name, hist in self.timings.items()},
+            "sources": {name: src.as_dict() for name, src in self.sources.items()},
+        }
+
+
+def _ms(seconds: float | None) -> float | None:
+    """Convert seconds to rounded milliseconds."""
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+@callback
+def async_get_metrics(hass: HomeAssistant) -> RefreshMetrics:
+    """Return the shared metrics, creating them on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (metrics := domain_data.get(DATA_METRICS)) is None:
+        metrics = domain_data[DATA_METRICS] = RefreshMetrics(hass)
+    return metrics
@@ -0,0 +1,119 @@
+"""Single-pass extractor for the pingzhongdata.js payload."""
+from __future__ import annotations
+
+import re
+from datetime import datetime, timedelta, timezone
+
+# 需要的标量变量，一次扫描全部提取
+SCALAR_KEYS = (
+    "fS_name",
+    "fS_code",
+    "fS_dwjz",
+    "fS_jzrq",
+    "fS_gsz",
+    "fS_gszzl",
+    "fS_gztime",
+)
+
+_SCALAR_RE = re.compile(
+    r"\b(" + "|".join(SCALAR_KEYS) + r")\s*=\s*"
+    r"(?:\"([^\"]*)\"|'([^']*)'|([^;\"']*);)"
+)
+
+# 单位净值走势数组，只需要最后两个点
+TREND_START = "Data_netWorthTrend"
+TREND_END = "];"
+_TREND_POINT_RE = re.compile(r'\{"x":(\d+),"y":([-\d.]+)')
+_TREND_TAIL = 512
+
+_CHINA_TZ = timezone(timedelta(hours=8))
+
+
+class PingzhongExtractor:
+    """Collect a pingzhongdata.js body until everything needed has arrived.
+
+    ``feed`` only does cheap substring searches per chunk and reports when
+    the NAV trend array is complete; all scalar variables precede it, so
+    the rest of the (large) body never has to be downloaded. ``result``
+    then runs one precompiled regex pass over the collected prefix.
+    """
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self._chunks: list[str] = []
+        self._size = 0
+        self._tail = ""
+        self._in_trend = False
+
+    @property
+    def size(self) -> int:
+        """Return the number of characters collected."""
+        return self._size
+
+    def feed(self, chunk: str) -> bool:
+        """Add a chunk; return True once no more data is needed."""
+        if not chunk:
+            return False
+        self._chunks.append(chunk)
+        self._size += len(chunk)
+
+        # 带上上一块的结尾，避免标记被切在两块之间
+        window = self._tail + chunk
+        self._tail = window[-len(TREND_START):]
+        if not self._in_trend:
+            start = window.find(TREND_START)
+            if start < 0:
+                return False
+            self._in_trend = True
+            window = window[start:]
+        return TREND_END in window
+
+    @property
+    def text(self) -> str:
+        """Return the collected text."""
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+    def result(self) -> dict[str, str]:
+        """Extract all wanted values from the collected text."""
+        return extract_pingzhong(self.text)
+
+
+def extract_pingzhong(text: str) -> dict[str, str]:
+    """Extract scalar variables and the last two NAV points in one pass."""
+    values: dict[str, str] = {}
+    # 标量变量都在净值走势数组之前，只扫描这一段
+    start = text.find(TREND_START)
+    head = text[:start] if start >= 0 else text
+    for match in _SCALAR_RE.finditer(head):
+        key = match.group(1)
+        if key in values:
+            continue
+        value = next(
+            (group for group in match.group(2, 3, 4) if group is not None), ""
+        ).strip()
+        if value:
+            values[key] = value
+        if len(values) == len(SCALAR_KEYS):
+            break
+
+    if start >= 0:
+        end = text.find(TREND_END, start)
+        if end >= 0:
+            tail = text[max(start, end - _TREND_TAIL):end]
+            points = _TREND_POINT_RE.findall(tail)
+            if points:
+                values["trend_dwjz"], values["trend_jzrq"] = _trend_point(points[-1])
+            if len(points) > 1:
+                values["trend_prev_dwjz"], values["trend_prev_jzrq"] = _trend_point(
+                    points[-2]
+                )
+    return values
+
+
+def _trend_point(point: tuple[str, str]) -> tuple[str, str]:
+    """Convert an (epoch ms, NAV) pair into (NAV, ISO date in China time)."""
+    timestamp, nav = point
+    day = datetime.fromtimestamp(int(timestamp) / 1000, tz=_CHINA_TZ).date()
+    return nav, day.isoformat()
@@ -0,0 +1,197 @@
+"""Portfolio-level aggregation for Daily Fund integration."""
+from __future__ import annotations
+
+import logging
+import re
+from collections.abc import Callable
+from functools import partial
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import CoreState, HomeAssistant, callback
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from .const import (
+    DOMAIN,
+    DATA_PORTFOLIO,
+    DATA_ALERTS,
+    DATA_STARTUP,
+    CONF_GROUP,
+    PORTFOLIO_ALL,
+)
+
+if TYPE_CHECKING:
+    from .coordinator import DailyFundCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# 基金数据中参与汇总的字段
+CONTRIBUTION_KEYS = ("estimated_value", "actual_value", "initial_cost")
+
+_GROUP_SPLIT_RE = re.compile(r"[,，;；]")
+
+
+def parse_groups(value: str | None) -> tuple[str, ...]:
+    """Split a comma separated tag/account string into group names."""
+    if not value:
+        return ()
+    return tuple(
+        dict.fromkeys(part.strip() for part in _GROUP_SPLIT_RE.split(value) if part.strip())
+    )
+
+
+class PortfolioTotals:
+    """Running sums over the funds of one group."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.funds = 0
+        self.estimated_value = 0.0
+        self.actual_value = 0.0
+        self.initial_cost = 0.0
+
+    def apply(self, delta: tuple[float, float, float], funds: int = 0) -> None:
+        """Add a contribution delta."""
+        self.funds += funds
+        self.estimated_value += delta[0]
+        self.actual_value += delta[1]
+        self.initial_cost += delta[2]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the totals and the figures derived from them."""
+        estimated_value = round(self.estimated_value, 2)
+        actual_value = round(self.actual_value, 2)
+        initial_cost = round(self.initial_cost, 2)
+        estimated_profit = round(estimated_value - initial_cost, 2)
+        daily_profit = round(estimated_value - actual_value, 2)
+        return {
+            "funds": self.funds,
+            "estimated_value": estimated_value,
+            "actual_value": actual_value,
+            "initial_cost": initial_cost,
+            "estimated_profit": estimated_profit,
+            "actual_profit": round(actual_value - initial_cost, 2),
+            "estimated_profit_rate": round(
+                estimated_profit / initial_cost * 100 if initial_cost else 0, 2
+            ),
+            # 按持仓市值加权的当日估算涨幅
+            "daily_profit": daily_profit,
+            "daily_return": round(
+                daily_profit / actual_value * 100 if actual_value else 0, 2
+            ),
+        }
+
+
+class DailyFundPortfolioCoordinator(DataUpdateCoordinator):
+    """Aggregate every fund coordinator into portfolio and group totals.
+
+    Nothing is polled: the coordinator listens to each fund coordinator,
+    remembers the fund's last contribution and applies only the difference
+    to the totals of the whole portfolio and of the fund's groups, so one
+    fund update costs O(1) regardless of how many funds are configured.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize."""
+        super().__init__(hass, _LOGGER, name=f"{DOMAIN} portfolio")
+        self._totals: dict[str, PortfolioTotals] = {PORTFOLIO_ALL: PortfolioTotals()}
+        self._contributions: dict[str, tuple[float, float, float]] = {}
+        self._groups: dict[str, tuple[str, ...]] = {}
+        self._unsubs: dict[str, Callable[[], None]] = {}
+        self.data: dict[str, dict[str, Any]] = {}
+
+    @property
+    def groups(self) -> list[str]:
+        """Return the whole portfolio followed by the groups holding funds."""
+        return [
+            group
+            for group, totals in self._totals.items()
+            if group == PORTFOLIO_ALL or totals.funds
+        ]
+
+    async def _async_update_data(self) -> dict[str, dict[str, Any]]:
+        """Return the current totals; they are kept up to date by the funds."""
+        # 更新实体服务只需重新写入当前汇总，不请求网络
+        return self.data
+
+    @callback
+    def async_add_fund(self, coordinator: DailyFundCoordinator) -> None:
+        """Start tracking a fund coordinator."""
+        code = coordinator.fund_code
+        if code in self._unsubs:
+            self.async_remove_fund(coordinator)
+
+        groups = (PORTFOLIO_ALL, *parse_groups(coordinator.entry.data.get(CONF_GROUP)))
+        self._groups[code] = groups
+        self._contributions[code] = (0.0, 0.0, 0.0)
+        for group in groups:
+            self._totals.setdefault(group, PortfolioTotals()).apply((0.0, 0.0, 0.0), 1)
+
+        self._unsubs[code] = coordinator.async_add_listener(
+            partial(self._async_fund_updated, coordinator)
+        )
+        self._apply_contribution(coordinator)
+        self._async_publish(groups)
+
+    @callback
+    def async_remove_fund(self, coordinator: DailyFundCoordinator) -> None:
+        """Stop tracking a fund and take it out of the totals."""
+        code = coordinator.fund_code
+        if (unsub := self._unsubs.pop(code, None)) is None:
+            return
+        unsub()
+        old = self._contributions.pop(code)
+        for group in self._groups.pop(code):
+            totals = self._totals[group]
+            totals.apply((-old[0], -old[1], -old[2]), -1)
+            if not totals.funds and group != PORTFOLIO_ALL:
+                # 分组已空，对应传感器变为不可用
+                del self._totals[group]
+                self.data.pop(group, None)
+        self._async_publish(group for group in self._totals if group in self.data)
+
+    @callback
+    def _async_fund_updated(self, coordinator: DailyFundCoordinator) -> None:
+        """Apply the change of one fund's contribution to the totals."""
+        if self._apply_contribution(coordinator):
+            self._async_publish(self._groups[coordinator.fund_code])
+
+    def _apply_contribution(self, coordinator: DailyFundCoordinator) -> bool:
+        """Add the difference to the fund's last contribution; return True if any."""
+        code = coordinator.fund_code
+        if (data := coordinator.data) is None:
+            new = (0.0, 0.0, 0.0)
+        else:
+            new = tuple(float(getattr(data, key)) for key in CONTRIBUTION_KEYS)
+        old = self._contributions[code]
+        if new == old:
+            return False
+        self._contributions[code] = new
+        delta = (new[0] - old[0], new[1] - old[1], new[2] - old[2])
+        for group in self._groups[code]:
+            self._totals[group].apply(delta)
+        return True
+
+    @callback
+    def _async_publish(self, groups) -> None:
+        """Refresh the published totals of the given groups and notify listeners."""
+        # 启动期间及启动后首次刷新完成之前，部分汇总不参与阈值判断
+        domain_data = self.hass.data[DOMAIN]
+        if (startup := domain_data.get(DATA_STARTUP)) is not None:
+            ready = startup.is_done
+        else:
+            ready = self.hass.state is CoreState.running
+        alerts = domain_data.get(DATA_ALERTS) if ready else None
+        for group in groups:
+            self.data[group] = totals = self._totals[group].as_dict()
+            if alerts is not None:
+                alerts.async_evaluate_group(group, totals)
+        self.async_update_listeners()
+
+
+@callback
+def async_get_portfolio(hass: HomeAssistant) -> DailyFundPortfolioCoordinator:
+    """Return the shared portfolio coordinator, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (portfolio := domain_data.get(DATA_PORTFOLIO)) is None:
+        portfolio = domain_data[DATA_PORTFOLIO] = DailyFundPortfolioCoordinator(hass)
+    return portfolio
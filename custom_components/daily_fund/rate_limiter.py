@@ -0,0 +1,106 @@
+"""Domain-wide request rate limiter for Daily Fund integration."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from time import monotonic
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Pace every upstream request of the integration.
+
+    Tokens refill at ``rate`` per second up to ``burst``. Waiters are
+    served in FIFO order, and an upstream throttling signal empties the
+    bucket and pauses all requests for a while. Background requests only
+    take a token while no regular request is waiting and more than
+    ``reserve`` tokens are left, so they never delay live polls.
+    """
+
+    def __init__(self, rate: float, burst: int, reserve: int = 0) -> None:
+        """Initialize."""
+        self.rate = rate
+        self.burst = burst
+        self.reserve = min(reserve, burst - 1)
+        self._tokens = float(burst)
+        self._updated = monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+        # 统计数据，用于调优
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.acquired = 0
+        self.background = 0
+        self.delayed = 0
+        self.total_wait = 0.0
+        self.upstream_throttled = 0
+
+    async def async_acquire(self) -> None:
+        """Wait until a request may be sent."""
+        self.queue_depth += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        started = monotonic()
+        try:
+            async with self._lock:
+                while (delay := self._reserve()) > 0:
+                    await asyncio.sleep(delay)
+        finally:
+            self.queue_depth -= 1
+
+        self.acquired += 1
+        if (waited := monotonic() - started) > 0.001:
+            self.delayed += 1
+            self.total_wait += waited
+
+    async def async_acquire_background(self) -> None:
+        """Wait until a background request may use spare capacity."""
+        while True:
+            if self.queue_depth:
+                # 有常规请求排队时让出
+                delay = 1 / self.rate
+            else:
+                async with self._lock:
+                    delay = self._reserve(self.reserve)
+                if not delay:
+                    break
+            await asyncio.sleep(delay)
+        self.background += 1
+
+    def _reserve(self, keep: float = 0) -> float:
+        """Take a token leaving keep behind, or return how long to wait for one."""
+        now = monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self._tokens >= 1 + keep:
+            self._tokens -= 1
+            return 0
+        return (1 + keep - self._tokens) / self.rate
+
+    def throttled(self, pause: float) -> None:
+        """Record an upstream throttling signal and pause all requests."""
+        self.upstream_throttled += 1
+        self._tokens = 0
+        self._paused_until = max(self._paused_until, monotonic() + pause)
+        _LOGGER.warning("上游返回限流信号，暂停请求 %s 秒", pause)
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return counters for diagnostics."""
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "acquired": self.acquired,
+            "background": self.background,
+            "delayed": self.delayed,
+            "total_wait_seconds": round(self.total_wait, 3),
+            "upstream_throttled": self.upstream_throttled,
+            "paused": monotonic() < self._paused_until,
+        }
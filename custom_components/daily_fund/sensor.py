@@ -2,18 +2,219 @@
 from __future__ import annotations
 
 import logging
+from datetime import timedelta
+from typing import Any
 
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import MATCH_ALL, PERCENTAGE, EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN
+from .const import (
+    DOMAIN,
+    CURRENCY_CNY,
+    CONF_ENTRY_TYPE,
+    ENTRY_TYPE_PORTFOLIO,
+    PORTFOLIO_ALL,
+    METRICS_SCAN_INTERVAL,
+)
 from .coordinator import DailyFundCoordinator
+from .metrics import (
+    TIMING_REFRESH,
+    TIMING_PROCESS,
+    TIMING_STATE_WRITE,
+    RefreshMetrics,
+    async_get_metrics,
+)
+from .portfolio import DailyFundPortfolioCoordinator
 
 _LOGGER = logging.getLogger(__name__)
 
+# 只有性能统计传感器需要轮询，其余实体由协调器推送
+SCAN_INTERVAL = timedelta(seconds=METRICS_SCAN_INTERVAL)
+
+# 频繁变化的数值单独建传感器，带 state_class 以进入长期统计
+VALUE_SENSORS: tuple[SensorEntityDescription, ...] = (
+    SensorEntityDescription(
+        key="estimated_net_value",
+        name="估算净值",
+        icon="mdi:chart-line",
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=4,
+    ),
+    SensorEntityDescription(
+        key="estimated_growth_rate",
+        name="估算增长率",
+        icon="mdi:percent",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=2,
+    ),
+    SensorEntityDescription(
+        key="estimated_value",
+        name="估算市值",
+        icon="mdi:cash",
+        native_unit_of_measurement=CURRENCY_CNY,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=2,
+    ),
+    SensorEntityDescription(
+        key="estimated_profit",
+        name="估算收益",
+        icon="mdi:cash-plus",
+        native_unit_of_measurement=CURRENCY_CNY,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=2,
+    ),
+    SensorEntityDescription(
+        key="estimated_profit_rate",
+        name="估算收益率",
+        icon="mdi:percent",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=2,
+    ),
+    SensorEntityDescription(
+        key="actual_net_value",
+        name="单位净值",
+        icon="mdi:chart-line",
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=4,
+    ),
+    SensorEntityDescription(
+        key="actual_value",
+        name="持仓市值",
+        icon="mdi:cash",
+        native_unit_of_measurement=CURRENCY_CNY,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=2,
+    ),
+    SensorEntityDescription(
+        key="actual_profit",
+        name="持仓收益",
+        icon="mdi:cash-plus",
+        native_unit_of_measurement=CURRENCY_CNY,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=2,
+    ),
+    SensorEntityDescription(
+        key="actual_profit_rate",
+        name="持仓收益率",
+        icon="mdi:percent",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=2,
+    ),
+    SensorEntityDescription(
+        key="realized_profit",
+        name="已实现收益",
+        icon="mdi:cash-check",
+        native_unit_of_measurement=CURRENCY_CNY,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=2,
+    ),
+)
+
+# 投资组合每个分组的汇总传感器
+PORTFOLIO_SENSORS: tuple[SensorEntityDescription, ...] = (
+    SensorEntityDescription(
+        key="estimated_value",
+        name="估算市值",
+        icon="mdi:cash",
+        native_unit_of_measurement=CURRENCY_CNY,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=2,
+    ),
+    SensorEntityDescription(
+        key="actual_value",
+        name="持仓市值",
+        icon="mdi:cash",
+        native_unit_of_measurement=CURRENCY_CNY,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=2,
+    ),
+    SensorEntityDescription(
+        key="estimated_profit",
+        name="估算收益",
+        icon="mdi:cash-plus",
+        native_unit_of_measurement=CURRENCY_CNY,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=2,
+    ),
+    SensorEntityDescription(
+        key="estimated_profit_rate",
+        name="估算收益率",
+        icon="mdi:percent",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=2,
+    ),
+    SensorEntityDescription(
+        key="daily_profit",
+        name="当日估算收益",
+        icon="mdi:cash-clock",
+        native_unit_of_measurement=CURRENCY_CNY,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=2,
+    ),
+    SensorEntityDescription(
+        key="daily_return",
+        name="当日估算涨幅",
+        icon="mdi:percent",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=2,
+    ),
+)
+
+# 基于本地历史净值的指标及其属性名
+ANALYTICS_ATTRIBUTES = {
+    "return_7d": "近7日收益率",
+    "return_30d": "近30日收益率",
+    "return_90d": "近90日收益率",
+    "return_365d": "近1年收益率",
+    "volatility": "年化波动率",
+    "max_drawdown": "最大回撤",
+    "ma_5": "5日均线",
+    "ma_20": "20日均线",
+    "ma_60": "60日均线",
+    "ma_250": "250日均线",
+}
+
+# 不写入记录器历史的属性：静态信息，以及已有独立数值传感器记录的数值
+UNRECORDED_ATTRIBUTES = frozenset(
+    {
+        "基金代码",
+        "基金名称",
+        "基金全称",
+        "涨跌图标",
+        "平均净值",
+        "持仓份额",
+        "初始成本",
+        "成本计算方法",
+        "累计分红",
+        "前天日期",
+        "前天净值",
+        "前天市值",
+        "前天收益",
+        "前天收益率",
+        "前天增长率",
+        "快照时间",
+        "日内最高估值",
+        "日内最低估值",
+        "日内估值均值",
+        *(description.name for description in VALUE_SENSORS),
+    }
+)
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: ConfigEntry,
@@ -21,21 +222,82 @@ async def async_setup_entry(
 ) -> None:
     """Set up the Daily Fund sensor platform."""
     
+    if entry.data.get(CONF_ENTRY_TYPE) == ENTRY_TYPE_PORTFOLIO:
+        _async_setup_portfolio(entry, hass.data[DOMAIN][entry.entry_id], async_add_entities)
+        async_add_entities([DailyFundMetricsSensor(async_get_metrics(hass))])
+        return
+    
     coordinator: DailyFundCoordinator = hass.data[DOMAIN][entry.entry_id]
     
-    # 每个基金只创建一个实体
-    async_add_entities([DailyFundSensor(coordinator)], True)
+    # 数据已由coordinator获取，添加时无需再刷新
+    entities: list[SensorEntity] = [DailyFundSensor(coordinator)]
+    entities.extend(
+        DailyFundValueSensor(coordinator, description) for description in VALUE_SENSORS
+    )
+    async_add_entities(entities)
 
 
-class DailyFundSensor(SensorEntity):
-    """Representation of a Daily Fund Sensor."""
+@callback
+def _async_setup_portfolio(
+    entry: ConfigEntry,
+    portfolio: DailyFundPortfolioCoordinator,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Add summary sensors for the portfolio and for each group as it appears."""
+    known: set[str] = set()
+
+    @callback
+    def _async_add_groups() -> None:
+        new_groups = [group for group in portfolio.groups if group not in known]
+        if not new_groups:
+            return
+        known.update(new_groups)
+        async_add_entities(
+            DailyFundPortfolioSensor(portfolio, group, description)
+            for group in new_groups
+            for description in PORTFOLIO_SENSORS
+        )
+
+    _async_add_groups()
+    entry.async_on_unload(portfolio.async_add_listener(_async_add_groups))
+
+
+class ChangeAwareEntity(CoordinatorEntity, SensorEntity):
+    """Base entity that only writes its state when it actually changes."""
+
+    def __init__(self, coordinator) -> None:
+        """Initialize the entity."""
+        super().__init__(coordinator)
+        self._last_state_key: Any = None
+
+    def _state_key(self) -> Any:
+        """Return the values whose change warrants a state write."""
+        return self.coordinator.data
+
+    async def async_added_to_hass(self) -> None:
+        """Remember the state written when the entity is added."""
+        await super().async_added_to_hass()
+        self._last_state_key = (self.available, self._state_key())
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only if something meaningful changed."""
+        state_key = (self.available, self._state_key())
+        if state_key == self._last_state_key:
+            return
+        self._last_state_key = state_key
+        super()._handle_coordinator_update()
+
+
+class DailyFundEntity(ChangeAwareEntity):
+    """Base entity of a single fund."""
+
+    coordinator: DailyFundCoordinator
 
     def __init__(self, coordinator: DailyFundCoordinator) -> None:
-        """Initialize the sensor."""
-        self.coordinator = coordinator
-        self._attr_name = coordinator.fund_name
-        self._attr_unique_id = f"{coordinator.fund_code}_fund"
-        
+        """Initialize the entity."""
+        super().__init__(coordinator)
+
         # Set device info
         self._attr_device_info = DeviceInfo(
             identifiers={(DOMAIN, coordinator.fund_code)},
@@ -47,7 +309,39 @@ class DailyFundSensor(SensorEntity):
     @property
     def available(self) -> bool:
         """Return if entity is available."""
-        return self.coordinator.last_update_success and self.coordinator.data is not None
+        if self.coordinator.data is None:
+            return False
+        # 本地快照在实时刷新成功前保持可用
+        return self.coordinator.last_update_success or self.coordinator.is_stale
+
+
+class DailyFundSensor(DailyFundEntity):
+    """Representation of a Daily Fund Sensor."""
+
+    _unrecorded_attributes = UNRECORDED_ATTRIBUTES
+
+    def __init__(self, coordinator: DailyFundCoordinator) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._attr_name = coordinator.fund_name
+        self._attr_unique_id = f"{coordinator.fund_code}_fund"
+
+    def _state_key(self) -> Any:
+        """Return the fund data, history statistics and cache flag."""
+        data = self.coordinator.data
+        if data is None:
+            return None
+        return (
+            data,
+            tuple(self._analytics().values()),
+            self.coordinator.is_stale,
+        )
+
+    def _analytics(self) -> dict[str, float | None]:
+        """Return the history statistics, empty until the history is loaded."""
+        if (analytics := self.coordinator.analytics) is None:
+            return {}
+        return analytics.as_dict()
 
     @property
     def native_value(self):
@@ -55,7 +349,7 @@ class DailyFundSensor(SensorEntity):
         if self.coordinator.data is None:
             return None
             
-        return self.coordinator.data.get("net_value_date")
+        return self.coordinator.data.net_value_date
 
     @property
     def native_unit_of_measurement(self):
@@ -69,48 +363,176 @@ class DailyFundSensor(SensorEntity):
             return {}
             
         data = self.coordinator.data
+        metrics = self._analytics()
+        intraday = self.coordinator.intraday
             
         return {
-            # 基础数据
-            "基金代码": data.get("fund_code"),
-            "基金名称": data.get("fund_name"),
-            "基金全称": data.get("fund_full_name"),
-            "涨跌净值": data.get("rise_fall_net_value"),  # 已改为单位净值-前天净值
-            "涨跌图标": data.get("rise_fall_icon"),
-            "平均净值": data.get("avg_net_value"),
-            "持仓份额": data.get("hold_shares"),
-            "初始成本": data.get("initial_cost"),
+            # 基础、净值与估算数据，每个快照只生成一次
+            **data.attributes,
             
-            # 净值数据
-            "净值日期": data.get("net_value_date"),
-            "单位净值": data.get("actual_net_value"),
-            "前天日期": data.get("prev_net_value_date"),   # 改名
-            "前天净值": data.get("prev_net_value"),
-            "前天市值": data.get("prev_value"),
-            "前天收益": data.get("prev_profit"),
-            "前天收益率": data.get("prev_profit_rate"),
-            "前天增长率": data.get("prev_growth_rate"),
-            "持仓市值": data.get("actual_value"),
-            "持仓收益": data.get("actual_profit"),
-            "持仓收益率": data.get("actual_profit_rate"),
+            # 当日盘中估算
+            "日内最高估值": intraday.high,
+            "日内最低估值": intraday.low,
+            "日内估值均值": None if intraday.average is None else round(intraday.average, 4),
             
-            # 估算数据
-            "估算时间": data.get("update_time"),
-            "估算净值": data.get("estimated_net_value"),
-            "估算增长率": data.get("estimated_growth_rate"),
-            "估算市值": data.get("estimated_value"),
-            "估算收益": data.get("estimated_profit"),
-            "估算收益率": data.get("estimated_profit_rate"),
+            # 历史指标（本地历史净值不足窗口长度时为空）
+            **{
+                label: metrics.get(key)
+                for key, label in ANALYTICS_ATTRIBUTES.items()
+            },
+
+            # 数据状态
+            "缓存数据": self.coordinator.is_stale,
+            "快照时间": self.coordinator.snapshot_time if self.coordinator.is_stale else None,
         }
 
-    async def async_added_to_hass(self) -> None:
-        """When entity is added to hass."""
-        self.async_on_remove(
-            self.coordinator.async_add_listener(
-                self.async_write_ha_state
-            )
+
+class DailyFundValueSensor(DailyFundEntity):
+    """A numeric fund value tracked in long-term statistics."""
+
+    def __init__(
+        self,
+        coordinator: DailyFundCoordinator,
+        description: SensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._attr_name = f"{coordinator.fund_name} {description.name}"
+        self._attr_unique_id = f"{coordinator.fund_code}_{description.key}"
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the value."""
+        if self.coordinator.data is None:
+            return None
+        return getattr(self.coordinator.data, self.entity_description.key)
+
+    def _state_key(self) -> Any:
+        """Return the value."""
+        return self.native_value
+
+
+class DailyFundPortfolioSensor(ChangeAwareEntity):
+    """A total over the whole portfolio or over one group of funds."""
+
+    coordinator: DailyFundPortfolioCoordinator
+
+    def __init__(
+        self,
+        portfolio: DailyFundPortfolioCoordinator,
+        group: str,
+        description: SensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(portfolio)
+        self.entity_description = description
+        self._group = group
+        prefix = "投资组合" if group == PORTFOLIO_ALL else f"投资组合 {group}"
+        self._attr_name = f"{prefix} {description.name}"
+        self._attr_unique_id = f"{ENTRY_TYPE_PORTFOLIO}_{group}_{description.key}"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, ENTRY_TYPE_PORTFOLIO)},
+            name="每日基金 - 投资组合",
+            manufacturer="每日基金",
+            model="投资组合",
         )
 
-    async def async_update(self) -> None:
-        """Update the entity."""
-        await self.coordinator.async_request_refresh()
\ No newline at end of file
+    @property
+    def _totals(self) -> dict[str, Any] | None:
+        """Return the totals of this sensor's group."""
+        return self.coordinator.data.get(self._group)
+
+    @property
+    def available(self) -> bool:
+        """Return if the group still holds funds."""
+        return self._totals is not None
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the total."""
+        if (totals := self._totals) is None:
+            return None
+        return totals[self.entity_description.key]
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the size and cost basis of the group."""
+        if (totals := self._totals) is None:
+            return {}
+        return {
+            "分组": self._group,
+            "基金数量": totals["funds"],
+            "总成本": totals["initial_cost"],
+            "持仓收益": totals["actual_profit"],
+        }
+
+    def _state_key(self) -> Any:
+        """Return the group totals."""
+        return self._totals
+
+
+class DailyFundMetricsSensor(SensorEntity):
+    """Refresh pipeline timings; collection runs only while it is enabled."""
+
+    _attr_name = "每日基金 刷新耗时"
+    _attr_unique_id = f"{DOMAIN}_metrics"
+    _attr_icon = "mdi:speedometer"
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _unrecorded_attributes = frozenset({MATCH_ALL})
+
+    def __init__(self, metrics: RefreshMetrics) -> None:
+        """Initialize the sensor."""
+        self.metrics = metrics
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, ENTRY_TYPE_PORTFOLIO)},
+            name="每日基金 - 投资组合",
+            manufacturer="每日基金",
+            model="投资组合",
+        )
+
+    async def async_added_to_hass(self) -> None:
+        """Start collecting."""
+        self.metrics.async_enable(self.entity_id)
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop collecting unless something else still needs it."""
+        self.metrics.async_disable(self.entity_id)
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the p90 duration of a whole coordinator refresh."""
+        if (refresh := self.metrics.timing(TIMING_REFRESH)) is None:
+            return None
+        return round(refresh.percentile(90) * 1000, 1)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return a compact summary; diagnostics hold the full histograms."""
+        metrics = self.metrics
+        attributes: dict[str, Any] = {
+            "统计开始": metrics.since.isoformat(),
+            "事件循环阻塞(ms)": round(metrics.loop_blocked * 1000, 1),
+        }
+        for name, label in (
+            (TIMING_PROCESS, "指标计算"),
+            (TIMING_STATE_WRITE, "状态写入"),
+        ):
+            if (histogram := metrics.timing(name)) is not None:
+                attributes[f"{label} p90(ms)"] = round(histogram.percentile(90) * 1000, 2)
+        for source, stats in metrics.sources.items():
+            if stats.latency.count:
+                attributes[f"{source} 请求数"] = stats.requests
+                attributes[f"{source} 失败数"] = stats.failures
+                attributes[f"{source} p50(ms)"] = round(stats.latency.percentile(50) * 1000)
+                attributes[f"{source} p99(ms)"] = round(stats.latency.percentile(99) * 1000)
+            if stats.parse.count:
+                attributes[f"{source} 解析 p90(ms)"] = round(
+                    stats.parse.percentile(90) * 1000, 2
+                )
+        attributes.update(metrics.counters)
+        return attributes
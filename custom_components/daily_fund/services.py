@@ -0,0 +1,400 @@
+"""Services for Daily Fund integration."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import voluptuous as vol
+
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.event import async_call_later
+
+from .const import (
+    DOMAIN,
+    DATA_CLIENT,
+    CONF_FUND_CODE,
+    CONF_GROUP,
+    CONF_HOLD_SHARES,
+    CONF_INITIAL_COST,
+    COST_METHOD_FIFO,
+    COST_METHOD_AVERAGE,
+    TRANSACTION_BUY,
+    TRANSACTION_SELL,
+    TRANSACTION_DIVIDEND,
+    FUND_LIST_CSV,
+    FUND_LIST_YAML,
+    ALERT_DEFAULT_HYSTERESIS,
+    ALERT_DEFAULT_DEBOUNCE,
+    ALERT_FUND_METRICS,
+    ALERT_GROUP_METRICS,
+)
+
+# 服务在启动时注册，处理函数用到的模块在首次调用时才导入
+if TYPE_CHECKING:
+    from .client import FundHttpClient
+    from .coordinator import DailyFundCoordinator
+
+SERVICE_RECORD_TRANSACTION = "record_transaction"
+SERVICE_REMOVE_TRANSACTION = "remove_transaction"
+SERVICE_SET_COST_METHOD = "set_cost_method"
+SERVICE_IMPORT_FUNDS = "import_funds"
+SERVICE_EXPORT_FUNDS = "export_funds"
+SERVICE_START_CAPTURE = "start_capture"
+SERVICE_STOP_CAPTURE = "stop_capture"
+SERVICE_SET_METRICS = "set_metrics"
+SERVICE_SET_ALERT = "set_alert"
+SERVICE_REMOVE_ALERT = "remove_alert"
+
+ATTR_TYPE = "type"
+ATTR_DATE = "date"
+ATTR_SHARES = "shares"
+ATTR_AMOUNT = "amount"
+ATTR_PRICE = "price"
+ATTR_FEE = "fee"
+ATTR_TRANSACTION_ID = "transaction_id"
+ATTR_METHOD = "method"
+ATTR_DATA = "data"
+ATTR_FORMAT = "format"
+ATTR_DURATION = "duration"
+ATTR_ENABLED = "enabled"
+ATTR_METRIC = "metric"
+ATTR_ABOVE = "above"
+ATTR_BELOW = "below"
+ATTR_HYSTERESIS = "hysteresis"
+ATTR_DEBOUNCE = "debounce"
+
+RECORD_TRANSACTION_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_FUND_CODE): cv.string,
+        vol.Required(ATTR_TYPE): vol.In(
+            [TRANSACTION_BUY, TRANSACTION_SELL, TRANSACTION_DIVIDEND]
+        ),
+        vol.Required(ATTR_DATE): cv.date,
+        vol.Optional(ATTR_SHARES): vol.All(vol.Coerce(float), vol.Range(min=0)),
+        vol.Optional(ATTR_AMOUNT): vol.All(vol.Coerce(float), vol.Range(min=0)),
+        vol.Optional(ATTR_PRICE): vol.All(vol.Coerce(float), vol.Range(min=0)),
+        vol.Optional(ATTR_FEE, default=0): vol.All(vol.Coerce(float), vol.Range(min=0)),
+    }
+)
+
+REMOVE_TRANSACTION_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_FUND_CODE): cv.string,
+        vol.Required(ATTR_TRANSACTION_ID): cv.string,
+    }
+)
+
+SET_COST_METHOD_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_FUND_CODE): cv.string,
+        vol.Required(ATTR_METHOD): vol.In([COST_METHOD_FIFO, COST_METHOD_AVERAGE]),
+    }
+)
+
+IMPORT_FUNDS_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_DATA): cv.string,
+        vol.Optional(ATTR_FORMAT): vol.In([FUND_LIST_CSV, FUND_LIST_YAML]),
+    }
+)
+
+EXPORT_FUNDS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_FORMAT, default=FUND_LIST_CSV): vol.In(
+            [FUND_LIST_CSV, FUND_LIST_YAML]
+        ),
+    }
+)
+
+START_CAPTURE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DURATION): vol.All(vol.Coerce(int), vol.Range(min=1)),
+    }
+)
+
+SET_METRICS_SCHEMA = vol.Schema({vol.Required(ATTR_ENABLED): cv.boolean})
+
+
+def _group_metric(value: dict) -> dict:
+    """Reject metrics that only single funds have for a group target."""
+    if CONF_GROUP in value and value[ATTR_METRIC] not in ALERT_GROUP_METRICS:
+        raise vol.Invalid(f"分组与组合不支持指标 {value[ATTR_METRIC]}", path=[ATTR_METRIC])
+    return value
+
+
+SET_ALERT_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Exclusive(CONF_FUND_CODE, "target"): cv.string,
+            vol.Exclusive(CONF_GROUP, "target"): cv.string,
+            vol.Required(ATTR_METRIC): vol.In(ALERT_FUND_METRICS),
+            vol.Optional(ATTR_ABOVE): vol.Coerce(float),
+            vol.Optional(ATTR_BELOW): vol.Coerce(float),
+            vol.Optional(ATTR_HYSTERESIS, default=ALERT_DEFAULT_HYSTERESIS): vol.All(
+                vol.Coerce(float), vol.Range(min=0)
+            ),
+            vol.Optional(ATTR_DEBOUNCE, default=ALERT_DEFAULT_DEBOUNCE): vol.All(
+                vol.Coerce(int), vol.Range(min=1)
+            ),
+        }
+    ),
+    cv.has_at_least_one_key(CONF_FUND_CODE, CONF_GROUP),
+    cv.has_at_least_one_key(ATTR_ABOVE, ATTR_BELOW),
+    _group_metric,
+)
+
+REMOVE_ALERT_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Exclusive(CONF_FUND_CODE, "target"): cv.string,
+            vol.Exclusive(CONF_GROUP, "target"): cv.string,
+            vol.Optional(ATTR_METRIC): vol.In(ALERT_FUND_METRICS),
+        }
+    ),
+    cv.has_at_least_one_key(CONF_FUND_CODE, CONF_GROUP),
+)
+
+
+def build_transaction(call_data: dict) -> dict:
+    """Fill in shares or amount from the NAV and validate a transaction."""
+    kind = call_data[ATTR_TYPE]
+    shares = call_data.get(ATTR_SHARES)
+    amount = call_data.get(ATTR_AMOUNT)
+    price = call_data.get(ATTR_PRICE)
+    fee = call_data[ATTR_FEE]
+
+    if kind == TRANSACTION_BUY:
+        # 按金额申购时由成交净值折算份额，金额含手续费
+        if shares is None and amount is not None and price:
+            shares = round((amount - fee) / price, 2)
+        elif amount is None and shares is not None and price is not None:
+            amount = round(shares * price + fee, 2)
+        if not shares or amount is None:
+            raise HomeAssistantError("买入需要提供份额和金额，或其中之一加成交净值")
+    elif kind == TRANSACTION_SELL:
+        # 卖出金额为扣除手续费前的赎回金额
+        if amount is None and shares is not None and price is not None:
+            amount = round(shares * price, 2)
+        if not shares or amount is None:
+            raise HomeAssistantError("卖出需要提供份额，以及金额或成交净值")
+    elif amount is None:
+        raise HomeAssistantError("分红需要提供金额")
+
+    return {
+        ATTR_TYPE: kind,
+        ATTR_DATE: call_data[ATTR_DATE].isoformat(),
+        ATTR_SHARES: shares or 0,
+        ATTR_AMOUNT: amount,
+        ATTR_PRICE: price,
+        ATTR_FEE: fee,
+    }
+
+
+@callback
+def async_register_services(hass: HomeAssistant) -> None:
+    """Register the ledger, bulk import/export, capture, metrics and alert services."""
+
+    def _coordinator(fund_code: str) -> DailyFundCoordinator:
+        from .coordinator import DailyFundCoordinator
+
+        for coordinator in hass.data.get(DOMAIN, {}).values():
+            if (
+                isinstance(coordinator, DailyFundCoordinator)
+                and coordinator.fund_code == fund_code
+            ):
+                return coordinator
+        raise HomeAssistantError(f"未配置基金 {fund_code}")
+
+    async def async_record_transaction(call: ServiceCall) -> None:
+        """Add a buy, sell or dividend to a fund's ledger."""
+        from .ledger import async_get_ledger
+
+        coordinator = _coordinator(call.data[CONF_FUND_CODE])
+        ledger = await async_get_ledger(hass)
+        # 首笔交易前把配置中的持仓记为期初持仓
+        opening = None
+        if shares := float(coordinator.entry.data.get(CONF_HOLD_SHARES, 0)):
+            opening = {
+                ATTR_TYPE: TRANSACTION_BUY,
+                ATTR_DATE: None,
+                ATTR_SHARES: shares,
+                ATTR_AMOUNT: float(coordinator.entry.data.get(CONF_INITIAL_COST, 0)),
+            }
+        position = await ledger.async_add_transaction(
+            coordinator.fund_code, build_transaction(dict(call.data)), opening
+        )
+        coordinator.async_apply_position(position)
+
+    async def async_remove_transaction(call: ServiceCall) -> None:
+        """Delete a transaction from a fund's ledger."""
+        from .ledger import async_get_ledger
+
+        coordinator = _coordinator(call.data[CONF_FUND_CODE])
+        ledger = await async_get_ledger(hass)
+        position = await ledger.async_remove_transaction(
+            coordinator.fund_code, call.data[ATTR_TRANSACTION_ID]
+        )
+        coordinator.async_apply_position(position)
+
+    async def async_set_cost_method(call: ServiceCall) -> None:
+        """Switch a fund's cost basis method."""
+        from .ledger import async_get_ledger
+
+        coordinator = _coordinator(call.data[CONF_FUND_CODE])
+        ledger = await async_get_ledger(hass)
+        position = await ledger.async_set_cost_method(
+            coordinator.fund_code, call.data[ATTR_METHOD]
+        )
+        coordinator.async_apply_position(position)
+
+    async def async_import(call: ServiceCall) -> ServiceResponse:
+        """Validate a fund list and add all of its funds."""
+        from .bulk import async_import_funds, async_validate_fund_list
+
+        funds, skipped = await async_validate_fund_list(
+            hass, call.data[ATTR_DATA], call.data.get(ATTR_FORMAT)
+        )
+        imported = await async_import_funds(hass, funds) if funds else []
+        return {"imported": imported, "skipped": skipped}
+
+    async def async_export(call: ServiceCall) -> ServiceResponse:
+        """Return the configured funds and holdings as CSV or YAML."""
+        from .bulk import export_fund_list
+
+        fmt = call.data[ATTR_FORMAT]
+        return {ATTR_FORMAT: fmt, ATTR_DATA: export_fund_list(hass, fmt)}
+
+    def _client() -> FundHttpClient:
+        if (client := hass.data.get(DOMAIN, {}).get(DATA_CLIENT)) is None:
+            raise HomeAssistantError("尚未配置任何基金")
+        return client
+
+    async def async_start_capture(call: ServiceCall) -> ServiceResponse:
+        """Start recording raw upstream responses."""
+        from .capture import CaptureRecorder, capture_path
+
+        client = _client()
+        if client.recorder is not None:
+            raise HomeAssistantError(f"正在录制到 {client.recorder.path}")
+        recorder = client.recorder = CaptureRecorder(hass, capture_path(hass))
+        if duration := call.data.get(ATTR_DURATION):
+
+            async def _async_stop(_now) -> None:
+                if client.recorder is recorder:
+                    client.recorder = None
+                    await recorder.async_stop()
+
+            async_call_later(hass, duration * 60, _async_stop)
+        return {"path": recorder.path}
+
+    async def async_stop_capture(call: ServiceCall) -> ServiceResponse:
+        """Stop recording and return the archive path."""
+        client = _client()
+        if (recorder := client.recorder) is None:
+            raise HomeAssistantError("当前没有在录制")
+        client.recorder = None
+        await recorder.async_stop()
+        return {"path": recorder.path, "records": recorder.records}
+
+    async def async_set_metrics(call: ServiceCall) -> None:
+        """Turn refresh pipeline statistics on or off."""
+        from .metrics import async_get_metrics
+
+        metrics = async_get_metrics(hass)
+        if call.data[ATTR_ENABLED]:
+            metrics.async_enable(SERVICE_SET_METRICS)
+        else:
+            metrics.async_disable(SERVICE_SET_METRICS)
+
+    def _alert_target(call: ServiceCall) -> tuple[str, str]:
+        from .alerts import KIND_FUND, KIND_GROUP
+
+        if CONF_GROUP in call.data:
+            return KIND_GROUP, call.data[CONF_GROUP]
+        return KIND_FUND, _coordinator(call.data[CONF_FUND_CODE]).fund_code
+
+    async def async_set_alert(call: ServiceCall) -> None:
+        """Set the thresholds of one metric of a fund, a group or the portfolio."""
+        from .alerts import async_get_alerts
+
+        kind, target = _alert_target(call)
+        alerts = await async_get_alerts(hass)
+        await alerts.async_set_rule(
+            kind,
+            target,
+            call.data[ATTR_METRIC],
+            call.data.get(ATTR_ABOVE),
+            call.data.get(ATTR_BELOW),
+            call.data[ATTR_HYSTERESIS],
+            call.data[ATTR_DEBOUNCE],
+        )
+
+    async def async_remove_alert(call: ServiceCall) -> None:
+        """Remove the thresholds of a fund, a group or the portfolio."""
+        from .alerts import async_get_alerts
+
+        kind, target = _alert_target(call)
+        alerts = await async_get_alerts(hass)
+        await alerts.async_remove_rule(kind, target, call.data.get(ATTR_METRIC))
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_RECORD_TRANSACTION,
+        async_record_transaction,
+        schema=RECORD_TRANSACTION_SCHEMA,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_REMOVE_TRANSACTION,
+        async_remove_transaction,
+        schema=REMOVE_TRANSACTION_SCHEMA,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_COST_METHOD,
+        async_set_cost_method,
+        schema=SET_COST_METHOD_SCHEMA,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_IMPORT_FUNDS,
+        async_import,
+        schema=IMPORT_FUNDS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT_FUNDS,
+        async_export,
+        schema=EXPORT_FUNDS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_START_CAPTURE,
+        async_start_capture,
+        schema=START_CAPTURE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_STOP_CAPTURE,
+        async_stop_capture,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_SET_METRICS, async_set_metrics, schema=SET_METRICS_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_SET_ALERT, async_set_alert, schema=SET_ALERT_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_REMOVE_ALERT, async_remove_alert, schema=REMOVE_ALERT_SCHEMA
+    )
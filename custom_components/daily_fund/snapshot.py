@@ -0,0 +1,305 @@
+"""Slotted per-fund snapshot model for Daily Fund integration."""
+from __future__ import annotations
+
+from typing import Any
+
+# 快照的全部字段，顺序即诊断信息与本地快照中的顺序
+FIELDS = (
+    "fund_code",
+    "fund_name",
+    "fund_full_name",
+    "rise_fall_net_value",
+    "rise_fall_icon",
+    "avg_net_value",
+    "hold_shares",
+    "initial_cost",
+    "net_value_date",
+    "actual_net_value",
+    "actual_value",
+    "actual_profit",
+    "actual_profit_rate",
+    "update_time",
+    "estimated_net_value",
+    "estimated_growth_rate",
+    "estimated_value",
+    "estimated_profit",
+    "estimated_profit_rate",
+    "prev_net_value",
+    "prev_net_value_date",
+    "prev_value",
+    "prev_profit",
+    "prev_profit_rate",
+    "prev_growth_rate",
+    "cost_method",
+    "realized_profit",
+    "dividends",
+)
+
+
+def _round2(value: float) -> float:
+    """Round to 2 decimals the way the figures always have been."""
+    return round(value * 100) / 100
+
+
+def _round4(value: float) -> float:
+    """Round to 4 decimals the way the figures always have been."""
+    return round(value * 10000) / 10000
+
+
+# 延迟计算的字段，读取其中任意一个时一并计算
+DERIVED = (
+    "rise_fall_net_value",
+    "rise_fall_icon",
+    "avg_net_value",
+    "hold_shares",
+    "initial_cost",
+    "realized_profit",
+    "dividends",
+    "actual_net_value",
+    "actual_value",
+    "actual_profit",
+    "actual_profit_rate",
+    "estimated_net_value",
+    "estimated_growth_rate",
+    "estimated_value",
+    "estimated_profit",
+    "estimated_profit_rate",
+    "prev_net_value",
+    "prev_value",
+    "prev_profit",
+    "prev_profit_rate",
+    "prev_growth_rate",
+    "attributes",
+)
+_DERIVED_SET = frozenset(DERIVED)
+
+
+class FundSnapshot:
+    """The figures of one fund computed from one set of upstream values.
+
+    Only the parsed inputs are stored when a snapshot is built. The first
+    read of any derived figure, or of the labelled ``attributes`` view of
+    the main sensor, computes all of them at once into their slots, so
+    later reads are plain attribute lookups and the view shares the same
+    values. A snapshot never changes, so nothing needs invalidating: new
+    values build a new snapshot, and an unchanged tick keeps the old one
+    with everything already computed. Two snapshots are equal when their
+    inputs are, so a snapshot can serve as an entity's state key as it is.
+    """
+
+    __slots__ = (
+        "fund_code",
+        "fund_name",
+        "fund_full_name",
+        "net_value_date",
+        "update_time",
+        "prev_net_value_date",
+        "cost_method",
+        "_dwjz",
+        "_gsz",
+        "_gszzl",
+        "_prev_dwjz",
+        "_shares",
+        "_cost",
+        "_avg",
+        "_realized",
+        "_dividends",
+        *DERIVED,
+    )
+
+    def __init__(
+        self,
+        fund_code: str,
+        fund_name: str,
+        fund_full_name: str,
+        net_value_date: str,
+        update_time: str,
+        prev_net_value_date: str,
+        dwjz: float,
+        gsz: float,
+        gszzl: float,
+        prev_dwjz: float,
+        hold_shares: float,
+        initial_cost: float,
+        avg_net_value: float,
+        cost_method: str | None = None,
+        realized: float = 0.0,
+        dividends: float = 0.0,
+    ) -> None:
+        """Initialize from parsed upstream values and the holding."""
+        self.fund_code = fund_code
+        self.fund_name = fund_name
+        self.fund_full_name = fund_full_name
+        self.net_value_date = net_value_date
+        self.update_time = update_time
+        self.prev_net_value_date = prev_net_value_date
+        self.cost_method = cost_method
+        self._dwjz = dwjz
+        # 估算净值为0时使用单位净值代替
+        self._gsz = dwjz if gsz == 0 and dwjz > 0 else gsz
+        self._gszzl = gszzl
+        self._prev_dwjz = prev_dwjz
+        self._shares = hold_shares
+        self._cost = initial_cost
+        self._avg = avg_net_value
+        self._realized = realized
+        self._dividends = dividends
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> FundSnapshot:
+        """Rebuild a snapshot from its dict form, e.g. a stored one."""
+        return cls(
+            fund_code=data.get("fund_code") or "",
+            fund_name=data.get("fund_name") or "",
+            fund_full_name=data.get("fund_full_name") or "",
+            net_value_date=data.get("net_value_date") or "",
+            update_time=data.get("update_time") or "",
+            prev_net_value_date=data.get("prev_net_value_date") or "",
+            dwjz=float(data.get("actual_net_value") or 0),
+            gsz=float(data.get("estimated_net_value") or 0),
+            gszzl=float(data.get("estimated_growth_rate") or 0),
+            prev_dwjz=float(data.get("prev_net_value") or 0),
+            hold_shares=float(data.get("hold_shares") or 0),
+            initial_cost=float(data.get("initial_cost") or 0),
+            avg_net_value=float(data.get("avg_net_value") or 0),
+            cost_method=data.get("cost_method"),
+            realized=float(data.get("realized_profit") or 0),
+            dividends=float(data.get("dividends") or 0),
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        """Compute the derived fields on the first read of any of them."""
+        if name not in _DERIVED_SET:
+            raise AttributeError(
+                f"{type(self).__name__!r} object has no attribute {name!r}"
+            )
+        self._derive()
+        return object.__getattribute__(self, name)
+
+    def __eq__(self, other: object) -> bool:
+        """Compare the inputs."""
+        if not isinstance(other, FundSnapshot):
+            return NotImplemented
+        return other is self or other._key() == self._key()
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        """Return a short description."""
+        return f"<FundSnapshot {self.fund_code} {self.update_time or self.net_value_date}>"
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return every field, for diagnostics and the stored snapshot."""
+        return {name: getattr(self, name) for name in FIELDS}
+
+    def _key(self) -> tuple:
+        """Return the inputs; equal inputs give equal figures."""
+        return (
+            self.fund_code,
+            self.fund_name,
+            self.fund_full_name,
+            self.net_value_date,
+            self.update_time,
+            self.prev_net_value_date,
+            self.cost_method,
+            self._dwjz,
+            self._gsz,
+            self._gszzl,
+            self._prev_dwjz,
+            self._shares,
+            self._cost,
+            self._avg,
+            self._realized,
+            self._dividends,
+        )
+
+    def _derive(self) -> None:
+        """Compute every figure and the attribute view over them."""
+        dwjz = self._dwjz
+        gsz = self._gsz
+        prev_dwjz = self._prev_dwjz
+        shares = self._shares
+        cost = self._cost
+
+        self.avg_net_value = avg_net_value = _round4(self._avg)
+        self.hold_shares = hold_shares = _round2(shares)
+        self.initial_cost = initial_cost = _round2(cost)
+        self.realized_profit = realized_profit = _round2(self._realized)
+        self.dividends = dividends = _round2(self._dividends)
+
+        # 估算指标
+        self.estimated_net_value = estimated_net_value = _round4(gsz)
+        self.estimated_growth_rate = estimated_growth_rate = _round4(self._gszzl)
+        self.estimated_value = estimated_value = _round2(shares * gsz)
+        self.estimated_profit = estimated_profit = _round2(estimated_value - cost)
+        self.estimated_profit_rate = estimated_profit_rate = (
+            _round2(estimated_profit / cost * 100) if cost else 0
+        )
+
+        # 实际（昨天）指标
+        self.actual_net_value = actual_net_value = _round4(dwjz)
+        self.actual_value = actual_value = _round2(shares * dwjz)
+        self.actual_profit = actual_profit = _round2(actual_value - cost)
+        self.actual_profit_rate = actual_profit_rate = (
+            _round2(actual_profit / cost * 100) if cost else 0
+        )
+
+        # 前天相关，没有前天净值时无法计算，设为0
+        if prev_dwjz <= 0:
+            prev_net_value = prev_value = prev_profit = prev_profit_rate = 0
+            prev_growth_rate = rise_fall_net_value = 0
+        else:
+            prev_net_value = _round4(prev_dwjz)
+            prev_value = _round2(shares * prev_dwjz)
+            prev_profit = _round2(prev_value - cost)
+            prev_profit_rate = _round2(prev_profit / cost * 100) if cost else 0
+            # 前天增长率（前天到昨天）
+            prev_growth_rate = _round4((dwjz - prev_dwjz) / prev_dwjz * 100)
+            # 涨跌净值 = 单位净值 - 前天净值
+            rise_fall_net_value = _round4(dwjz - prev_dwjz)
+        self.prev_net_value = prev_net_value
+        self.prev_value = prev_value
+        self.prev_profit = prev_profit
+        self.prev_profit_rate = prev_profit_rate
+        self.prev_growth_rate = prev_growth_rate
+        self.rise_fall_net_value = rise_fall_net_value
+        self.rise_fall_icon = rise_fall_icon = (
+            "📈" if estimated_profit >= actual_profit else "📉"
+        )
+
+        # 主传感器的属性视图，调用方不得修改
+        self.attributes = {
+            # 基础数据
+            "基金代码": self.fund_code,
+            "基金名称": self.fund_name,
+            "基金全称": self.fund_full_name,
+            "涨跌净值": rise_fall_net_value,
+            "涨跌图标": rise_fall_icon,
+            "平均净值": avg_net_value,
+            "持仓份额": hold_shares,
+            "初始成本": initial_cost,
+            "成本计算方法": self.cost_method,
+            "已实现收益": realized_profit,
+            "累计分红": dividends,
+
+            # 净值数据
+            "净值日期": self.net_value_date,
+            "单位净值": actual_net_value,
+            "前天日期": self.prev_net_value_date,
+            "前天净值": prev_net_value,
+            "前天市值": prev_value,
+            "前天收益": prev_profit,
+            "前天收益率": prev_profit_rate,
+            "前天增长率": prev_growth_rate,
+            "持仓市值": actual_value,
+            "持仓收益": actual_profit,
+            "持仓收益率": actual_profit_rate,
+
+            # 估算数据
+            "估算时间": self.update_time,
+            "估算净值": estimated_net_value,
+            "估算增长率": estimated_growth_rate,
+            "估算市值": estimated_value,
+            "估算收益": estimated_profit,
+            "估算收益率": estimated_profit_rate,
+        }
@@ -0,0 +1,182 @@
+"""Deferred first refresh after startup for Daily Fund integration."""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import re
+from typing import TYPE_CHECKING
+
+from homeassistant.core import CoreState, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.start import async_at_started
+
+from .const import (
+    DOMAIN,
+    DATA_ALERTS,
+    DATA_STARTUP,
+    CONF_GROUP,
+    PORTFOLIO_ALL,
+    STARTUP_WAVE_SIZE,
+    STARTUP_STAGGER,
+)
+from .portfolio import parse_groups
+
+if TYPE_CHECKING:
+    from .coordinator import DailyFundCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+LOVELACE_DOMAIN = "lovelace"
+
+# 仪表盘配置中形如 sensor.xxx 的实体ID
+_ENTITY_ID_RE = re.compile(r"\b[a-z0-9_]+\.[a-z0-9_]+\b")
+
+
+class StartupRefresher:
+    """Hold the first refresh of the funds set up during startup.
+
+    Setting up a fund only restores its snapshot and registers it here,
+    so the integration adds no network time to startup whatever the
+    number of funds. Once Home Assistant has started, the funds refresh
+    in waves of one engine round each, ``STARTUP_STAGGER`` seconds apart:
+    funds with alerts or shown on a dashboard first, then the rest. NAV
+    history syncs follow the last wave. Funds set up after startup
+    refresh in the background right away.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize."""
+        self.hass = hass
+        self._pending: dict[str, DailyFundCoordinator] = {}
+        self._task: asyncio.Task | None = None
+        async_at_started(hass, self._async_started)
+
+    @property
+    def is_done(self) -> bool:
+        """Return True once every fund held at startup has refreshed."""
+        return (
+            self.hass.state is CoreState.running
+            and not self._pending
+            and (self._task is None or self._task.done())
+        )
+
+    @callback
+    def async_add(self, coordinator: DailyFundCoordinator) -> None:
+        """Register a fund with the engine and schedule its first refresh."""
+        if self.hass.state is CoreState.running:
+            coordinator.engine.async_register(coordinator)
+            # 启动完成后添加的基金直接刷新
+            coordinator.entry.async_create_task(
+                self.hass,
+                self._async_refresh([coordinator]),
+                f"{DOMAIN} {coordinator.fund_code} initial refresh",
+            )
+            return
+
+        coordinator.engine.async_register(coordinator)
+        # 首次刷新之前不按间隔自动刷新
+        coordinator.update_interval = None
+        self._pending[coordinator.fund_code] = coordinator
+
+    @callback
+    def async_remove(self, coordinator: DailyFundCoordinator) -> None:
+        """Drop a fund that is unloaded before its first refresh."""
+        if self._pending.get(coordinator.fund_code) is coordinator:
+            del self._pending[coordinator.fund_code]
+
+    @callback
+    def _async_started(self, hass: HomeAssistant) -> None:
+        """Start the waves of first refreshes."""
+        if self._pending:
+            self._task = hass.async_create_background_task(
+                self._async_run(), f"{DOMAIN} startup refresh"
+            )
+
+    async def _async_run(self) -> None:
+        """Refresh the held funds wave by wave, prioritized ones first."""
+        coordinators = list(self._pending.values())
+        first = await self._async_prioritized(coordinators)
+        waves = [
+            part[index:index + STARTUP_WAVE_SIZE]
+            for part in (
+                [c for c in coordinators if c.fund_code in first],
+                [c for c in coordinators if c.fund_code not in first],
+            )
+            for index in range(0, len(part), STARTUP_WAVE_SIZE)
+        ]
+        _LOGGER.debug(
+            "启动完成，%s 只基金分 %s 波首次刷新，其中优先 %s 只",
+            len(coordinators),
+            len(waves),
+            len(first),
+        )
+
+        refreshed: list[DailyFundCoordinator] = []
+        for index, wave in enumerate(waves):
+            if index:
+                await asyncio.sleep(STARTUP_STAGGER)
+            # 等待期间已卸载的基金不再刷新
+            wave = [c for c in wave if self._pending.pop(c.fund_code, None) is c]
+            await asyncio.gather(*(c.async_refresh() for c in wave))
+            refreshed.extend(wave)
+
+        # 历史净值同步放在所有基金首次刷新之后
+        for coordinator in refreshed:
+            if self.hass.data[DOMAIN].get(coordinator.entry.entry_id) is coordinator:
+                coordinator.async_schedule_history_sync()
+
+    async def _async_refresh(self, coordinators: list[DailyFundCoordinator]) -> None:
+        """Refresh funds set up after startup, then sync their NAV history."""
+        await asyncio.gather(*(c.async_refresh() for c in coordinators))
+        for coordinator in coordinators:
+            coordinator.async_schedule_history_sync()
+
+    async def _async_prioritized(
+        self, coordinators: list[DailyFundCoordinator]
+    ) -> set[str]:
+        """Return the codes of funds with alerts or shown on a dashboard."""
+        alerts = self.hass.data[DOMAIN].get(DATA_ALERTS)
+        shown = await _async_dashboard_entities(self.hass)
+        registry = er.async_get(self.hass)
+        first: set[str] = set()
+        for coordinator in coordinators:
+            groups = (PORTFOLIO_ALL, *parse_groups(coordinator.entry.data.get(CONF_GROUP)))
+            if alerts is not None and alerts.async_has_rules(coordinator.fund_code, groups):
+                first.add(coordinator.fund_code)
+            elif shown and any(
+                entity.entity_id in shown
+                for entity in er.async_entries_for_config_entry(
+                    registry, coordinator.entry.entry_id
+                )
+            ):
+                first.add(coordinator.fund_code)
+        return first
+
+
+async def _async_dashboard_entities(hass: HomeAssistant) -> set[str]:
+    """Return the entity IDs named in the saved dashboard configs."""
+    lovelace = hass.data.get(LOVELACE_DOMAIN)
+    # 新版本为数据类，旧版本为字典
+    dashboards = getattr(lovelace, "dashboards", None)
+    if dashboards is None and isinstance(lovelace, dict):
+        dashboards = lovelace.get("dashboards")
+
+    entity_ids: set[str] = set()
+    for dashboard in (dashboards or {}).values():
+        try:
+            config = await dashboard.async_load(False)
+        except Exception:  # pylint: disable=broad-except
+            # 自动生成的仪表盘没有保存的配置
+            continue
+        entity_ids.update(_ENTITY_ID_RE.findall(json.dumps(config, ensure_ascii=False)))
+    return entity_ids
+
+
+@callback
+def async_get_startup(hass: HomeAssistant) -> StartupRefresher:
+    """Return the shared startup refresher, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (startup := domain_data.get(DATA_STARTUP)) is None:
+        startup = domain_data[DATA_STARTUP] = StartupRefresher(hass)
+    return startup
@@ -0,0 +1,95 @@
+"""Persistent snapshot cache for Daily Fund integration."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    DATA_SNAPSHOTS,
+    SNAPSHOT_STORAGE_KEY,
+    SNAPSHOT_STORAGE_VERSION,
+    SNAPSHOT_SAVE_DELAY,
+)
+from .snapshot import FundSnapshot
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class FundSnapshotStore:
+    """Keep the last processed data of every fund in ``.storage``.
+
+    All funds share one file. Updates only mark the store dirty and
+    ``async_delay_save`` coalesces them into a single write. Snapshots are
+    kept as ``FundSnapshot`` objects and only turned into dicts on save.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, SNAPSHOT_STORAGE_VERSION, SNAPSHOT_STORAGE_KEY
+        )
+        self._snapshots: dict[str, dict[str, Any]] = {}
+
+    async def async_load(self) -> None:
+        """Load snapshots from disk."""
+        if (data := await self._store.async_load()) is not None:
+            self._snapshots = {
+                fund_code: {**snapshot, "data": FundSnapshot.from_dict(snapshot["data"])}
+                for fund_code, snapshot in data.get("funds", {}).items()
+            }
+        _LOGGER.debug("已加载 %s 只基金的本地快照", len(self._snapshots))
+
+    @callback
+    def async_get(self, fund_code: str) -> dict[str, Any] | None:
+        """Return the stored snapshot of a fund."""
+        return self._snapshots.get(fund_code)
+
+    @callback
+    def async_update(
+        self, fund_code: str, data: FundSnapshot, nav: dict[str, Any] | None
+    ) -> None:
+        """Record a fund's latest data and schedule a batched write."""
+        self._snapshots[fund_code] = {
+            "data": data,
+            "nav": nav,
+            "saved_at": dt_util.utcnow().isoformat(),
+        }
+        self._store.async_delay_save(self._data_to_save, SNAPSHOT_SAVE_DELAY)
+
+    @callback
+    def async_remove(self, fund_code: str) -> None:
+        """Forget a fund's snapshot."""
+        if self._snapshots.pop(fund_code, None) is not None:
+            self._store.async_delay_save(self._data_to_save, SNAPSHOT_SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return data to store."""
+        return {
+            "funds": {
+                fund_code: {**snapshot, "data": snapshot["data"].as_dict()}
+                for fund_code, snapshot in self._snapshots.items()
+            }
+        }
+
+
+async def async_get_snapshot_store(hass: HomeAssistant) -> FundSnapshotStore:
+    """Return the shared snapshot store, loading it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_SNAPSHOTS in domain_data:
+        return domain_data[DATA_SNAPSHOTS]
+
+    # 多个条目同时启动时只加载一次
+    lock: asyncio.Lock = domain_data.setdefault(f"{DATA_SNAPSHOTS}_lock", asyncio.Lock())
+    async with lock:
+        if DATA_SNAPSHOTS not in domain_data:
+            store = FundSnapshotStore(hass)
+            await store.async_load()
+            domain_data[DATA_SNAPSHOTS] = store
+    return domain_data[DATA_SNAPSHOTS]
@@ -0,0 +1,237 @@
+"""SSE/SZSE trading calendar and refresh scheduler for Daily Fund integration."""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import math
+import os
+from datetime import date, datetime, time, timedelta
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    DATA_CALENDAR,
+    MARKET_TIME_ZONE,
+    HOLIDAYS_FILE,
+    LOCAL_HOLIDAYS_FILE,
+    TRADING_HOURS_AM_START,
+    TRADING_HOURS_AM_START_MINUTE,
+    TRADING_HOURS_AM_END,
+    TRADING_HOURS_AM_END_MINUTE,
+    TRADING_HOURS_PM_START,
+    TRADING_HOURS_PM_END,
+    NET_VALUE_PUBLISH_START,
+    NET_VALUE_PUBLISH_END,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+AM_OPEN = time(TRADING_HOURS_AM_START, TRADING_HOURS_AM_START_MINUTE)
+AM_CLOSE = time(TRADING_HOURS_AM_END, TRADING_HOURS_AM_END_MINUTE)
+PM_OPEN = time(TRADING_HOURS_PM_START, 0)
+PM_CLOSE = time(TRADING_HOURS_PM_END, 0)
+PUBLISH_START = time(NET_VALUE_PUBLISH_START, 0)
+PUBLISH_END = time(NET_VALUE_PUBLISH_END, 0)
+
+
+class TradingCalendar:
+    """Know which days the exchanges trade and when a fund should be polled.
+
+    Closures come from the bundled ``holidays.json``; a
+    ``daily_fund_holidays.json`` in the configuration directory overrides
+    whole years, so a new year's table can be added without an update.
+    Years missing from both fall back to a weekday-only calendar.
+    """
+
+    def __init__(self, holidays: dict[int, set[date]]) -> None:
+        """Initialize."""
+        self.tz = dt_util.get_time_zone(MARKET_TIME_ZONE)
+        self._holidays = holidays
+        self._warned_years: set[int] = set()
+
+    @classmethod
+    def load(cls, local_path: str | None = None) -> TradingCalendar:
+        """Load the bundled and local holiday tables (blocking)."""
+        holidays: dict[int, set[date]] = {}
+        paths = [os.path.join(os.path.dirname(__file__), HOLIDAYS_FILE)]
+        if local_path and os.path.isfile(local_path):
+            paths.append(local_path)
+
+        for path in paths:
+            try:
+                with open(path, encoding="utf-8") as file:
+                    table = json.load(file)
+                for year, days in table.items():
+                    holidays[int(year)] = {date.fromisoformat(day) for day in days}
+            except (OSError, ValueError) as err:
+                _LOGGER.error("读取休市表 %s 失败: %s", path, err)
+
+        _LOGGER.debug("已加载休市表年份: %s", sorted(holidays))
+        return cls(holidays)
+
+    def now(self) -> datetime:
+        """Return the current time in the market time zone."""
+        return dt_util.now(self.tz)
+
+    def at(self, day: date, moment: time) -> datetime:
+        """Return an aware market datetime for a day and time of day."""
+        return datetime.combine(day, moment, tzinfo=self.tz)
+
+    def is_trading_day(self, day: date) -> bool:
+        """Return True if the exchanges are open on the given day."""
+        if day.weekday() >= 5:
+            return False
+        if (holidays := self._holidays.get(day.year)) is None:
+            if day.year not in self._warned_years:
+                self._warned_years.add(day.year)
+                _LOGGER.warning(
+                    "休市表缺少 %s 年，按周一至周五交易处理，可在 %s 中补充",
+                    day.year,
+                    LOCAL_HOLIDAYS_FILE,
+                )
+            return True
+        return day not in holidays
+
+    def previous_trading_day(self, day: date) -> date:
+        """Return the last trading day strictly before the given day."""
+        day -= timedelta(days=1)
+        while not self.is_trading_day(day):
+            day -= timedelta(days=1)
+        return day
+
+    def next_trading_day(self, day: date) -> date:
+        """Return the first trading day strictly after the given day."""
+        day += timedelta(days=1)
+        while not self.is_trading_day(day):
+            day += timedelta(days=1)
+        return day
+
+    def is_trading_hours(self, now: datetime) -> bool:
+        """Return True during a trading session."""
+        if not self.is_trading_day(now.date()):
+            return False
+        current = now.time()
+        return AM_OPEN <= current <= AM_CLOSE or PM_OPEN <= current <= PM_CLOSE
+
+    def is_net_value_publish_hours(self, now: datetime) -> bool:
+        """Return True inside a window a missing NAV may be published in.
+
+        That is the publish window of a trading day, or of the day after
+        the expected NAV date, on which late NAVs (QDII) still come out.
+        """
+        day = now.date()
+        if not self.is_trading_day(day) and day != self.late_publish_day(now):
+            return False
+        return PUBLISH_START <= now.time() <= PUBLISH_END
+
+    def expected_nav_date(self, now: datetime) -> date:
+        """Return the latest trading day whose NAV may already be published."""
+        day = now.date()
+        if self.is_trading_day(day) and now.time() >= PUBLISH_START:
+            return day
+        return self.previous_trading_day(day)
+
+    def late_publish_day(self, now: datetime) -> date:
+        """Return the calendar day after the expected NAV date."""
+        return self.expected_nav_date(now) + timedelta(days=1)
+
+    def next_publish_time(self, now: datetime, late: bool = False) -> datetime:
+        """Return the start of the next NAV publish window.
+
+        With ``late``, the window of the late publish day counts too, even
+        when that day is not a trading day.
+        """
+        day = now.date()
+        if self.is_trading_day(day) and now.time() < PUBLISH_START:
+            return self.at(day, PUBLISH_START)
+        start = self.at(self.next_trading_day(day), PUBLISH_START)
+        if late and now < (late_start := self.at(self.late_publish_day(now), PUBLISH_START)):
+            return min(late_start, start)
+        return start
+
+    def next_wakeup(
+        self,
+        now: datetime,
+        trading_interval: float,
+        net_value_interval: float,
+        nav_current: bool,
+        phase: float = 0.0,
+    ) -> datetime:
+        """Return when a fund should next be polled.
+
+        Polls are aligned to a grid anchored at each session open and at the
+        start of the publish window, and always land on the session and
+        window boundaries. ``phase`` (0-1) shifts the sessions by that
+        fraction of the trading interval and the window by that fraction of
+        the NAV interval, so funds in different phases poll at different
+        moments of each interval. Once the latest NAV is in, nothing is
+        polled until the next session opens, which suspends non-trading days.
+        A NAV that is still missing is only polled for within the publish
+        window of the late publish day, never through the rest of the night
+        or a weekend.
+        """
+        day = now.date()
+        trading_shift = timedelta(seconds=phase * trading_interval)
+        publish_shift = timedelta(seconds=phase * net_value_interval)
+        next_open = self.at(self.next_trading_day(day), AM_OPEN) + trading_shift
+
+        if self.is_trading_day(day):
+            am_open = self.at(day, AM_OPEN) + trading_shift
+            am_close = self.at(day, AM_CLOSE) + trading_shift
+            pm_open = self.at(day, PM_OPEN) + trading_shift
+            pm_close = self.at(day, PM_CLOSE) + trading_shift
+            publish_start = self.at(day, PUBLISH_START) + publish_shift
+            publish_end = self.at(day, PUBLISH_END) + publish_shift
+
+            if now < am_open:
+                return am_open
+            if now < am_close:
+                return _aligned(now, am_open, trading_interval, am_close)
+            if now < pm_open:
+                return pm_open
+            if now < pm_close:
+                return _aligned(now, pm_open, trading_interval, pm_close)
+            # 收盘后估算不再变化，直接等待净值公布时段
+            if now < publish_start:
+                return publish_start
+            if not nav_current and now < publish_end:
+                return _aligned(now, publish_start, net_value_interval, publish_end)
+
+        if not nav_current:
+            # 净值迟迟未公布（如QDII），只在次日的公布时段内检查；
+            # 次日是交易日时由上面的交易日分支处理
+            late_day = self.late_publish_day(now)
+            if not self.is_trading_day(late_day):
+                late_start = self.at(late_day, PUBLISH_START) + publish_shift
+                late_end = self.at(late_day, PUBLISH_END) + publish_shift
+                if now < late_start:
+                    return late_start
+                if now < late_end:
+                    return _aligned(now, late_start, net_value_interval, late_end)
+        return next_open
+
+
+def _aligned(
+    now: datetime, anchor: datetime, interval: float, limit: datetime
+) -> datetime:
+    """Return the next grid point after now, capped at limit."""
+    steps = math.floor((now - anchor).total_seconds() / interval) + 1
+    return min(anchor + timedelta(seconds=steps * interval), limit)
+
+
+async def async_get_trading_calendar(hass: HomeAssistant) -> TradingCalendar:
+    """Return the shared trading calendar, loading it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_CALENDAR in domain_data:
+        return domain_data[DATA_CALENDAR]
+
+    lock: asyncio.Lock = domain_data.setdefault(f"{DATA_CALENDAR}_lock", asyncio.Lock())
+    async with lock:
+        if DATA_CALENDAR not in domain_data:
+            domain_data[DATA_CALENDAR] = await hass.async_add_executor_job(
+                TradingCalendar.load, hass.config.path(LOCAL_HOLIDAYS_FILE)
+            )
+    return domain_data[DATA_CALENDAR]
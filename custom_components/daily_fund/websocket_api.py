@@ -0,0 +1,78 @@
+"""Websocket API for Daily Fund integration."""
+from __future__ import annotations
+
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN, CONF_FUND_CODE
+
+
+@callback
+def async_register_websocket_commands(hass: HomeAssistant) -> None:
+    """Register the Daily Fund websocket commands."""
+    websocket_api.async_register_command(hass, websocket_intraday)
+    websocket_api.async_register_command(hass, websocket_transactions)
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/intraday",
+        vol.Optional("fund_codes"): [str],
+    }
+)
+@callback
+def websocket_intraday(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Return the intraday estimate curves of many funds in one message."""
+    # 命令在启动时注册，协调器模块在首次调用时才导入
+    from .coordinator import DailyFundCoordinator
+
+    coordinators = {
+        coordinator.fund_code: coordinator
+        for coordinator in hass.data.get(DOMAIN, {}).values()
+        if isinstance(coordinator, DailyFundCoordinator)
+    }
+    # 未指定基金时返回全部
+    codes = msg.get("fund_codes") or list(coordinators)
+    connection.send_result(
+        msg["id"],
+        {
+            code: coordinators[code].intraday.as_dict()
+            for code in codes
+            if code in coordinators
+        },
+    )
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/transactions",
+        vol.Required(CONF_FUND_CODE): str,
+    }
+)
+@websocket_api.async_response
+async def websocket_transactions(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Return a fund's ledger and the position built from it."""
+    from .ledger import async_get_ledger
+
+    ledger = await async_get_ledger(hass)
+    fund_code = msg[CONF_FUND_CODE]
+    position = ledger.async_get_position(fund_code)
+    connection.send_result(
+        msg["id"],
+        {
+            "transactions": ledger.async_get_transactions(fund_code),
+            "position": position.as_dict() if position else None,
+        },
+    )
@@ -0,0 +1 @@
+"""Tests for the Daily Fund integration."""
@@ -0,0 +1,46 @@
+"""Fixtures for Daily Fund tests."""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+pytest_plugins = "pytest_homeassistant_custom_component"
+
+
+class FakeClock:
+    """A monotonic clock that only moves when told to."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        """Return the current reading."""
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        """Move the clock forward."""
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    """Drive monotonic() and asyncio.sleep() of the tested modules by hand.
+
+    Sleeping advances the clock instead of waiting, so timing tests run
+    instantly and always see the same readings.
+    """
+    from custom_components.daily_fund import health, rate_limiter
+
+    fake = FakeClock()
+    real_sleep = asyncio.sleep
+
+    async def sleep(delay: float, result=None):
+        fake.advance(delay)
+        return await real_sleep(0, result)
+
+    monkeypatch.setattr(health, "monotonic", fake)
+    monkeypatch.setattr(rate_limiter, "monotonic", fake)
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    return fake
@@ -0,0 +1,45 @@
+"""Tests for the crossing state of an alert threshold."""
+from __future__ import annotations
+
+from custom_components.daily_fund.alerts import (
+    DIRECTION_ABOVE,
+    DIRECTION_BELOW,
+    AlertState,
+)
+
+
+def _feed(direction: str, values: list[float], debounce: int = 1) -> list[bool | None]:
+    """Return the result of each value against threshold 2, hysteresis 0.2."""
+    state = AlertState()
+    return [state.update(direction, 2, value, 0.2, debounce) for value in values]
+
+
+def test_crossing_and_clearing() -> None:
+    """Test a crossing fires once and clears beyond the hysteresis."""
+    assert _feed(DIRECTION_ABOVE, [1.5, 2.0, 2.5, 1.9, 1.8, 1.7, 2.1]) == [
+        None, True, None, None, None, False, True,
+    ]
+    assert _feed(DIRECTION_BELOW, [2.5, 2.0, 1.5, 2.1, 2.3, 1.9]) == [
+        None, True, None, None, False, True,
+    ]
+
+
+def test_already_crossed_fires() -> None:
+    """Test a value already beyond the threshold fires on the first update."""
+    assert _feed(DIRECTION_ABOVE, [3.0]) == [True]
+    assert _feed(DIRECTION_BELOW, [1.0]) == [True]
+
+
+def test_debounce() -> None:
+    """Test a crossing needs consecutive updates beyond the threshold."""
+    assert _feed(DIRECTION_ABOVE, [2.1, 1.0, 2.1, 2.2, 2.3], debounce=2) == [
+        None, None, None, True, None,
+    ]
+
+
+def test_value_is_kept() -> None:
+    """Test the last value is remembered for diagnostics."""
+    state = AlertState()
+    state.update(DIRECTION_ABOVE, 2, 1.5, 0.2, 1)
+    assert state.value == 1.5
+    assert not state.active
@@ -0,0 +1,105 @@
+"""Tests for the NAV history analytics."""
+from __future__ import annotations
+
+import math
+import random
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from custom_components.daily_fund.analytics import FundAnalytics
+from custom_components.daily_fund.const import (
+    ANALYTICS_MA_WINDOWS,
+    ANALYTICS_REBUILD_THRESHOLD,
+    ANALYTICS_RETURN_WINDOWS,
+    ANALYTICS_VOLATILITY_WINDOW,
+)
+from custom_components.daily_fund.history import FundHistory
+
+
+def _rows(count: int, seed: int = 1) -> list[tuple[date, float, float]]:
+    """Return a reproducible random walk of NAV rows."""
+    rng = random.Random(seed)
+    rows = []
+    day = date(2015, 1, 5)
+    nav = 1.0
+    for _ in range(count):
+        day += timedelta(days=rng.choice((1, 1, 1, 1, 3)))
+        nav = round(nav * (1 + rng.gauss(0, 0.01)), 4)
+        rows.append((day, nav, round(nav + 0.5, 4)))
+    return rows
+
+
+def _stats(analytics: FundAnalytics) -> dict[str, float | None]:
+    """Return every statistic unrounded."""
+    stats = {
+        f"return_{days}d": analytics.period_return(days)
+        for days in ANALYTICS_RETURN_WINDOWS
+    }
+    stats["volatility"] = analytics.volatility
+    stats["max_drawdown"] = analytics.max_drawdown
+    for window in ANALYTICS_MA_WINDOWS:
+        stats[f"ma_{window}"] = analytics.moving_average(window)
+    return stats
+
+
+@pytest.mark.parametrize("step", [1, 7, ANALYTICS_REBUILD_THRESHOLD + 1])
+def test_incremental_matches_rebuild(step: int) -> None:
+    """Test folding rows in gives the same statistics as a full rebuild."""
+    rows = _rows(1200)
+    history = FundHistory()
+    history.extend(rows[:900])
+    incremental = FundAnalytics(history)
+    for start in range(900, len(rows), step):
+        history.extend(rows[start:start + step])
+        incremental.update()
+
+    rebuilt = _stats(FundAnalytics(history))
+    for name, value in _stats(incremental).items():
+        assert value == pytest.approx(rebuilt[name], rel=1e-9, abs=1e-9), name
+
+
+def test_matches_reference() -> None:
+    """Test the statistics against a direct NumPy computation."""
+    rows = _rows(600)
+    history = FundHistory()
+    history.extend(rows)
+    analytics = FundAnalytics(history)
+
+    acc_nav = np.array([row[2] for row in rows])
+    nav = np.array([row[1] for row in rows])
+    returns = np.diff(np.log(acc_nav[-(ANALYTICS_VOLATILITY_WINDOW + 1):]))
+    assert analytics.volatility == pytest.approx(returns.std(ddof=1) * math.sqrt(250) * 100)
+    peaks = np.maximum.accumulate(acc_nav)
+    assert analytics.max_drawdown == pytest.approx(((acc_nav / peaks).min() - 1) * 100)
+    assert analytics.moving_average(20) == pytest.approx(nav[-20:].mean())
+
+    # 以窗口起点当天或之前最近的净值为基准
+    start = rows[-1][0] - timedelta(days=30)
+    base = [row for row in rows if row[0] <= start][-1]
+    assert analytics.period_return(30) == pytest.approx((rows[-1][2] / base[2] - 1) * 100)
+
+
+def test_empty_and_short_history() -> None:
+    """Test statistics that need more rows than stored are missing."""
+    history = FundHistory()
+    analytics = FundAnalytics(history)
+    assert all(value is None for value in analytics.as_dict().values())
+
+    history.extend(_rows(3))
+    analytics.update()
+    stats = analytics.as_dict()
+    assert stats["ma_5"] is None
+    assert stats["return_365d"] is None
+    assert stats["max_drawdown"] is not None
+    assert stats["volatility"] is not None
+
+
+def test_as_dict_is_rounded() -> None:
+    """Test the display values are rounded per statistic."""
+    history = FundHistory()
+    history.extend(_rows(300))
+    stats = FundAnalytics(history).as_dict()
+    assert stats["volatility"] == round(stats["volatility"], 2)
+    assert stats["ma_5"] == round(stats["ma_5"], 4)
@@ -0,0 +1,142 @@
+"""Tests for the per-source circuit breaker."""
+from __future__ import annotations
+
+import pytest
+
+from custom_components.daily_fund.const import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_OPEN_SECONDS,
+    SOURCE_PRIOR_LATENCY,
+    SOURCE_STATS_TTL,
+)
+from custom_components.daily_fund.health import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    SourceHealth,
+    SourceHealthRegistry,
+)
+
+
+def _trip(health: SourceHealth) -> None:
+    """Fail enough calls in a row to open the circuit."""
+    for _ in range(CIRCUIT_FAILURE_THRESHOLD):
+        assert health.allow()
+        health.record_failure()
+
+
+def test_opens_after_consecutive_failures(clock) -> None:
+    """Test the circuit opens only after the failure threshold."""
+    health = SourceHealth("estimate")
+    for _ in range(CIRCUIT_FAILURE_THRESHOLD - 1):
+        health.record_failure()
+    health.record_success(0.5)
+    assert health.consecutive_failures == 0
+
+    _trip(health)
+    assert health.state == STATE_OPEN
+    assert not health.available
+    assert not health.allow()
+    assert health.rejected == 1
+
+
+def test_single_half_open_probe(clock) -> None:
+    """Test only one probe is let through once the open period ends."""
+    health = SourceHealth("estimate")
+    _trip(health)
+    clock.advance(CIRCUIT_OPEN_SECONDS)
+
+    # available 不能占用探测名额
+    assert health.available
+    assert health.available
+    assert health.state == STATE_OPEN
+
+    assert health.allow()
+    assert health.state == STATE_HALF_OPEN
+    assert not health.available
+    assert not health.allow()
+
+
+def test_failed_probe_doubles_open_period(clock) -> None:
+    """Test a failed probe reopens the circuit for twice as long."""
+    health = SourceHealth("estimate")
+    _trip(health)
+    clock.advance(CIRCUIT_OPEN_SECONDS)
+    assert health.allow()
+    health.record_failure()
+    assert health.state == STATE_OPEN
+
+    clock.advance(CIRCUIT_OPEN_SECONDS)
+    assert not health.allow()
+    clock.advance(CIRCUIT_OPEN_SECONDS)
+    assert health.allow()
+
+
+def test_successful_probe_closes_circuit(clock) -> None:
+    """Test a successful probe closes the circuit and resets the period."""
+    health = SourceHealth("estimate")
+    _trip(health)
+    clock.advance(CIRCUIT_OPEN_SECONDS)
+    assert health.allow()
+    health.record_success(0.2)
+    assert health.state == STATE_CLOSED
+
+    _trip(health)
+    clock.advance(CIRCUIT_OPEN_SECONDS)
+    assert health.allow()
+
+
+def test_abandoned_probe_is_released(clock) -> None:
+    """Test a cancelled probe lets the next call probe instead."""
+    health = SourceHealth("estimate")
+    _trip(health)
+    clock.advance(CIRCUIT_OPEN_SECONDS)
+    assert health.allow()
+    health.record_abandoned()
+    assert health.state == STATE_OPEN
+    assert health.allow()
+
+    # 关闭状态下放弃的调用不影响熔断器
+    closed = SourceHealth("history")
+    closed.record_abandoned()
+    assert closed.state == STATE_CLOSED
+
+
+def test_score_tracks_latency_and_expires(clock) -> None:
+    """Test the score follows the measured cost and falls back when stale."""
+    health = SourceHealth("estimate")
+    health.record_success(3.0)
+    assert SOURCE_PRIOR_LATENCY < health.score < 3.0
+    health.record_failure()
+    slower = health.score
+    assert slower > health.latency
+
+    clock.advance(SOURCE_STATS_TTL + 1)
+    assert health.score == SOURCE_PRIOR_LATENCY
+
+
+def test_rank_prefers_available_and_clearly_better(clock) -> None:
+    """Test ranking keeps the default order unless a fallback is much better."""
+    registry = SourceHealthRegistry()
+    assert registry.rank(["estimate", "pingzhong"]) == ["estimate", "pingzhong"]
+
+    # 略好的备用源不会被提前
+    registry.get("estimate").record_success(1.2)
+    registry.get("pingzhong").record_success(0.9)
+    assert registry.rank(["estimate", "pingzhong"]) == ["estimate", "pingzhong"]
+
+    for _ in range(10):
+        registry.get("pingzhong").record_success(0.1)
+    assert registry.rank(["estimate", "pingzhong"]) == ["pingzhong", "estimate"]
+
+    _trip(registry.get("pingzhong"))
+    assert registry.rank(["estimate", "pingzhong"]) == ["estimate", "pingzhong"]
+    assert registry.stats["pingzhong"]["state"] == STATE_OPEN
+
+
+@pytest.mark.parametrize("latency", [0.0, 10.0])
+def test_latency_is_smoothed(clock, latency: float) -> None:
+    """Test one sample only moves the latency part of the way."""
+    health = SourceHealth("estimate")
+    health.record_success(latency)
+    assert health.latency == pytest.approx(0.8 * SOURCE_PRIOR_LATENCY + 0.2 * latency)
@@ -0,0 +1,105 @@
+"""Tests for the array-backed NAV history and its storage encoding."""
+from __future__ import annotations
+
+from datetime import date
+
+from custom_components.daily_fund.history import (
+    FundHistory,
+    _delta_encode,
+    _split,
+    parse_lsjz_rows,
+)
+
+ROWS = [
+    (date(2024, 1, 2), 1.0123, 3.2123),
+    (date(2024, 1, 3), 1.0098, 3.2098),
+    (date(2024, 1, 4), 1.0201, 3.2201),
+    # 分红：单位净值下跌，累计净值不变
+    (date(2024, 1, 5), 0.9201, 3.2201),
+    (date(2024, 1, 8), 0.9251, 3.2251),
+]
+
+
+def _history(rows=ROWS) -> FundHistory:
+    """Return a history holding the given rows."""
+    history = FundHistory()
+    history.extend(rows)
+    return history
+
+
+def test_delta_encoding() -> None:
+    """Test integer columns round-trip through the delta encoding."""
+    values = [739000, 739001, 739002, 738990, 739100]
+    text = _delta_encode(values)
+    assert text == "739000,1,1,-12,110"
+    assert _split(text) == [739000, 1, 1, -12, 110]
+    assert _delta_encode([]) == ""
+    assert _split("") == []
+
+
+def test_round_trip() -> None:
+    """Test the stored columns rebuild the same history."""
+    history = _history()
+    data = history.as_dict()
+    restored = FundHistory.from_dict(data)
+    assert restored.between() == history.between()
+    assert list(restored.days) == list(history.days)
+
+
+def test_storage_is_compact() -> None:
+    """Test consecutive rows take a few characters per column."""
+    data = _history().as_dict()
+    assert data["days"].split(",")[1:] == ["1", "1", "1", "3"]
+    assert data["nav"].split(",")[1:] == ["-25", "103", "-1000", "50"]
+    # 累计与单位净值之差只在分红时变化
+    assert data["acc_offset"] == "22000,0,0,1000,0"
+
+
+def test_from_empty_dict() -> None:
+    """Test an empty store gives an empty history."""
+    history = FundHistory.from_dict({})
+    assert len(history) == 0
+    assert history.first_date is None
+    assert history.last_date is None
+
+
+def test_extend_only_appends_newer_rows() -> None:
+    """Test rows at or before the last stored date are ignored."""
+    history = _history(ROWS[:3])
+    added = history.extend(
+        [ROWS[4], ROWS[1], ROWS[3], (date(2024, 1, 4), 9.0, 9.0)]
+    )
+    assert added == 2
+    assert history.between() == ROWS
+
+
+def test_between() -> None:
+    """Test date ranges are inclusive and may fall between rows."""
+    history = _history()
+    assert history.first_date == date(2024, 1, 2)
+    assert history.last_date == date(2024, 1, 8)
+    assert history.between(date(2024, 1, 3), date(2024, 1, 5)) == ROWS[1:4]
+    assert history.between(date(2024, 1, 6)) == ROWS[4:]
+    assert history.between(end=date(2024, 1, 1)) == []
+    assert history.index_range(date(2024, 1, 9), date(2024, 1, 1)) == (5, 5)
+
+
+def test_parse_lsjz_rows() -> None:
+    """Test unusable rows are skipped and bad accumulated NAVs replaced."""
+    rows = parse_lsjz_rows(
+        [
+            {"FSRQ": "2024-01-05", "DWJZ": "1.0100", "LJJZ": "3.0100"},
+            {"FSRQ": "2024-01-04", "DWJZ": "1.0000", "LJJZ": ""},
+            {"FSRQ": "2024-01-03", "DWJZ": "1.0000", "LJJZ": "0"},
+            {"FSRQ": "2024-01-02", "DWJZ": "1.0000", "LJJZ": "nan"},
+            {"FSRQ": "2024-01-01", "DWJZ": ""},
+            {"FSRQ": "", "DWJZ": "1.0"},
+            {"FSRQ": "2023-12-29", "DWJZ": "0"},
+        ]
+    )
+    assert rows == [
+        (date(2024, 1, 5), 1.01, 3.01),
+        (date(2024, 1, 4), 1.0, 1.0),
+        (date(2024, 1, 3), 1.0, 1.0),
+        (date(2024, 1, 2), 1.0, 1.0),
+    ]
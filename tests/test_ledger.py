@@ -0,0 +1,113 @@
+"""Tests for the cost basis of a position."""
+from __future__ import annotations
+
+import pytest
+
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.daily_fund.const import (
+    COST_METHOD_AVERAGE,
+    COST_METHOD_FIFO,
+    TRANSACTION_BUY,
+    TRANSACTION_DIVIDEND,
+    TRANSACTION_SELL,
+)
+from custom_components.daily_fund.ledger import Position
+
+
+def _position(method: str, *transactions: dict) -> Position:
+    """Return a position with the transactions applied."""
+    position = Position(method)
+    for transaction in transactions:
+        position.apply(transaction)
+    return position
+
+
+BUYS = (
+    {"type": TRANSACTION_BUY, "shares": 100, "amount": 100},
+    {"type": TRANSACTION_BUY, "shares": 100, "amount": 200},
+)
+SELL = {"type": TRANSACTION_SELL, "shares": 150, "amount": 300, "fee": 3}
+
+
+def test_fifo_sells_oldest_lots_first() -> None:
+    """Test FIFO takes cost from the oldest lots."""
+    position = _position(COST_METHOD_FIFO, *BUYS, SELL)
+    # 卖出成本 = 100×1 + 50×2
+    assert position.shares == pytest.approx(50)
+    assert position.cost == pytest.approx(100)
+    assert position.average_cost == pytest.approx(2)
+    assert position.realized == pytest.approx(300 - 3 - 200)
+
+
+def test_average_sells_at_average_cost() -> None:
+    """Test the average method takes cost at the running average."""
+    position = _position(COST_METHOD_AVERAGE, *BUYS, SELL)
+    assert position.shares == pytest.approx(50)
+    assert position.cost == pytest.approx(75)
+    assert position.average_cost == pytest.approx(1.5)
+    assert position.realized == pytest.approx(300 - 3 - 225)
+
+    position.apply({"type": TRANSACTION_BUY, "shares": 50, "amount": 125})
+    assert position.average_cost == pytest.approx(2)
+
+
+def test_selling_everything_clears_residue() -> None:
+    """Test a full sale leaves no floating-point residue."""
+    position = _position(
+        COST_METHOD_FIFO,
+        {"type": TRANSACTION_BUY, "shares": 0.1, "amount": 0.3},
+        {"type": TRANSACTION_BUY, "shares": 0.2, "amount": 0.3},
+        {"type": TRANSACTION_SELL, "shares": 0.3, "amount": 1},
+    )
+    assert position.shares == 0
+    assert position.cost == 0
+    assert position.average_cost == 0
+
+
+def test_dividends() -> None:
+    """Test cash dividends are profit and reinvested ones add a lot."""
+    position = _position(
+        COST_METHOD_FIFO,
+        BUYS[0],
+        {"type": TRANSACTION_DIVIDEND, "amount": 5},
+        {"type": TRANSACTION_DIVIDEND, "shares": 10, "amount": 12},
+    )
+    assert position.dividends == pytest.approx(17)
+    assert position.realized == pytest.approx(17)
+    assert position.shares == pytest.approx(110)
+    assert position.cost == pytest.approx(112)
+
+    position.apply({"type": TRANSACTION_SELL, "shares": 105, "amount": 130})
+    # 剩下的是再投资批次中的5份
+    assert position.cost == pytest.approx(6)
+
+
+@pytest.mark.parametrize(
+    "transaction",
+    [
+        {"type": TRANSACTION_SELL, "shares": 101, "amount": 1},
+        {"type": TRANSACTION_BUY, "shares": 0, "amount": 1},
+        {"type": "transfer", "shares": 1, "amount": 1},
+    ],
+)
+def test_invalid_transactions(transaction: dict) -> None:
+    """Test transactions that cannot be applied are rejected."""
+    position = _position(COST_METHOD_FIFO, BUYS[0])
+    with pytest.raises(HomeAssistantError):
+        position.apply(transaction)
+
+
+def test_as_dict_is_rounded() -> None:
+    """Test the display form is rounded."""
+    position = _position(
+        COST_METHOD_AVERAGE, {"type": TRANSACTION_BUY, "shares": 3, "amount": 10}
+    )
+    assert position.as_dict() == {
+        "method": COST_METHOD_AVERAGE,
+        "shares": 3,
+        "cost": 10,
+        "average_cost": 3.3333,
+        "realized": 0,
+        "dividends": 0,
+    }
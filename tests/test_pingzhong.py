@@ -0,0 +1,82 @@
+"""Tests for the pingzhongdata.js extractor."""
+from __future__ import annotations
+
+import pytest
+
+from custom_components.daily_fund.pingzhong import (
+    TREND_START,
+    PingzhongExtractor,
+    extract_pingzhong,
+)
+
+# 2024-01-04、2024-01-05 00:00 (UTC+8) 的毫秒时间戳
+DAY_1 = 1704297600000
+DAY_2 = 1704384000000
+
+HEAD = (
+    '/*2024-01-05 15:00:00*/var ishb=false;var fS_name = "华夏成长混合";'
+    'var fS_code = "000001";var fS_dwjz = 1.0123 ;var fS_jzrq=\'2024-01-05\';'
+    'var fS_gsz="1.0200";var fS_gszzl="0.76";var fS_gztime="2024-01-05 15:00";'
+    'var fund_sourceRate="1.50";'
+)
+TREND = (
+    f'var Data_netWorthTrend = [{{"x":{DAY_1},"y":1.0001,"equityReturn":0}},'
+    f'{{"x":{DAY_2},"y":1.0123,"equityReturn":1.22}}];'
+)
+TAIL = 'var Data_ACWorthTrend = [[1,2]];var fS_name = "later";' * 100
+BODY = HEAD + TREND + TAIL
+
+EXPECTED = {
+    "fS_name": "华夏成长混合",
+    "fS_code": "000001",
+    "fS_dwjz": "1.0123",
+    "fS_jzrq": "2024-01-05",
+    "fS_gsz": "1.0200",
+    "fS_gszzl": "0.76",
+    "fS_gztime": "2024-01-05 15:00",
+    "trend_dwjz": "1.0123",
+    "trend_jzrq": "2024-01-05",
+    "trend_prev_dwjz": "1.0001",
+    "trend_prev_jzrq": "2024-01-04",
+}
+
+
+def test_extract_whole_body() -> None:
+    """Test every value is extracted in one pass."""
+    assert extract_pingzhong(BODY) == EXPECTED
+
+
+def test_missing_trend() -> None:
+    """Test a body without the trend array still yields the scalars."""
+    values = extract_pingzhong(HEAD)
+    assert values["fS_gsz"] == "1.0200"
+    assert "trend_dwjz" not in values
+
+
+def test_empty_values_are_skipped() -> None:
+    """Test empty scalars are left out rather than returned blank."""
+    assert "fS_gsz" not in extract_pingzhong('var fS_gsz="";var fS_name="x";')
+
+
+@pytest.mark.parametrize("size", [1, 7, len(TREND_START) - 1, 64, 4096])
+def test_feed_stops_after_trend(size: int) -> None:
+    """Test feeding chunks stops once the trend array is complete."""
+    extractor = PingzhongExtractor()
+    done = False
+    for start in range(0, len(BODY), size):
+        if extractor.feed(BODY[start:start + size]):
+            done = True
+            break
+    assert done
+    # 趋势数组之后的大段内容不必下载
+    assert extractor.size < len(HEAD) + len(TREND) + size
+    assert extractor.result() == EXPECTED
+
+
+def test_feed_needs_the_whole_trend() -> None:
+    """Test a body cut inside the trend array asks for more data."""
+    extractor = PingzhongExtractor()
+    assert not extractor.feed("")
+    assert not extractor.feed(HEAD)
+    assert not extractor.feed(TREND[:-2])
+    assert extractor.feed(TREND[-2:])
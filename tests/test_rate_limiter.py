@@ -0,0 +1,91 @@
+"""Tests for the domain-wide token bucket."""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from custom_components.daily_fund.rate_limiter import TokenBucket
+
+
+async def test_burst_then_paced(clock) -> None:
+    """Test a burst goes out at once and the rest at the refill rate."""
+    bucket = TokenBucket(rate=10, burst=3)
+    started = clock.now
+    for _ in range(5):
+        await bucket.async_acquire()
+    assert clock.now - started == pytest.approx(0.2)
+    assert bucket.acquired == 5
+    assert bucket.delayed == 2
+    assert bucket.total_wait == pytest.approx(0.2)
+
+
+async def test_waiters_are_queued(clock) -> None:
+    """Test concurrent waiters are counted in the queue depth."""
+    bucket = TokenBucket(rate=10, burst=1)
+    await asyncio.gather(*(bucket.async_acquire() for _ in range(4)))
+    # 第一个请求直接拿到令牌，不必排队
+    assert bucket.max_queue_depth == 3
+    assert bucket.queue_depth == 0
+    assert bucket.delayed == 3
+
+
+def test_refill_is_capped_at_burst(clock) -> None:
+    """Test an idle bucket holds at most a burst of tokens."""
+    bucket = TokenBucket(rate=10, burst=3)
+    for _ in range(3):
+        assert bucket._reserve() == 0
+    assert bucket._reserve() == pytest.approx(0.1)
+    clock.advance(100)
+    for _ in range(3):
+        assert bucket._reserve() == 0
+    assert bucket._reserve() == pytest.approx(0.1)
+
+
+def test_throttled_pauses_everything(clock) -> None:
+    """Test an upstream throttling signal empties and pauses the bucket."""
+    bucket = TokenBucket(rate=10, burst=3)
+    bucket.throttled(5)
+    assert bucket.stats["paused"]
+    assert bucket.stats["upstream_throttled"] == 1
+    assert bucket._reserve() == pytest.approx(5)
+    clock.advance(5)
+    assert not bucket.stats["paused"]
+    assert bucket._reserve() == 0
+
+
+async def test_background_leaves_the_reserve(clock) -> None:
+    """Test background requests never take the reserved tokens."""
+    bucket = TokenBucket(rate=10, burst=5, reserve=2)
+    started = clock.now
+    for _ in range(3):
+        await bucket.async_acquire_background()
+    assert clock.now == started
+    # 剩余的预留令牌仍可立即用于常规请求
+    assert bucket._reserve() == 0
+    await bucket.async_acquire_background()
+    assert clock.now > started
+    assert bucket.background == 4
+    assert bucket.acquired == 0
+
+
+def test_reserve_is_below_burst() -> None:
+    """Test the reserve always leaves background requests a token."""
+    assert TokenBucket(rate=10, burst=3, reserve=5).reserve == 2
+
+
+async def test_background_yields_to_waiting_requests(clock) -> None:
+    """Test a waiting regular request is served before a background one."""
+    bucket = TokenBucket(rate=10, burst=1)
+    assert bucket._reserve() == 0
+    order: list[str] = []
+
+    async def run(acquire, name: str) -> None:
+        await acquire()
+        order.append(name)
+
+    regular = asyncio.create_task(run(bucket.async_acquire, "regular"))
+    await asyncio.sleep(0)
+    assert bucket.queue_depth == 1
+    await asyncio.gather(regular, run(bucket.async_acquire_background, "background"))
+    assert order == ["regular", "background"]
@@ -0,0 +1,80 @@
+"""Tests for the slotted per-fund snapshot."""
+from __future__ import annotations
+
+import pytest
+
+from custom_components.daily_fund.snapshot import FIELDS, FundSnapshot
+
+
+def _snapshot(**overrides) -> FundSnapshot:
+    """Return a snapshot of a holding with a profit."""
+    values = {
+        "fund_code": "000001",
+        "fund_name": "华夏成长混合",
+        "fund_full_name": "华夏成长证券投资基金",
+        "net_value_date": "2024-01-05",
+        "update_time": "2024-01-08 15:00",
+        "prev_net_value_date": "2024-01-04",
+        "dwjz": 1.2,
+        "gsz": 1.26,
+        "gszzl": 5.0,
+        "prev_dwjz": 1.0,
+        "hold_shares": 1000,
+        "initial_cost": 1000,
+        "avg_net_value": 1.0,
+    }
+    values.update(overrides)
+    return FundSnapshot(**values)
+
+
+def test_derived_figures() -> None:
+    """Test the figures computed from the inputs."""
+    snapshot = _snapshot()
+    assert snapshot.actual_value == 1200
+    assert snapshot.actual_profit == 200
+    assert snapshot.actual_profit_rate == 20
+    assert snapshot.estimated_value == 1260
+    assert snapshot.estimated_profit == 260
+    assert snapshot.estimated_profit_rate == 26
+    assert snapshot.prev_profit == 0
+    assert snapshot.prev_growth_rate == 20
+    assert snapshot.rise_fall_net_value == pytest.approx(0.2)
+    assert snapshot.rise_fall_icon == "📈"
+    assert snapshot.attributes["持仓收益"] == 200
+
+
+def test_missing_values() -> None:
+    """Test a missing estimate or previous NAV does not break the figures."""
+    snapshot = _snapshot(gsz=0, prev_dwjz=0, initial_cost=0)
+    # 估算净值为0时使用单位净值
+    assert snapshot.estimated_net_value == 1.2
+    assert snapshot.prev_value == 0
+    assert snapshot.rise_fall_net_value == 0
+    assert snapshot.actual_profit_rate == 0
+    assert snapshot.rise_fall_icon == "📈"
+
+
+def test_derived_once() -> None:
+    """Test the attribute view is computed once and then shared."""
+    snapshot = _snapshot()
+    assert snapshot.attributes is snapshot.attributes
+    with pytest.raises(AttributeError):
+        snapshot.not_a_field  # noqa: B018
+
+
+def test_equality_by_inputs() -> None:
+    """Test snapshots with the same inputs are equal and unhashable."""
+    assert _snapshot() == _snapshot()
+    assert _snapshot() != _snapshot(gsz=1.27)
+    assert _snapshot() != object()
+    with pytest.raises(TypeError):
+        hash(_snapshot())
+
+
+def test_dict_round_trip() -> None:
+    """Test the dict form rebuilds an equal snapshot."""
+    snapshot = _snapshot(cost_method="fifo", realized=12.5, dividends=3)
+    data = snapshot.as_dict()
+    assert tuple(data) == FIELDS
+    assert FundSnapshot.from_dict(data) == snapshot
+    assert FundSnapshot.from_dict({}).as_dict()["estimated_value"] == 0
@@ -0,0 +1,133 @@
+"""Tests for the trading calendar and refresh scheduler."""
+from __future__ import annotations
+
+import json
+from datetime import date, datetime
+
+import pytest
+
+from custom_components.daily_fund.trading_calendar import TradingCalendar
+
+# 2024年春节休市（工作日部分）
+SPRING_FESTIVAL = {date(2024, 2, day) for day in (9, 12, 13, 14, 15, 16)}
+
+TRADING = 300
+NET_VALUE = 900
+
+
+@pytest.fixture
+def calendar() -> TradingCalendar:
+    """Return a calendar with the 2024 Spring Festival closure."""
+    return TradingCalendar({2024: SPRING_FESTIVAL})
+
+
+def _at(calendar: TradingCalendar, text: str) -> datetime:
+    """Return a market time from an ISO string."""
+    return datetime.fromisoformat(text).replace(tzinfo=calendar.tz)
+
+
+def test_trading_days(calendar: TradingCalendar) -> None:
+    """Test weekends and holidays are skipped."""
+    assert calendar.is_trading_day(date(2024, 2, 8))
+    assert not calendar.is_trading_day(date(2024, 2, 9))
+    assert not calendar.is_trading_day(date(2024, 2, 10))
+    assert calendar.next_trading_day(date(2024, 2, 8)) == date(2024, 2, 19)
+    assert calendar.previous_trading_day(date(2024, 2, 19)) == date(2024, 2, 8)
+    # 休市表缺少的年份按周一至周五处理
+    assert calendar.is_trading_day(date(2031, 1, 1))
+
+
+def test_local_table_overrides_year(tmp_path) -> None:
+    """Test a local holiday table replaces the bundled year."""
+    local = tmp_path / "daily_fund_holidays.json"
+    local.write_text(json.dumps({"2024": ["2024-01-03"]}), encoding="utf-8")
+    calendar = TradingCalendar.load(str(local))
+    assert not calendar.is_trading_day(date(2024, 1, 3))
+    assert calendar.is_trading_day(date(2024, 2, 9))
+
+
+def test_expected_nav_date(calendar: TradingCalendar) -> None:
+    """Test which NAV date should already be published."""
+    assert calendar.expected_nav_date(_at(calendar, "2024-01-03 17:59")) == date(2024, 1, 2)
+    assert calendar.expected_nav_date(_at(calendar, "2024-01-03 18:00")) == date(2024, 1, 3)
+    assert calendar.expected_nav_date(_at(calendar, "2024-02-19 10:00")) == date(2024, 2, 8)
+    assert calendar.late_publish_day(_at(calendar, "2024-01-07 12:00")) == date(2024, 1, 6)
+
+
+@pytest.mark.parametrize(
+    ("now", "nav_current", "expected"),
+    [
+        # 交易时段按开盘对齐的网格轮询，落在开收盘边界上
+        ("2024-01-03 08:50", True, "2024-01-03 09:30"),
+        ("2024-01-03 09:31", True, "2024-01-03 09:35"),
+        ("2024-01-03 11:28", True, "2024-01-03 11:30"),
+        ("2024-01-03 11:30", True, "2024-01-03 13:00"),
+        ("2024-01-03 14:58", True, "2024-01-03 15:00"),
+        # 收盘后直接等净值公布时段
+        ("2024-01-03 15:00", True, "2024-01-03 18:00"),
+        ("2024-01-03 18:00", False, "2024-01-03 18:15"),
+        ("2024-01-03 21:50", False, "2024-01-03 22:00"),
+        # 净值已公布，暂停到下一个交易日开盘
+        ("2024-01-03 18:20", True, "2024-01-04 09:30"),
+        ("2024-01-05 23:00", True, "2024-01-08 09:30"),
+        ("2024-02-08 19:00", True, "2024-02-19 09:30"),
+        # 净值迟迟未公布，只在次日公布时段内检查
+        ("2024-01-03 22:30", False, "2024-01-04 09:30"),
+        ("2024-01-05 22:30", False, "2024-01-06 18:00"),
+        ("2024-01-06 12:00", False, "2024-01-06 18:00"),
+        ("2024-01-06 18:20", False, "2024-01-06 18:30"),
+        ("2024-01-06 22:10", False, "2024-01-08 09:30"),
+        ("2024-01-07 12:00", False, "2024-01-08 09:30"),
+        ("2024-02-10 12:00", False, "2024-02-19 09:30"),
+    ],
+)
+def test_next_wakeup(
+    calendar: TradingCalendar, now: str, nav_current: bool, expected: str
+) -> None:
+    """Test when a fund is polled next."""
+    wakeup = calendar.next_wakeup(
+        _at(calendar, now), TRADING, NET_VALUE, nav_current
+    )
+    assert wakeup == _at(calendar, expected)
+
+
+@pytest.mark.parametrize(
+    ("now", "expected"),
+    [
+        ("2024-03-04 09:00", "2024-03-04 09:32:30"),
+        ("2024-03-04 10:00", "2024-03-04 10:02:30"),
+        ("2024-03-04 14:59", "2024-03-04 15:02:30"),
+        ("2024-03-04 15:30", "2024-03-04 18:07:30"),
+        ("2024-03-04 18:10", "2024-03-04 18:22:30"),
+    ],
+)
+def test_next_wakeup_phase(calendar: TradingCalendar, now: str, expected: str) -> None:
+    """Test a phase shifts the sessions and the publish window."""
+    wakeup = calendar.next_wakeup(
+        _at(calendar, now), TRADING, NET_VALUE, False, 0.5
+    )
+    assert wakeup == _at(calendar, expected)
+
+
+def test_publish_hours(calendar: TradingCalendar) -> None:
+    """Test the windows a missing NAV is checked in."""
+    assert calendar.is_net_value_publish_hours(_at(calendar, "2024-01-03 19:00"))
+    assert not calendar.is_net_value_publish_hours(_at(calendar, "2024-01-03 23:00"))
+    assert calendar.is_net_value_publish_hours(_at(calendar, "2024-01-06 19:00"))
+    assert not calendar.is_net_value_publish_hours(_at(calendar, "2024-01-07 19:00"))
+
+
+def test_next_publish_time(calendar: TradingCalendar) -> None:
+    """Test the next publish window, with and without late NAVs."""
+    assert calendar.next_publish_time(_at(calendar, "2024-02-08 19:00")) == _at(
+        calendar, "2024-02-19 18:00"
+    )
+    assert calendar.next_publish_time(
+        _at(calendar, "2024-01-05 22:30"), late=True
+    ) == _at(calendar, "2024-01-06 18:00")
+    assert calendar.next_publish_time(
+        _at(calendar, "2024-01-06 22:30"), late=True
+    ) == _at(calendar, "2024-01-08 18:00")
+    assert calendar.next_publish_time(
+        _at(calendar, "2024-01-03 22:30"), late=True
+    ) == _at(calendar, "2024-01-04 18:00")